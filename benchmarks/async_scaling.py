@@ -0,0 +1,84 @@
+""" Throughput of many incubator co-simulations, one after the other and concurrently
+
+    sequential    n scenarios run in turn by the blocking Orchestrator
+    async         n scenarios run concurrently by cosim.async_orchestrator in one event loop
+
+Both use the backend interface with the FMU folders of the repository, so no
+UniFMU binary is needed. The aggregate throughput (co-simulation steps of all
+scenarios per second of wall-clock time, including the start of the backends)
+is reported per number of scenarios.
+
+    python benchmarks/async_scaling.py 2>/dev/null
+    python benchmarks/async_scaling.py --sizes 1 4 16 64 --steps 500 2>/dev/null
+"""
+
+import argparse
+import asyncio
+import copy
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+repository = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repository))
+
+from cosim.async_orchestrator import instance_scenarios, run_scenarios
+from cosim.orchestrator import Orchestrator, load_scenario
+
+
+def incubator_scenario(steps, results_dir):
+    scenario = load_scenario(repository / "scenarios" / "incubator.toml")
+    for name, config in scenario["fmus"].items():
+        config["path"] = str(repository / Path(config["path"]).stem)
+        config["interface"] = "backend"
+    simulation = scenario["simulation"]
+    simulation["end_time"] = simulation["start_time"] + steps * simulation["step_size"]
+    simulation["real_time"] = False
+    scenario["results"]["file"] = str(Path(results_dir) / "incubator.arrow")
+    scenario["results"]["csv_export"] = None
+    return scenario
+
+
+def run_sequential(scenarios):
+    steps = 0
+    for scenario in scenarios:
+        orchestrator = Orchestrator(copy.deepcopy(scenario))
+        try:
+            steps += orchestrator.run()
+        finally:
+            orchestrator.close()
+    return steps
+
+
+def run_async(scenarios, limit):
+    outcomes = asyncio.run(run_scenarios(scenarios, limit))
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            raise outcome
+    return sum(outcomes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of sequential and concurrent incubator co-simulations.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16], help="Numbers of scenarios")
+    parser.add_argument("--steps", type=int, default=1000, help="Steps per scenario")
+    parser.add_argument("--limit", type=int, help="Maximum number of concurrent scenarios (all by default)")
+    args = parser.parse_args()
+
+    print(f"{'scenarios':>10}{'sequential':>18}{'async':>18}")
+    with tempfile.TemporaryDirectory() as results_dir:
+        scenarios = instance_scenarios(incubator_scenario(args.steps, results_dir), max(args.sizes))
+        for n in args.sizes:
+            start = time.perf_counter()
+            sequential_steps = run_sequential(scenarios[:n])
+            sequential = sequential_steps / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            async_steps = run_async(scenarios[:n], args.limit)
+            concurrent = async_steps / (time.perf_counter() - start)
+            print(f"{n:>10}{sequential:>12.0f} step/s{concurrent:>12.0f} step/s   ({concurrent / sequential:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
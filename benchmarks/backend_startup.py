@@ -0,0 +1,108 @@
+""" Startup time of the FMU backends, with an -X importtime report
+
+Each backend is started from a fresh copy of its resources folder (as after
+extracting the FMU), and the time until its handshake and until its reply to
+Fmi3InstantiateCoSimulation are measured, for:
+
+    original      original_FMUs/<fmu>/resources, which imports everything before the handshake
+    current       <fmu>/resources
+    precompiled   <fmu>/resources with the bytecode compiled beforehand, as wrap_fmus.sh does
+
+The import times reported by `python -X importtime` are summed per top-level
+module, for the import profile of each FMU.
+
+    python benchmarks/backend_startup.py
+    python benchmarks/backend_startup.py --fmus supervisor --repeat 20 --top 15
+"""
+
+import argparse
+import compileall
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+repository = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repository))
+
+from cosim.unifmu import BackendConnection
+
+FMUS = ("plant", "controller", "supervisor")
+
+VARIANTS = ("original", "current", "precompiled")
+
+
+def parse_importtime(log):
+    """ Return {top-level module: cumulative import time [s]} from an -X importtime log """
+    modules = defaultdict(float)
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "): # Only the modules imported by the backend itself
+            modules[name.strip()] += int(cumulative) * 1e-6
+    return modules
+
+
+def start_backend(resources, fmu):
+    """ Start a backend with -X importtime, return (handshake time, instantiate time, import times) """
+
+    with tempfile.TemporaryFile(mode="w+") as log:
+        start = time.perf_counter()
+        backend = BackendConnection(resources, python_options=["-X", "importtime"], stderr=log, timeout=30000)
+        handshake = time.perf_counter() - start
+        backend.call("Fmi3InstantiateCoSimulation", instance_name=fmu)
+        ready = time.perf_counter() - start
+        backend.close()
+        log.seek(0)
+        return handshake, ready, parse_importtime(log.read())
+
+
+def prepare(variant, fmu, directory):
+    """ Copy the resources of `fmu` for `variant` to `directory` """
+
+    source = repository / ("original_FMUs" if variant == "original" else "") / fmu / "resources"
+    shutil.copytree(source, directory, ignore=shutil.ignore_patterns("__pycache__"))
+    if variant == "precompiled":
+        compileall.compile_dir(str(directory), quiet=1,
+                               invalidation_mode=compileall.py_compile.PycInvalidationMode.UNCHECKED_HASH)
+    return directory
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time and import profile of the FMU backends.")
+    parser.add_argument("--fmus", nargs="+", choices=FMUS, default=list(FMUS), help="FMUs to measure")
+    parser.add_argument("--repeat", type=int, default=10, help="Backend starts per FMU and variant")
+    parser.add_argument("--top", type=int, default=8, help="Imports listed per FMU")
+    args = parser.parse_args()
+
+    print(f"{'fmu':<12}{'variant':<13}{'handshake':>12}{'ready':>12}{'imports':>12}")
+    for fmu in args.fmus:
+        profiles = {}
+        for variant in VARIANTS:
+            handshakes, readies, imports = [], [], defaultdict(list)
+            for _ in range(args.repeat):
+                with tempfile.TemporaryDirectory() as tmp:
+                    resources = prepare(variant, fmu, Path(tmp) / "resources")
+                    handshake, ready, modules = start_backend(resources, fmu)
+                handshakes.append(handshake)
+                readies.append(ready)
+                for name, duration in modules.items():
+                    imports[name].append(duration)
+            profiles[variant] = {name: statistics.median(durations) for name, durations in imports.items()}
+            print(f"{fmu:<12}{variant:<13}{statistics.median(handshakes) * 1e3:>9.1f} ms"
+                  f"{statistics.median(readies) * 1e3:>9.1f} ms{sum(profiles[variant].values()) * 1e3:>9.1f} ms")
+
+        print(f"  slowest imports (median ms, {' / '.join(VARIANTS)}):")
+        slowest = sorted(profiles["original"], key=profiles["original"].get, reverse=True)[:args.top]
+        for name in slowest:
+            times = " / ".join(f"{profiles[v].get(name, 0.0) * 1e3:6.1f}" for v in VARIANTS)
+            print(f"    {name:<40}{times}")
+
+
+if __name__ == "__main__":
+    main()
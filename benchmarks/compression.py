@@ -0,0 +1,105 @@
+""" Size and speed of the .xor result format (cosim/compression.py)
+
+Each recorded CSV in data/ is converted to .xor, checked to read back bit for
+bit (against the exact parse of the CSV), and compared in size with the other
+formats. Then per column, over blocks of --flush-every rows as the
+ResultWriter writes them during a run:
+
+    codec       the codec chosen in most blocks (XOR or delta-of-delta of the bit patterns)
+    bits/value  encoded size per value
+    encode      values encoded per second
+    decode      values decoded per second
+
+and last, the time plots/plot.py takes to load its columns from each format.
+
+    python benchmarks/compression.py [--flush-every 1000] [--repeat 5]
+"""
+
+import argparse
+import collections
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+repository = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repository))
+
+from cosim.compression import DELTA_OF_DELTA, XOR, decode_column, encode_column
+from cosim.results import RESULT_SCHEMA, convert_results, load_columns, read_results
+
+TRACES = sorted(path for path in (repository / "data").glob("*.csv") if not path.stem.endswith(".changes"))
+CODECS = {XOR: "XOR", DELTA_OF_DELTA: "delta-of-delta"}
+
+
+def best_of(repeat, function):
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def lossless(trace, path):
+    """ True if the columns of `path` are those of the CSV `trace`, bit for bit """
+
+    exact = pd.read_csv(trace, float_precision="round_trip")
+    converted = read_results(path)
+    return all(np.array_equal(exact[name].to_numpy(), converted[name].to_numpy().astype(exact[name].dtype))
+               for name in exact.columns)
+
+
+def column_stats(values, dtype, block, repeat):
+    """ (codec, bits per value, encoded values per second, decoded values per second) of a column """
+
+    blocks = [values[k:k + block] for k in range(0, len(values), block)]
+    encoded = [encode_column(b, dtype) for b in blocks]
+    codec = collections.Counter(c for c, _ in encoded).most_common(1)[0][0]
+    size = sum(len(data) for _, data in encoded)
+    encode_time = best_of(repeat, lambda: [encode_column(b, dtype) for b in blocks])
+    decode_time = best_of(repeat, lambda: [decode_column(c, data, len(b), dtype)
+                                           for (c, data), b in zip(encoded, blocks)])
+    return CODECS.get(codec, "bits"), 8 * size / len(values), len(values) / encode_time, len(values) / decode_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Size and speed of the .xor result format.")
+    parser.add_argument("--flush-every", type=int, default=1000, help="Rows per block, as flushed during a run")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions, the best time is reported")
+    args = parser.parse_args()
+
+    plotted = [name for name, _ in RESULT_SCHEMA]
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+
+        print(f"{'trace':<36}{'rows':>7}{'csv [kB]':>10}{'arrow':>9}{'parquet':>9}{'xor':>8}{'csv/xor':>9}  lossless")
+        for trace in TRACES:
+            sizes = {}
+            for suffix in (".arrow", ".parquet", ".xor"):
+                path = directory / f"{trace.stem}{suffix}"
+                convert_results(trace, path, chunk_size=args.flush_every)
+                sizes[suffix] = path.stat().st_size
+            rows = len(load_columns(directory / f"{trace.stem}.xor", ["sim_time"])["sim_time"])
+            csv_size = trace.stat().st_size
+            print(f"{trace.name:<36}{rows:>7}{csv_size / 1024:>10.1f}{sizes['.arrow'] / 1024:>9.1f}"
+                  f"{sizes['.parquet'] / 1024:>9.1f}{sizes['.xor'] / 1024:>8.1f}{csv_size / sizes['.xor']:>8.0f}x"
+                  f"  {lossless(trace, directory / f'{trace.stem}.xor')}")
+
+        trace = TRACES[-1]
+        data = pd.read_csv(trace, float_precision="round_trip")
+        print(f"\nColumns of {trace.name}, in blocks of {args.flush_every} rows")
+        print(f"{'column':<32}{'codec':>16}{'bits/value':>12}{'encode [M/s]':>14}{'decode [M/s]':>14}")
+        for name, dtype in RESULT_SCHEMA:
+            values = data[name].to_numpy().astype(dtype)
+            codec, bits, encode_rate, decode_rate = column_stats(values, dtype, args.flush_every, args.repeat)
+            print(f"{name:<32}{codec:>16}{bits:>12.2f}{encode_rate / 1e6:>14.1f}{decode_rate / 1e6:>14.1f}")
+
+        print(f"\nLoading the {len(plotted)} columns of plots/plot.py from {trace.name}")
+        csv_time = best_of(args.repeat, lambda: load_columns(trace, plotted))
+        print(f"{'.csv':<10}{csv_time * 1e3:>8.2f} ms")
+        for suffix in (".arrow", ".parquet", ".xor"):
+            path = directory / f"{trace.stem}{suffix}"
+            print(f"{suffix:<10}{best_of(args.repeat, lambda: load_columns(path, plotted)) * 1e3:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+""" Accuracy and CPU time of the coupling schemes of the master
+
+    jacobi         the FMUs step with the outputs of the previous communication point (the default)
+    extrapolated   jacobi, with the plant temperatures extrapolated to the end of the step by their derivatives
+    gauss_seidel   the plant steps first, the controller and the supervisor take its new temperature
+    iterative      fixed-point iteration of the timed inputs from the FMU states saved before each step
+
+Two comparisons are made, both with the backend interface and the FMU folders
+of the repository:
+
+    data/       the first seconds of the reference trace data/simulation_data_5000_steps.csv, up to the
+                first event of the supervisor (its decisions are random after it), at the step of the trace
+    accuracy    the plant temperature and the times the heater switches, for the incubator with a supervisor that
+                does not intervene (so that the run is deterministic), against a Gauss-Seidel run with a small
+                step, per step size
+
+The CPU time is that of the master and of the backends it started. The trace
+in data/ was recorded by the original master, whose plant starts heating a few
+steps later, which accounts for most of its difference with every scheme.
+The plant's step is an Euler step with the derivatives it reports, so the
+extrapolated temperatures are those gauss_seidel sets, and both give the same
+results, while the plant's own integration error over a step dominates the
+difference with the reference.
+
+    python benchmarks/coupling.py 2>/dev/null
+    python benchmarks/coupling.py --steps 0.5 1.5 3.0 --end-time 500 2>/dev/null
+"""
+
+import argparse
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+repository = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repository))
+
+from cosim.orchestrator import Orchestrator, load_scenario
+from cosim.results import read_results
+
+REFERENCE = repository / "data" / "simulation_data_5000_steps.csv"
+
+# Supervisor parameters under which it never changes the heating time or the setpoint
+INERT_SUPERVISOR = {"trigger_optimization_threshold": 1e9, "setpoint_achievements_parameter": 2 ** 31}
+
+
+# Scheme -> (coupling, extrapolation of the inputs)
+SCHEMES = {
+    "jacobi": ("jacobi", False),
+    "extrapolated": ("jacobi", True),
+    "gauss_seidel": ("gauss_seidel", False),
+    "iterative": ("iterative", False),
+}
+
+
+def incubator_scenario(scheme, step_size, end_time, results_dir, supervisor_parameters=None):
+    coupling, extrapolation = SCHEMES[scheme]
+    scenario = load_scenario(repository / "scenarios" / "incubator.toml")
+    for config in scenario["fmus"].values():
+        config["path"] = str(repository / Path(config["path"]).stem)
+        config["interface"] = "backend"
+        config["step_size"] = None # All at the step size, as the iterative coupling needs
+    scenario["fmus"]["supervisor"]["parameters"].update(supervisor_parameters or {})
+    simulation = scenario["simulation"]
+    simulation.update(coupling=coupling, extrapolation=extrapolation, step_size=step_size, end_time=end_time,
+                      real_time=False)
+    scenario["results"]["file"] = str(Path(results_dir) / f"{scheme}_{step_size}.arrow")
+    scenario["results"]["csv_export"] = None
+    return scenario
+
+
+def cpu_time():
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def run(scenario):
+    """ Run `scenario`, return (state times, plant temperatures, heater switch times, CPU time) """
+    start = cpu_time()
+    orchestrator = Orchestrator(scenario)
+    try:
+        orchestrator.run()
+    finally:
+        orchestrator.close() # Waits for the backends, so that their CPU time is counted
+    cpu = cpu_time() - start
+    results = read_results(scenario["results"]["file"])
+    # A row is labelled with the time its step started from, and holds the values at the end of the step
+    times = results["sim_time"].to_numpy() + scenario["simulation"]["step_size"]
+    heater = results["Controller.heater_ctrl"].to_numpy()
+    return times, results["Plant.Temperature"].to_numpy(dtype=float), times[1:][heater[1:] != heater[:-1]], cpu
+
+
+def compare_with_data(results_dir):
+    reference = pd.read_csv(REFERENCE)
+    step_size = reference["sim_time"].iloc[1] - reference["sim_time"].iloc[0]
+    end_time = reference.loc[reference["supervisor_event"], "sim_time"].iloc[0]
+    reference = reference[reference["sim_time"] < end_time]
+    print(f"Against {REFERENCE.relative_to(repository)}, {len(reference)} steps of {step_size} s up to the first "
+          f"supervisor event at t = {end_time} s")
+    print(f"{'scheme':<14}{'max |dT|':>14}{'rms dT':>14}")
+    for scheme in SCHEMES:
+        _, T, _, _ = run(incubator_scenario(scheme, step_size, end_time, results_dir))
+        error = T - reference["Plant.Temperature"].to_numpy()
+        print(f"{scheme:<14}{np.abs(error).max():>12.5f} K{np.sqrt(np.mean(error ** 2)):>12.5f} K")
+
+
+def compare_accuracy(step_sizes, reference_step, end_time, results_dir):
+    reference_times, reference_T, reference_switches, _ = run(
+        incubator_scenario("gauss_seidel", reference_step, end_time, results_dir, INERT_SUPERVISOR))
+    print(f"\nAgainst gauss_seidel with steps of {reference_step} s, {end_time} s with a supervisor that does not "
+          f"intervene ({len(reference_switches)} heater switches)")
+    print(f"{'scheme':<14}{'step':>8}{'CPU':>10}{'max |dT|':>14}{'rms dT':>14}{'switch |dt|':>14}")
+    for step_size in step_sizes:
+        for scheme in SCHEMES:
+            times, T, switches, cpu = run(incubator_scenario(scheme, step_size, end_time, results_dir,
+                                                             INERT_SUPERVISOR))
+            error = T - np.interp(times, reference_times, reference_T)
+            n = min(len(switches), len(reference_switches))
+            switch_error = np.abs(switches[:n] - reference_switches[:n]).mean() if n else float("nan")
+            note = "" if len(switches) == len(reference_switches) else f"   ({len(switches)} switches)"
+            print(f"{scheme:<14}{step_size:>6} s{cpu:>8.2f} s{np.abs(error).max():>12.5f} K"
+                  f"{np.sqrt(np.mean(error ** 2)):>12.5f} K{switch_error:>12.2f} s{note}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy and CPU time of the coupling schemes and extrapolation.")
+    parser.add_argument("--steps", type=float, nargs="+", default=[0.5, 1.0, 1.5, 3.0],
+                        help="Step sizes, divisors of the controller clock interval (3 s)")
+    parser.add_argument("--reference-step", type=float, default=0.1, help="Step size of the accuracy reference")
+    parser.add_argument("--end-time", type=float, default=5000.0, help="Simulated time of the accuracy comparison")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as results_dir:
+        compare_with_data(results_dir)
+        compare_accuracy(args.steps, args.reference_step, args.end_time, results_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+""" Results and cost of the step kernels of the plant and the controller (plant_kernel.py, controller_kernel.py)
+
+    original    original_FMUs/<fmu>/resources/model.py, the step in Python on the model attributes
+    current     <fmu>/resources/model.py, the step in the kernels, compiled by numba when it is installed
+
+The plant and the controller of both are run in a closed loop, in process, and
+their trajectories compared bit for bit, then the time per fmi3DoStep is
+reported. Last, an ensemble of plants is
+stepped with rk4_step_many, split across threads: with numba the kernel
+releases the GIL and the threads run in parallel, up to the number of CPUs.
+
+    python benchmarks/kernels.py
+    UNIFMU_KERNEL=python python benchmarks/kernels.py      # the Python kernels, even with numba
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+repository = Path(__file__).resolve().parent.parent
+for fmu in ("plant", "controller"):
+    sys.path.append(str(repository / fmu / "resources"))
+
+import controller_kernel
+import plant_kernel
+
+
+def load_model(path, name):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.Model
+
+
+def models(variant):
+    root = repository / "original_FMUs" if variant == "original" else repository
+    return tuple(load_model(root / fmu / "resources" / "model.py", f"{variant}_{fmu}_model")(
+        fmu, "", "", False, False, False, False, []) for fmu in ("plant", "controller"))
+
+
+def closed_loop(variant, steps, step_size=0.5, tick=6):
+    """ Trajectory of T, T_heater and heater_ctrl, with the controller ticking every `tick` steps """
+    plant, controller = models(variant)
+    trajectory = np.empty((steps, 3))
+    for k in range(steps):
+        plant.fmi3DoStep(k * step_size, step_size, False)
+        controller.box_air_temperature = plant.T
+        controller.fmi3DoStep(k * step_size, step_size, False)
+        if (k + 1) % tick == 0:
+            controller.controller_clock = True
+            controller.fmi3UpdateDiscreteStates()
+            plant.in_heater_on = controller.heater_ctrl
+        trajectory[k] = plant.T, plant.T_heater, controller.heater_ctrl
+    return trajectory
+
+
+def time_per_step(model, number, repeat):
+    t = [0.0]
+
+    def do_step():
+        model.fmi3DoStep(t[0], 0.5, False)
+        t[0] += 0.5
+
+    return min(timeit.repeat(do_step, number=number, repeat=repeat)) / number
+
+
+def ensemble_rate(n, threads, steps):
+    """ Plant steps per second of `n` plants stepped `steps` times, in `threads` chunks on as many threads """
+    plant, _ = models("current")
+    parameters = (plant.C_air, plant.G_box, plant.C_heater, plant.G_heater, plant.V_heater, plant.I_heater,
+                  plant.initial_room_temperature)
+    chunks = [(np.full(m, 21.0), np.full(m, 21.0), np.arange(m) % 2 == 0)
+              for m in np.diff(np.linspace(0, n, threads + 1).astype(int))]
+
+    def run(chunk):
+        T, T_heater, heater_on = chunk
+        for _ in range(steps):
+            T, T_heater = plant_kernel.rk4_step_many(T, T_heater, heater_on, 0.5, *parameters)
+        return T
+
+    with ThreadPoolExecutor(threads) as executor:
+        list(executor.map(run, chunks)) # Compiles the kernel with numba
+        start = timeit.default_timer()
+        list(executor.map(run, chunks))
+        return n * steps / (timeit.default_timer() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Results and cost of the step kernels of the plant and the controller.")
+    parser.add_argument("--steps", type=int, default=10000, help="Steps of the closed loop")
+    parser.add_argument("--number", type=int, default=20000, help="Calls per timing")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions, the best is reported")
+    parser.add_argument("--plants", type=int, default=100000, help="Plants of the ensemble")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4], help="Threads of the ensemble")
+    args = parser.parse_args()
+
+    accelerated = plant_kernel.ACCELERATED and controller_kernel.ACCELERATED
+    print(f"Kernels: {'numba' if accelerated else 'Python'} ({os.cpu_count()} CPUs)")
+
+    original, current = closed_loop("original", args.steps), closed_loop("current", args.steps)
+    switches = np.count_nonzero(np.diff(current[:, 2]))
+    print(f"Closed loop of {args.steps} steps ({switches} heater switches): identical trajectories "
+          f"{np.array_equal(original, current)}")
+
+    plant, controller = models("current")
+    T, T_heater = np.linspace(15.0, 40.0, 1000), np.linspace(15.0, 70.0, 1000)
+    heater_on = np.arange(1000) % 3 == 0
+    parameters = (plant.C_air, plant.G_box, plant.C_heater, plant.G_heater, plant.V_heater, plant.I_heater,
+                  plant.initial_room_temperature)
+    many = plant_kernel.rk4_step_many(T, T_heater, heater_on, 0.5, *parameters)
+    single = np.array([plant_kernel.rk4_step(a, b, plant.V_heater * plant.I_heater if on else 0.0, 0.5,
+                                             *parameters[:4], parameters[6])
+                       for a, b, on in zip(T, T_heater, heater_on)]).T
+    print(f"rk4_step_many identical to rk4_step: {np.array_equal(np.array(many), single)}")
+
+    print(f"\n{'fmi3DoStep':<14}{'original':>12}{'current':>12}")
+    for name, original_model, current_model in zip(("plant", "controller"), models("original"), (plant, controller)):
+        original_time = time_per_step(original_model, args.number, args.repeat)
+        current_time = time_per_step(current_model, args.number, args.repeat)
+        print(f"{name:<14}{original_time * 1e6:>9.2f} us{current_time * 1e6:>9.2f} us   "
+              f"({original_time / current_time:.1f}x)")
+
+    print(f"\nEnsemble of {args.plants} plants with rk4_step_many")
+    base = None
+    for threads in args.threads:
+        rate = ensemble_rate(args.plants, threads, 100)
+        base = base or rate
+        print(f"{threads:>3} threads {rate / 1e6:>8.1f} M plant steps/s   ({rate / base:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
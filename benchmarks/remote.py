@@ -0,0 +1,110 @@
+""" Incubator co-simulations with the backends on workers, over loopback TCP
+
+    backend    the backends are started by the master, as with --interface backend
+    remote     the backends are started by workers of a broker (cosim.remote.local_cluster), each worker a process
+               of its own as on another host, and the FMU commands go over TCP between the master and the backends
+
+The same scenario is run once with each interface and the results are
+compared, then `--instances` copies are run concurrently by
+cosim.async_orchestrator, and the throughput (co-simulation steps of all
+scenarios per second of wall-clock time, including the start of the backends)
+and the placement of the backends on the workers are reported.
+
+    python benchmarks/remote.py 2>/dev/null
+    python benchmarks/remote.py --workers 4 --instances 16 --steps 500 2>/dev/null
+"""
+
+import argparse
+import asyncio
+import copy
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+repository = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repository))
+
+from cosim.async_orchestrator import instance_scenarios, run_scenarios
+from cosim.orchestrator import Orchestrator, load_scenario
+from cosim.remote import local_cluster, workers
+from cosim.results import read_results
+
+
+def incubator_scenario(interface, steps, results_file, broker=None):
+    scenario = load_scenario(repository / "scenarios" / "incubator.toml")
+    for config in scenario["fmus"].values():
+        config["path"] = str(repository / Path(config["path"]).stem)
+        config["interface"] = interface
+    simulation = scenario["simulation"]
+    simulation["end_time"] = simulation["start_time"] + steps * simulation["step_size"]
+    simulation["real_time"] = False
+    scenario["remote"]["broker"] = broker
+    scenario["results"]["file"] = str(results_file)
+    scenario["results"]["csv_export"] = None
+    # The supervisor draws random numbers, it must not intervene for the runs to be compared
+    scenario["fmus"]["supervisor"]["parameters"].update(trigger_optimization_threshold=1e9,
+                                                        setpoint_achievements_parameter=2 ** 31)
+    return scenario
+
+
+def run(scenario):
+    start = time.perf_counter()
+    orchestrator = Orchestrator(copy.deepcopy(scenario))
+    try:
+        steps = orchestrator.run()
+    finally:
+        orchestrator.close()
+    return steps / (time.perf_counter() - start)
+
+
+def run_ensemble(scenarios, broker):
+    """ Run `scenarios` concurrently, return the throughput and the most backends each worker ran at a time """
+
+    peaks = {}
+    done = threading.Event()
+
+    def watch():
+        while not done.wait(0.05):
+            for worker in workers(broker):
+                peaks[worker["name"]] = max(peaks.get(worker["name"], 0), worker["running"])
+
+    watcher = threading.Thread(target=watch)
+    watcher.start()
+    start = time.perf_counter()
+    try:
+        outcomes = asyncio.run(run_scenarios(scenarios))
+    finally:
+        done.set()
+        watcher.join()
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            raise outcome
+    return sum(outcomes) / (time.perf_counter() - start), peaks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incubator co-simulations with the backends on workers over loopback.")
+    parser.add_argument("--workers", type=int, default=2, help="Number of workers")
+    parser.add_argument("--instances", type=int, default=8, help="Number of concurrent scenarios")
+    parser.add_argument("--steps", type=int, default=1000, help="Steps per scenario")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as results_dir, local_cluster(args.workers) as broker:
+        results_dir = Path(results_dir)
+        local = incubator_scenario("backend", args.steps, results_dir / "backend.arrow")
+        remote = incubator_scenario("remote", args.steps, results_dir / "remote.arrow", broker)
+        local_rate, remote_rate = run(local), run(remote)
+        same = read_results(local["results"]["file"]).equals(read_results(remote["results"]["file"]))
+        print(f"One scenario of {args.steps} steps: {local_rate:.0f} step/s with the backend interface, "
+              f"{remote_rate:.0f} step/s with the remote one, identical results: {same}")
+
+        rate, peaks = run_ensemble(instance_scenarios(remote, args.instances, results_dir), broker)
+        placement = ", ".join(f"{name} {peak}" for name, peak in sorted(peaks.items()))
+        print(f"{args.instances} concurrent scenarios on {args.workers} workers: {rate:.0f} step/s "
+              f"(backends per worker at most: {placement})")
+
+
+if __name__ == "__main__":
+    main()
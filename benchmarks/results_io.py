@@ -0,0 +1,85 @@
+""" Compare write and read times of the result formats
+
+Replays a recorded CSV (by default data/simulation_data_5000_steps.csv) row by
+row through the streaming ResultWriter, as the co-simulation loop does, and
+reads every file back. The end-of-run pandas CSV export used before the
+streaming writer is included as reference. Each format is also written with
+the columns that only change at events stored as a change log (CHANGE_COLUMNS,
+the size includes the log), and the time to load them with load_columns as
+NumPy arrays or as ChangeSeries is reported.
+
+    python benchmarks/results_io.py [--input data/simulation_data_5000_steps.csv] [--repeat 5]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from cosim.results import CHANGE_COLUMNS, RESULT_SCHEMA, ResultWriter, changes_path, load_columns, read_results
+
+
+def best_of(repeat, function):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the result file formats.")
+    parser.add_argument("--input", type=str, default="data/simulation_data_5000_steps.csv", help="Recorded CSV to replay")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions, the best time is reported")
+    parser.add_argument("--flush-every", type=int, default=1000, help="Rows per flushed batch")
+    args = parser.parse_args()
+
+    reference = pd.read_csv(args.input)
+    rows = list(reference[[name for name, _ in RESULT_SCHEMA]].itertuples(index=False, name=None))
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        # Previous behavior: accumulate in a DataFrame and write the CSV at the end
+        def write_pandas_csv():
+            df = pd.DataFrame(columns=reference.columns)
+            for row in rows:
+                df.loc[len(df)] = row
+            df.to_csv(tmp / "pandas.csv", index=False)
+
+        write_time = best_of(args.repeat, write_pandas_csv)
+        read_time = best_of(args.repeat, lambda: pd.read_csv(tmp / "pandas.csv"))
+        results.append(("pandas .csv (end of run)", write_time, read_time, None,
+                        (tmp / "pandas.csv").stat().st_size))
+
+        for suffix in [".csv", ".arrow", ".parquet", ".xor"]:
+            for changes in [(), CHANGE_COLUMNS]:
+                path = tmp / f"results{'_changes' if changes else ''}{suffix}"
+
+                def write_streaming():
+                    with ResultWriter(path, schema=RESULT_SCHEMA, flush_every=args.flush_every, changes=changes) as writer:
+                        for row in rows:
+                            writer.write_row(*row)
+
+                write_time = best_of(args.repeat, write_streaming)
+                read_time = best_of(args.repeat, lambda: read_results(path))
+                load_time = best_of(args.repeat, lambda: load_columns(path, CHANGE_COLUMNS))
+                size = path.stat().st_size + (changes_path(path).stat().st_size if changes else 0)
+                name = f"streaming {suffix}{' changes' if changes else ''}"
+                results.append((name, write_time, read_time, load_time, size))
+
+    print(f"{len(rows)} rows from {args.input}, load: the columns {', '.join(CHANGE_COLUMNS)} with load_columns")
+    print(f"{'format':<28}{'write [ms]':>12}{'read [ms]':>12}{'load [ms]':>12}{'size [kB]':>12}")
+    for name, write_time, read_time, load_time, size in results:
+        load = "" if load_time is None else f"{load_time * 1e3:.2f}"
+        print(f"{name:<28}{write_time * 1e3:>12.2f}{read_time * 1e3:>12.2f}{load:>12}{size / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+""" Reproducible benchmark suite for the incubator co-simulation
+
+Workloads:
+    e2e_<n>                      end-to-end run of co-simulation_scenario.py with n steps, with plant.fmu,
+                                 controller.fmu and supervisor.fmu built for this platform (wrap_fmus.sh)
+    e2e_backend_<n>              the same run with the backends of the FMU folders, when no binary is built
+    model_<fmu>_doStep           one Model.fmi3DoStep call, in process
+    backend_<fmu>_<command>      one command round trip to the FMU's backend.py over ZeroMQ (doStep, and the get
+                                 of an output and the set of an input without clock)
+    ctypes_<function>            one FMU3Slave get/set call through the UniFMU binary
+    marshalling_<function>       the ctypes marshalling of one FMU3Slave get/set call, without the binary
+
+Each workload is repeated and its best and median times are recorded, with the
+environment, in a JSON-lines history file. Results are compared with a stored
+baseline and any workload slower than the baseline by more than the tolerance
+is flagged as a regression (exit code 1). The committed baseline.json was
+measured on Linux x86_64 without binaries (e2e_backend), store your own
+with --save-baseline before comparing on another machine.
+
+    python benchmarks/suite.py                      # quick suite (e2e at 1k and 10k steps)
+    python benchmarks/suite.py --full               # adds e2e at 100k steps
+    python benchmarks/suite.py --only model backend # selected workload groups
+    python benchmarks/suite.py --save-baseline      # store the results as the new baseline
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+repository = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repository))
+
+FMUS = ("plant", "controller", "supervisor")
+
+GROUPS = ("e2e", "model", "backend", "ctypes")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=repository, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "commit": git_commit(),
+    }
+
+
+def measure(function, number, repeat):
+    """ Best and median time per call of `function` over `repeat` runs of `number` calls """
+    times = [t / number for t in timeit.repeat(function, number=number, repeat=repeat)]
+    return {"best": min(times), "median": statistics.median(times), "number": number, "repeat": repeat}
+
+
+def load_model(fmu):
+    """ Import model.py of an FMU under a unique module name and return its module """
+    resources = repository / fmu / "resources"
+    if str(resources) not in sys.path:
+        sys.path.append(str(resources)) # For the modules model.py imports, such as its step kernel
+    spec = importlib.util.spec_from_file_location(f"{fmu}_model", resources / "model.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def new_model(module, fmu):
+    model = module.Model(f"{fmu}_benchmark", "", str(repository / fmu / "resources"), False, False, False, False, [])
+    model.fmi3EnterInitializationMode(False, 0.0, 0.0, False, 0.0)
+    model.fmi3ExitInitializationMode()
+    return model
+
+
+def built_fmus():
+    """ Return True if the three FMUs are built (wrap_fmus.sh) with a binary for this platform """
+    try:
+        from fmpy import platform_tuple
+    except ImportError:
+        return False
+    for fmu in FMUS:
+        path = repository / f"{fmu}.fmu"
+        if not path.exists():
+            return False
+        with zipfile.ZipFile(path) as archive:
+            if not any(name.startswith(f"binaries/{platform_tuple}/") for name in archive.namelist()):
+                return False
+    return True
+
+
+def backend_scenario(directory):
+    """ Write the incubator scenario with the FMU folders run by their backends to `directory`, return its path """
+    import toml
+
+    scenario = toml.load(repository / "scenarios" / "incubator.toml")
+    for config in scenario["fmus"].values():
+        config["path"] = str(repository / Path(config["path"]).stem)
+        config["interface"] = "backend"
+    path = Path(directory) / "incubator_backend.toml"
+    with open(path, "w") as f:
+        toml.dump(scenario, f)
+    return path
+
+
+# Value of a set command per FMI type
+SET_VALUES = {"Boolean": True, "String": ""}
+
+
+def unclocked(fmu, causality):
+    """ The first variable of `causality` without clock of an FMU, from its modelDescription.xml """
+    from cosim.model_cache import load_model_info
+
+    return next(v for v in load_model_info(repository / fmu, None).variables
+                if v.causality == causality and v.type != "Clock" and not v.clocks)
+
+
+# ================= Workloads =================
+
+def bench_e2e(results, steps_list, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        if built_fmus():
+            prefix, options = "e2e", []
+        else:
+            print("e2e: the FMUs are not built for this platform (see wrap_fmus.sh), their folders are run by the backends")
+            prefix, options = "e2e_backend", ["--scenario", str(backend_scenario(tmp))]
+        for steps in steps_list:
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, "co-simulation_scenario.py", *options, "--steps", str(steps),
+                                "--results", str(Path(tmp) / "results.arrow"), "--log-level", "WARNING"],
+                               cwd=repository, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                times.append(time.perf_counter() - start)
+            results[f"{prefix}_{steps}"] = {"best": min(times), "median": statistics.median(times), "number": 1,
+                                            "repeat": repeat}
+
+
+def bench_model(results, number, repeat):
+    for fmu in FMUS:
+        random.seed(0)
+        try:
+            import numpy as np
+            np.random.seed(0)
+        except ImportError:
+            pass
+        model = new_model(load_model(fmu), fmu)
+        t = [0.0]
+
+        def do_step():
+            model.fmi3DoStep(t[0], 0.5, False)
+            t[0] += 0.5
+
+        results[f"model_{fmu}_doStep"] = measure(do_step, number, repeat)
+
+
+def bench_backend(results, number, repeat):
+    from cosim.unifmu import BackendConnection
+
+    for fmu in FMUS:
+        backend = BackendConnection(repository / fmu / "resources", stderr=subprocess.DEVNULL, timeout=10000)
+        try:
+            backend.call("Fmi3InstantiateCoSimulation", instance_name=f"{fmu}_benchmark")
+            backend.call("Fmi3EnterInitializationMode")
+            backend.call("Fmi3ExitInitializationMode")
+
+            output, input_variable = unclocked(fmu, "output"), unclocked(fmu, "input")
+            commands = {
+                "doStep": backend.command("Fmi3DoStep", current_communication_point=0.0, communication_step_size=0.5),
+                f"get{output.type}": backend.command(f"Fmi3Get{output.type}", value_references=[output.vr]),
+                f"set{input_variable.type}": backend.command(f"Fmi3Set{input_variable.type}",
+                                                             value_references=[input_variable.vr],
+                                                             values=[SET_VALUES.get(input_variable.type, 21)]),
+            }
+            for name, command in commands.items():
+                if getattr(backend.send(command), "status", 0) > 1:
+                    raise RuntimeError(f"{name} of {fmu} failed")
+                results[f"backend_{fmu}_{name}"] = measure(lambda: backend.send(command), number, repeat)
+        finally:
+            backend.close()
+
+
+def bench_ctypes(results, number, repeat):
+    from fmpy.fmi3 import FMU3Slave
+
+    if built_fmus():
+        from fmpy import read_model_description, extract
+        import shutil
+
+        unzipdir = extract(str(repository / "plant.fmu"))
+        model_description = read_model_description(unzipdir)
+        fmu = FMU3Slave(guid=model_description.guid, unzipDirectory=unzipdir,
+                        modelIdentifier=model_description.coSimulation.modelIdentifier, instanceName="plant")
+        try:
+            fmu.instantiate()
+            fmu.enterInitializationMode()
+            fmu.exitInitializationMode()
+            results["ctypes_getFloat32"] = measure(lambda: fmu.getFloat32([1, 2]), number, repeat)
+            results["ctypes_setBoolean"] = measure(lambda: fmu.setBoolean([0], [True]), number, repeat)
+            fmu.terminate()
+            fmu.freeInstance()
+        finally:
+            shutil.rmtree(unzipdir, ignore_errors=True)
+        return
+
+    # Without a binary for this platform, only the marshalling around the C call is measured
+    fmu = object.__new__(FMU3Slave)
+    fmu.component = None
+    fmu.fmi3GetFloat32 = lambda *args: 0
+    fmu.fmi3SetBoolean = lambda *args: 0
+    results["marshalling_getFloat32"] = measure(lambda: fmu.getFloat32([1, 2]), number, repeat)
+    results["marshalling_setBoolean"] = measure(lambda: fmu.setBoolean([0], [True]), number, repeat)
+
+
+# ================= History and baseline =================
+
+def compare(results, baseline, tolerance):
+    """ Return (name, baseline, current, ratio) for the workloads slower than the baseline by more than `tolerance` """
+    regressions = []
+    for name, result in results.items():
+        if name in baseline:
+            ratio = result["best"] / baseline[name]["best"]
+            if ratio > 1.0 + tolerance:
+                regressions.append((name, baseline[name]["best"], result["best"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite of the incubator co-simulation.")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS), help="Workload groups to run")
+    parser.add_argument("--full", action="store_true", help="Include the end-to-end run with 100k steps")
+    parser.add_argument("--number", type=int, default=2000, help="Calls per repetition of the micro-benchmarks")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions of each workload")
+    parser.add_argument("--history", type=str, default=str(repository / "benchmarks" / "history.jsonl"), help="JSON-lines file the results are appended to")
+    parser.add_argument("--baseline", type=str, default=str(repository / "benchmarks" / "baseline.json"), help="Baseline the results are compared with")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Relative slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    results = {}
+    if "e2e" in args.only:
+        bench_e2e(results, [1000, 10000, 100000] if args.full else [1000, 10000], min(args.repeat, 3))
+    if "model" in args.only:
+        bench_model(results, args.number * 10, args.repeat)
+    if "backend" in args.only:
+        bench_backend(results, args.number, args.repeat)
+    if "ctypes" in args.only:
+        bench_ctypes(results, args.number * 10, args.repeat)
+
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "results": results,
+    }
+    with open(args.history, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+    baseline = {}
+    if Path(args.baseline).exists():
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    print(f"{'workload':<36}{'best':>14}{'median':>14}{'baseline':>14}")
+    for name, result in results.items():
+        reference = f"{baseline[name]['best'] * 1e6:>11.2f} us" if name in baseline else f"{'-':>14}"
+        print(f"{name:<36}{result['best'] * 1e6:>11.2f} us{result['median'] * 1e6:>11.2f} us{reference}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(record, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    for name, reference, current, ratio in regressions:
+        print(f"REGRESSION {name}: {current * 1e6:.2f} us vs baseline {reference * 1e6:.2f} us ({ratio:.2f}x)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
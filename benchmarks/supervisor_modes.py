@@ -0,0 +1,87 @@
+""" Cost per fmi3DoStep of the supervisor execution modes
+
+    numpy     the original model (original_FMUs/supervisor), NumPy calls on Python floats
+    scalar    supervisor/resources/model.py, plain floats and a per-instance random.Random
+    batch     supervisor/resources/batch.py, n instances per call as NumPy arrays
+
+The supervisors are put in the Listening state, whose doStep evaluates the
+temperature residual, and fed a slowly oscillating temperature. The time per
+instance and step is reported, for the batch at several batch sizes.
+
+    python benchmarks/supervisor_modes.py
+    python benchmarks/supervisor_modes.py --sizes 1 100 10000 --steps 2000
+"""
+
+import argparse
+import importlib.util
+import math
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+repository = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repository / "supervisor" / "resources"))
+
+from batch import SupervisorBatch
+from model import Model, SupervisorState
+
+
+def load_original_model():
+    spec = importlib.util.spec_from_file_location("original_supervisor_model",
+                                                  repository / "original_FMUs" / "supervisor" / "resources" / "model.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.Model
+
+
+def temperatures(steps):
+    return [30.0 + 8.0 * math.sin(k / 50.0) for k in range(steps)]
+
+
+def time_scalar(model_class, steps, repeat):
+    model = model_class("supervisor", "", "", False, False, False, False, [])
+    model.supervisor_state = SupervisorState.Listening
+    model.T_heater = 70.0 # Heater not safe, so the Listening supervisor never optimizes
+    trajectory = temperatures(steps)
+
+    def run():
+        for k, T in enumerate(trajectory):
+            model.T = T
+            model.fmi3DoStep(k * 0.5, 0.5, False)
+
+    return min(timeit.repeat(run, number=1, repeat=repeat)) / steps
+
+
+def time_batch(n, steps, repeat):
+    batch = SupervisorBatch(n, seed=0, supervisor_state=SupervisorState.Listening, T_heater=70.0)
+    offsets = np.arange(n) * 0.01
+    trajectory = [T + offsets for T in temperatures(steps)]
+
+    def run():
+        for T in trajectory:
+            batch.do_step(T)
+
+    return min(timeit.repeat(run, number=1, repeat=repeat)) / steps / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost per fmi3DoStep of the supervisor execution modes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000], help="Batch sizes")
+    parser.add_argument("--steps", type=int, default=5000, help="Steps per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions, the best is reported")
+    args = parser.parse_args()
+
+    print(f"{'mode':<16}{'per instance and step':>24}")
+    numpy_time = time_scalar(load_original_model(), args.steps, args.repeat)
+    print(f"{'numpy':<16}{numpy_time * 1e6:>21.3f} us")
+    scalar_time = time_scalar(Model, args.steps, args.repeat)
+    print(f"{'scalar':<16}{scalar_time * 1e6:>21.3f} us   ({numpy_time / scalar_time:.1f}x numpy)")
+    for n in args.sizes:
+        batch_time = time_batch(n, max(args.steps // max(n // 100, 1), 10), args.repeat)
+        print(f"{f'batch n={n}':<16}{batch_time * 1e6:>21.3f} us   ({scalar_time / batch_time:.1f}x scalar)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+""" Error and speed of the linear surrogate of the plant (plant/resources/surrogate.py)
+
+Two surrogates are fitted:
+
+    data    to the traces in data/*.csv (steps of 0.5 s), as recorded by the original master
+    model   to runs of the plant Model with a random heater input, at each step size of --steps
+
+and reported against the plant Model (its Runge-Kutta step):
+
+    one step    largest error of one step from random states, per step size
+    free run    largest error over --horizon steps with the heater input of data/simulation_data_5000_steps.csv
+    closed loop the incubator co-simulation with the backend interface and a supervisor that does not intervene,
+                with the plant stepped by each surrogate (UNIFMU_PLANT_SURROGATE), against the plant Model
+
+followed by the time per step of Model.fmi3DoStep, of SurrogateModel.fmi3DoStep
+and of LinearSurrogate.step over arrays of --instances plants.
+
+    python benchmarks/surrogate.py 2>/dev/null
+    python benchmarks/surrogate.py --steps 0.5 3.0 --save plant/resources/surrogate.json 2>/dev/null
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+import numpy as np
+
+repository = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(repository))
+sys.path.insert(0, str(repository / "plant" / "resources"))
+
+from cosim.orchestrator import Orchestrator, load_scenario
+from cosim.results import read_results
+from model import Model
+from surrogate import PARAMETERS, LinearSurrogate, SurrogateModel, transitions
+
+TRACES = sorted(path for path in (repository / "data").glob("*.csv") if not path.stem.endswith(".changes"))
+HEATER_TRACE = repository / "data" / "simulation_data_5000_steps.csv"
+
+# Supervisor parameters under which it never changes the heating time or the setpoint
+INERT_SUPERVISOR = {"trigger_optimization_threshold": 1e9, "setpoint_achievements_parameter": 2 ** 31}
+
+
+def new_model():
+    return Model("plant", "", "", False, False, False, False, [])
+
+
+def fit_to_traces(paths):
+    columns = []
+    for path in paths:
+        trace = read_results(path)
+        columns.append(transitions(trace["sim_time"], trace["Plant.Temperature"], trace["Plant.Temperature_heater"],
+                                   trace["Controller.heater_ctrl"]))
+    model = new_model()
+    # The traces were recorded with the default parameters
+    return LinearSurrogate.fit(*(np.concatenate(c) for c in zip(*columns)),
+                               parameters={name: getattr(model, name) for name in PARAMETERS})
+
+
+def one_step_error(surrogate, dt, samples=1000):
+    rng = np.random.default_rng(1)
+    model = new_model()
+    error = 0.0
+    for T, T_heater, heater_on in zip(rng.uniform(15.0, 40.0, samples), rng.uniform(15.0, 70.0, samples),
+                                      rng.random(samples) < 0.5):
+        model.T, model.T_heater, model.in_heater_on = T, T_heater, bool(heater_on)
+        model.fmi3DoStep(0.0, dt, False)
+        T, T_heater = surrogate.step(T, T_heater, heater_on, dt)
+        error = max(error, abs(T - model.T), abs(T_heater - model.T_heater))
+    return error
+
+
+def free_run_error(surrogate, dt, heater, horizon):
+    """ Largest errors in T and T_heater over `horizon` steps of `dt` from 21 degrees, with the heater input `heater` """
+    model = new_model()
+    T, T_heater = model.T, model.T_heater
+    errors = np.zeros(2)
+    for k in range(horizon):
+        heater_on = bool(heater[k % len(heater)])
+        model.in_heater_on = heater_on
+        model.fmi3DoStep(k * dt, dt, False)
+        T, T_heater = surrogate.step(T, T_heater, heater_on, dt)
+        errors = np.maximum(errors, [abs(T - model.T), abs(T_heater - model.T_heater)])
+    return errors
+
+
+@contextlib.contextmanager
+def plant_surrogate(path):
+    """ Start the backends with UNIFMU_PLANT_SURROGATE set to `path` (unset for None) """
+    previous = os.environ.pop("UNIFMU_PLANT_SURROGATE", None)
+    if path is not None:
+        os.environ["UNIFMU_PLANT_SURROGATE"] = str(path)
+    try:
+        yield
+    finally:
+        os.environ.pop("UNIFMU_PLANT_SURROGATE", None)
+        if previous is not None:
+            os.environ["UNIFMU_PLANT_SURROGATE"] = previous
+
+
+def closed_loop(surrogate_file, end_time, results_file):
+    """ Run the incubator, return its plant temperatures and heater input, and the wall-clock time """
+    scenario = load_scenario(repository / "scenarios" / "incubator.toml")
+    for config in scenario["fmus"].values():
+        config["path"] = str(repository / Path(config["path"]).stem)
+        config["interface"] = "backend"
+    scenario["fmus"]["supervisor"]["parameters"].update(INERT_SUPERVISOR)
+    scenario["simulation"].update(end_time=end_time, real_time=False)
+    scenario["results"].update(file=str(results_file), csv_export=None)
+    with plant_surrogate(surrogate_file):
+        start = timeit.default_timer()
+        orchestrator = Orchestrator(scenario)
+        try:
+            orchestrator.run()
+        finally:
+            orchestrator.close()
+        elapsed = timeit.default_timer() - start
+    results = read_results(results_file)
+    return results["Plant.Temperature"].to_numpy(dtype=float), results["Controller.heater_ctrl"].to_numpy(), elapsed
+
+
+def time_per_step(model, steps, repeat):
+    def run():
+        for k in range(steps):
+            model.in_heater_on = k % 80 < 40
+            model.fmi3DoStep(k * 0.5, 0.5, False)
+    return min(timeit.repeat(run, number=1, repeat=repeat)) / steps
+
+
+def time_arrays(surrogate, n, steps, repeat):
+    rng = np.random.default_rng(0)
+    T, T_heater = np.full(n, 21.0), np.full(n, 21.0)
+    heater = [rng.random(n) < 0.5 for _ in range(steps)]
+
+    def run():
+        state = T, T_heater
+        for heater_on in heater:
+            state = surrogate.step(*state, heater_on, 0.5)
+    return min(timeit.repeat(run, number=1, repeat=repeat)) / steps / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Error and speed of the linear surrogate of the plant.")
+    parser.add_argument("--steps", type=float, nargs="+", default=[0.1, 0.5, 1.0, 3.0],
+                        help="Step sizes of the surrogate fitted to the plant Model")
+    parser.add_argument("--horizon", type=int, default=10000, help="Steps of the free runs")
+    parser.add_argument("--end-time", type=float, default=5000.0, help="Simulated time of the closed-loop runs")
+    parser.add_argument("--instances", type=int, default=10000, help="Plants stepped at once as arrays")
+    parser.add_argument("--save", type=Path, help="Write the surrogate fitted to the Model to this JSON file")
+    args = parser.parse_args()
+
+    surrogates = {"data": fit_to_traces(TRACES), "model": LinearSurrogate.from_model(args.steps)}
+    if args.save:
+        surrogates["model"].save(args.save)
+        print(f"Surrogate of the Model saved to {args.save}")
+    heater = read_results(HEATER_TRACE)["Controller.heater_ctrl"].to_numpy()
+
+    print(f"Fitted to {', '.join(p.name for p in TRACES)} (data) and to runs of the Model (model)")
+    print(f"{'surrogate':<11}{'step':>8}{'fit rms':>12}{'one step':>12}{'free T':>12}{'free T_heater':>15}")
+    for name, surrogate in surrogates.items():
+        for dt in sorted(surrogate.steps):
+            errors = free_run_error(surrogate, dt, heater, args.horizon)
+            print(f"{name:<11}{dt:>6} s{surrogate.residuals[dt]:>10.2e} K{one_step_error(surrogate, dt):>10.2e} K"
+                  f"{errors[0]:>10.2e} K{errors[1]:>13.2e} K")
+
+    print(f"\nClosed loop, {args.end_time} s of the incubator with steps of 0.5 s, against the plant Model")
+    print(f"{'plant':<11}{'max |dT|':>12}{'heater differs':>16}{'time':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        reference_T, reference_heater, elapsed = closed_loop(None, args.end_time, directory / "model.arrow")
+        print(f"{'Model':<11}{0.0:>10.2e} K{0:>10} steps{elapsed:>8.2f} s")
+        for name, surrogate in surrogates.items():
+            surrogate.save(directory / f"{name}.json")
+            T, heater_ctrl, elapsed = closed_loop(directory / f"{name}.json", args.end_time, directory / f"{name}.arrow")
+            print(f"{name:<11}{np.abs(T - reference_T).max():>10.2e} K"
+                  f"{np.count_nonzero(heater_ctrl != reference_heater):>10} steps{elapsed:>8.2f} s")
+
+    steps = 20000
+    model_time = time_per_step(new_model(), steps, 5)
+    surrogate_time = time_per_step(SurrogateModel("plant", "", "", False, False, False, False, [],
+                                                  surrogate=surrogates["model"]), steps, 5)
+    array_time = time_arrays(surrogates["model"], args.instances, 200, 5)
+    print(f"\nPer plant and step: Model {model_time * 1e6:.2f} us, SurrogateModel {surrogate_time * 1e6:.2f} us "
+          f"({model_time / surrogate_time:.1f}x), arrays of {args.instances} plants {array_time * 1e9:.1f} ns "
+          f"({model_time / array_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
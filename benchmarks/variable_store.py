@@ -0,0 +1,86 @@
+""" Cost of the model calls with attribute-per-variable and array-backed variables
+
+    attributes    the default, every variable is an instance attribute
+    store         the variables in a store.VariableStore (UNIFMU_VARIABLE_STORE=private)
+
+The models are called in-process (without the backend), in event mode, for
+gets and sets of the value references the co-simulation transfers, a bulk set
+of the tunable parameters, the FMU state serialization round trip and a doStep.
+
+    python benchmarks/variable_store.py
+    python benchmarks/variable_store.py --number 20000
+"""
+
+import argparse
+import importlib.util
+import sys
+import timeit
+from pathlib import Path
+
+repository = Path(__file__).resolve().parent.parent
+
+# (value references read, value references written, tunable parameters) per FMU
+REFERENCES = {
+    "plant": ([1, 2], [0], [100, 101, 102, 103, 104, 105]),
+    "controller": ([1], [0], [101, 103]),
+    "supervisor": ([2, 3, 4, 5], [0, 1], [100, 101, 102, 103]),
+}
+
+
+def load_module(fmu, name):
+    spec = importlib.util.spec_from_file_location(f"{fmu}_{name}", repository / fmu / "resources" / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module # So that pickle finds FMIState when serializing
+    spec.loader.exec_module(module)
+    return module
+
+
+def create_model(fmu, mode):
+    model_module = load_module(fmu, "model")
+    model = model_module.Model(fmu, "", "", False, False, True, False, [])
+    if mode == "store":
+        load_module(fmu, "store").attach_store(model)
+        model._compile_access_tables()
+    model.state = model_module.FMIState.FMIEventModeState
+    return model
+
+
+def measure(fmu, mode, number):
+    model = create_model(fmu, mode)
+    reads, writes, parameters = REFERENCES[fmu]
+    write_values = [1.0] * len(writes)
+    parameter_values = [float(model._get_value([r])[1][0]) for r in parameters]
+    state = model.fmi3SerializeFmuState()[1]
+
+    def step():
+        model.state = model.state.FMIStepModeState
+        model.fmi3DoStep(0.0, 0.5, False)
+        model.state = model.state.FMIEventModeState
+
+    calls = {
+        "get": lambda: model._get_value(reads),
+        "set": lambda: model._set_value(writes, write_values),
+        "set parameters": lambda: model._set_value(parameters, parameter_values),
+        "serialize": model.fmi3SerializeFmuState,
+        "deserialize": lambda: model.fmi3DeserializeFmuState(state),
+        "doStep": step,
+    }
+    return {name: min(timeit.repeat(call, number=number, repeat=5)) / number for name, call in calls.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of the model calls with attribute and array-backed variables.")
+    parser.add_argument("--number", type=int, default=10000, help="Calls per measurement")
+    args = parser.parse_args()
+
+    print(f"{'fmu':<12}{'call':<16}{'attributes':>14}{'store':>14}")
+    for fmu in REFERENCES:
+        attributes = measure(fmu, "attributes", args.number)
+        store = measure(fmu, "store", args.number)
+        for name in attributes:
+            print(f"{fmu:<12}{name:<16}{attributes[name] * 1e6:>11.2f} us{store[name] * 1e6:>11.2f} us"
+                  f"   ({attributes[name] / store[name]:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
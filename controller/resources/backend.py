@@ -1,70 +1,175 @@
-import logging
 import os
 import sys
-import time
-import zmq
-
-from schemas.fmi3_messages_pb2 import (
-    Fmi3Command,
-    Fmi3DoStepReturn,
-    Fmi3EmptyReturn,
-    Fmi3StatusReturn,
-    Fmi3FreeInstanceReturn,
-    Fmi3SerializeFmuStateReturn,
-    Fmi3GetFloat32Return,
-    Fmi3GetFloat64Return,
-    Fmi3GetInt8Return,
-    Fmi3GetUInt8Return,
-    Fmi3GetInt16Return,
-    Fmi3GetUInt16Return,
-    Fmi3GetInt32Return,
-    Fmi3GetUInt32Return,
-    Fmi3GetInt64Return,
-    Fmi3GetUInt64Return,
-    Fmi3GetBooleanReturn,
-    Fmi3GetStringReturn,
-    Fmi3GetBinaryReturn,
-    Fmi3GetClockReturn,
-    Fmi3GetIntervalDecimalReturn,
-    Fmi3UpdateDiscreteStatesReturn,
-    Fmi3GetIntervalFractionReturn,
-    Fmi3GetShiftDecimalReturn,
-    Fmi3GetShiftFractionReturn,
-)
-from schemas.unifmu_handshake_pb2 import (
-    HandshakeStatus,
-    HandshakeReply,
-)
-
-from model import Model
-
-logging.basicConfig(level=logging.DEBUG)
-logger = logging.getLogger(__file__)
+
+# HandshakeReply(status=HandshakeStatus.OK).SerializeToString(), precomputed so the handshake
+# does not wait for the protobuf runtime and the generated schemas to be imported
+HANDSHAKE_OK = b"\x08\x01"
+
+
+def write_profile(profile_dir, instance_name, profile):
+    """ Write the per-command timings (parse, model and serialize durations in seconds) as CSV """
+    os.makedirs(profile_dir, exist_ok=True)
+    path = os.path.join(profile_dir, f"backend_{instance_name}.csv")
+    with open(path, "w") as f:
+        f.write("command,parse,model,serialize\n")
+        for group, parse_time, model_time, serialize_time in profile:
+            f.write(f"{group},{parse_time!r},{model_time!r},{serialize_time!r}\n")
+    logger.info(f"Backend profile written to {path}")
+
+
+# Value types of Fmi3FusedDoStep: the model setter of each `set_<type>` field and the
+# model getter and reply field of each `get_<type>` field
+FUSED_TYPES = ("Float32", "Float64", "Int8", "UInt8", "Int16", "UInt16", "Int32", "UInt32", "Int64", "UInt64", "Boolean")
+FUSED_SETTERS = {f"set_{t.lower()}": f"fmi3Set{t}" for t in FUSED_TYPES}
+FUSED_GETTERS = {f"get_{t.lower()}": (f"fmi3Get{t}", f"{t.lower()}_values") for t in FUSED_TYPES}
+
+
+def get_output_derivatives(model, value_references, orders):
+    """ (status, values) of the model's fmi3GetOutputDerivatives, an error for models without output derivatives """
+    if not hasattr(model, "fmi3GetOutputDerivatives"):
+        return 3, []
+    return model.fmi3GetOutputDerivatives(value_references, orders)
+
+
+def fused_do_step(model, data, result):
+    """ Set the inputs, do the step and get the outputs of an Fmi3FusedDoStep command into `result`
+
+    The output derivatives of `get_derivative` (first order unless `orders` is given) are read
+    after the outputs. The calls stop at the first status worse than warning, the worst status is returned.
+    """
+    fields = data.ListFields() # Only the fields present in the command, in field number order
+    worst = 0
+    for descriptor, inputs in fields:
+        setter = FUSED_SETTERS.get(descriptor.name)
+        if setter is not None:
+            worst = max(worst, getattr(model, setter)(inputs.value_references, inputs.values))
+            if worst > 1:
+                return worst
+
+    (
+        status,
+        result.event_handling_needed,
+        result.terminate_simulation,
+        result.early_return,
+        result.last_successful_time,
+    ) = model.fmi3DoStep(
+        data.current_communication_point,
+        data.communication_step_size,
+        data.no_set_fmu_state_prior_to_current_point,
+    )
+    worst = max(worst, status)
+    if worst > 1:
+        return worst
+
+    for descriptor, outputs in fields:
+        getter = FUSED_GETTERS.get(descriptor.name)
+        if getter is not None:
+            method, values = getter
+            status, getattr(result, values)[:] = getattr(model, method)(outputs.value_references)
+            worst = max(worst, status)
+            if worst > 1:
+                return worst
+
+    if data.HasField("get_derivative"):
+        derivatives = data.get_derivative
+        orders = derivatives.orders or [1] * len(derivatives.value_references)
+        status, result.derivative_values[:] = get_output_derivatives(model, derivatives.value_references, orders)
+        worst = max(worst, status)
+    return worst
+
+
+def coalesced_do_step(model, data, result):
+    """ Run the Fmi3FusedDoStep commands of an Fmi3CoalescedDoStep in turn into `result`
+
+    The steps stop at the first one that needs event handling, terminates or fails, so the
+    reply holds its results and `steps_done` tells how many steps ran.
+    """
+    status = 0
+    for step in data.steps:
+        status = fused_do_step(model, step, result)
+        result.steps_done += 1
+        if status > 1 or result.event_handling_needed or result.terminate_simulation:
+            break
+    return status
 
 
 if __name__ == "__main__":
 
-    # initializing message queue
+    # initializing message queue. A master that watches this process after the handshake (cosim.unifmu sets
+    # UNIFMU_EARLY_HANDSHAKE) gets it first, so it can go on (e.g. start the other FMUs) while this backend
+    # imports the schemas and the model. Others, such as the UniFMU binary, get it once the model is imported,
+    # so a model that fails to import is seen as a backend that exits before the handshake
+    import zmq
+
     context = zmq.Context()
     socket = context.socket(zmq.REQ)
 
     dispatcher_endpoint = os.environ["UNIFMU_DISPATCHER_ENDPOINT"]
-    logger.info(f"dispatcher endpoint received: {dispatcher_endpoint}")
-
     socket.connect(dispatcher_endpoint)
+    early_handshake = os.environ.get("UNIFMU_EARLY_HANDSHAKE") == "1"
+    if early_handshake:
+        socket.send(HANDSHAKE_OK)
+
+    import logging
+    import time
+
+    from schemas.fmi3_messages_pb2 import (
+        Fmi3Command,
+        Fmi3DoStepReturn,
+        Fmi3FusedDoStepReturn,
+        Fmi3CoalescedDoStepReturn,
+        Fmi3EmptyReturn,
+        Fmi3StatusReturn,
+        Fmi3FreeInstanceReturn,
+        Fmi3SerializeFmuStateReturn,
+        Fmi3GetFloat32Return,
+        Fmi3GetFloat64Return,
+        Fmi3GetInt8Return,
+        Fmi3GetUInt8Return,
+        Fmi3GetInt16Return,
+        Fmi3GetUInt16Return,
+        Fmi3GetInt32Return,
+        Fmi3GetUInt32Return,
+        Fmi3GetInt64Return,
+        Fmi3GetUInt64Return,
+        Fmi3GetBooleanReturn,
+        Fmi3GetStringReturn,
+        Fmi3GetBinaryReturn,
+        Fmi3GetClockReturn,
+        Fmi3GetIntervalDecimalReturn,
+        Fmi3UpdateDiscreteStatesReturn,
+        Fmi3GetIntervalFractionReturn,
+        Fmi3GetShiftDecimalReturn,
+        Fmi3GetShiftFractionReturn,
+        Fmi3GetOutputDerivativesReturn,
+    )
+
+    from model import Model
+
+    if not early_handshake:
+        socket.send(HANDSHAKE_OK)
+
+    logging.basicConfig(level=logging.DEBUG)
+    logger = logging.getLogger(__file__)
+    logger.info(f"dispatcher endpoint received: {dispatcher_endpoint}")
 
-    handshake = HandshakeReply()
-    handshake.status = HandshakeStatus.OK
-    socket.send(handshake.SerializeToString())
+    # Per-command timings, enabled by the master through the environment
+    profile_dir = os.environ.get("UNIFMU_PROFILE_DIR")
+    profile = [] if profile_dir else None
+    instance_name = "unknown"
 
     command = Fmi3Command()
     while True:
 
         msg = socket.recv()
+        if profile is not None:
+            start_time = time.perf_counter()
         command.ParseFromString(msg)
 
         group = command.WhichOneof("command")
         data = getattr(command, command.WhichOneof("command"))
+        if profile is not None:
+            parsed_time = time.perf_counter()
 
         #logger.info(f"Command: {command}")
 
@@ -72,6 +177,7 @@ if __name__ == "__main__":
         if group == "Fmi3InstantiateModelExchange":
             result = Fmi3EmptyReturn()
         elif group == "Fmi3InstantiateCoSimulation":
+            instance_name = data.instance_name
             model = Model(
                 data.instance_name,
                 data.instantiation_token,
@@ -104,6 +210,12 @@ if __name__ == "__main__":
                 data.communication_step_size,
                 data.no_set_fmu_state_prior_to_current_point,
             )
+        elif group == "Fmi3FusedDoStep":
+            result = Fmi3FusedDoStepReturn()
+            result.status = fused_do_step(model, data, result)
+        elif group == "Fmi3CoalescedDoStep":
+            result = Fmi3CoalescedDoStepReturn()
+            result.status = coalesced_do_step(model, data, result)
         elif group == "Fmi3EnterInitializationMode":
             result = Fmi3StatusReturn()
             result.status = model.fmi3EnterInitializationMode(
@@ -115,6 +227,8 @@ if __name__ == "__main__":
         elif group == "Fmi3FreeInstance":            
             result = Fmi3FreeInstanceReturn()
             logger.info(f"Fmi3FreeInstance received, shutting down")        
+            if profile is not None:
+                write_profile(profile_dir, instance_name, profile)
             sys.exit(0)
         elif group == "Fmi3Terminate":
             result = Fmi3StatusReturn()
@@ -266,6 +380,9 @@ if __name__ == "__main__":
         elif group == "Fmi3SetShiftFraction":
             result = Fmi3StatusReturn()
             result.status = model.fmi3SetShiftFraction(data.value_references, data.counters, data.resolutions)
+        elif group == "Fmi3GetOutputDerivatives":
+            result = Fmi3GetOutputDerivativesReturn()
+            result.status, result.values[:] = get_output_derivatives(model, data.value_references, data.orders)
         elif group == "Fmi3UpdateDiscreteStates":
             result = Fmi3UpdateDiscreteStatesReturn()
             (
@@ -282,5 +399,9 @@ if __name__ == "__main__":
             sys.exit(-1)
 
         #logger.info(f"Result: {result}")
+        if profile is not None:
+            model_time = time.perf_counter()
         state = result.SerializeToString()
+        if profile is not None:
+            profile.append((group, parsed_time - start_time, model_time - parsed_time, time.perf_counter() - model_time))
         socket.send(state)
@@ -0,0 +1,79 @@
+""" Step and transition kernels of the controller, compiled with numba when it is installed
+
+step_timer is the timer update of Model.fmi3DoStep and next_state the state
+transitions of Model.fmi3UpdateDiscreteStates, on plain numbers. With numba
+they are compiled to machine code that releases the GIL; without it (or with
+UNIFMU_KERNEL=python) they are the Python functions themselves,
+python_step_timer and python_next_state, with the same results. The variables
+of the store (store.py) are read as Python numbers too. numba caches the
+compiled kernels in NUMBA_CACHE_DIR (the unifmu-numba folder of the temporary
+directory by default) rather than in the resources of the FMU.
+"""
+
+import os
+
+try:
+    if os.environ.get("UNIFMU_KERNEL", "numba") != "numba":
+        raise ImportError("UNIFMU_KERNEL is not numba")
+    if "NUMBA_CACHE_DIR" not in os.environ:
+        import tempfile
+        os.environ["NUMBA_CACHE_DIR"] = os.path.join(tempfile.gettempdir(), "unifmu-numba")
+    from numba import njit
+except ImportError:
+    njit = None
+
+ACCELERATED = njit is not None
+
+# Values of model.ControllerState
+COOLING = 1
+HEATING = 2
+WAITING = 3
+
+
+def _jit(function):
+    """ `function` compiled without the GIL, or `function` itself without numba """
+    return function if njit is None else njit(nogil=True, cache=True)(function)
+
+
+def python_step_timer(state, timer, T, desired, lower_bound, heating_time, heating_gap, condition):
+    """ The next action timer after a doStep ending at `condition`, with the box temperature `T` """
+
+    if state == COOLING:
+        if T <= desired - lower_bound:
+            timer = condition + heating_time
+    elif state == HEATING:
+        if 0 < timer <= condition:
+            timer = condition + heating_gap
+        elif T > desired:
+            timer = -1.0
+    elif state == WAITING:
+        if 0 < timer <= condition:
+            if T <= desired:
+                timer = condition + heating_time
+            else:
+                timer = -1.0
+    return timer
+
+
+def python_next_state(state, timer, T, desired, lower_bound, condition):
+    """ The state fmi3UpdateDiscreteStates moves to, the heater is on in the Heating state only """
+
+    if state == COOLING:
+        if T <= desired - lower_bound:
+            state = HEATING
+    if state == HEATING:
+        if 0 < timer <= condition:
+            state = WAITING
+        elif T > desired:
+            state = COOLING
+    if state == WAITING:
+        if 0 < timer <= condition:
+            if T <= desired:
+                state = HEATING
+            else:
+                state = COOLING
+    return state
+
+
+step_timer = _jit(python_step_timer)
+next_state = _jit(python_next_state)
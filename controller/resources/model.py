@@ -1,6 +1,10 @@
+import os
 import pickle
 from fractions import Fraction
 from enum import IntFlag
+from operator import attrgetter
+
+from controller_kernel import next_state, step_timer
 
 class Model:
     def __init__(
@@ -39,11 +43,20 @@ class Model:
         # Outputs
         self.heater_ctrl = False
 
+        # Prediction: whether the next tick of controller_clock changes the state, so that a master may skip
+        # the ticks that do not. Computed when it is read (see _update_tick_prediction)
+        self.tick_changes_state = False
+
         # State
         self.controller_state = ControllerState.Cooling
         self.next_action_timer = -1.0
         self.cached_heater_on = False
         self.condition = 0.0 # For passing condition from step mode to event mode
+        self.ticked_heater_on = False # heater_ctrl as of the last tick of controller_clock, which the master has read
+
+        # Clocks, so the FMU state can be saved before they first tick
+        self.controller_clock = False
+        self.supervisor_clock = False
 
         self.clock_reference_to_interval = {
             1001: 1.0,
@@ -52,6 +65,7 @@ class Model:
         self.reference_to_attribute = {
             999: "time",
             0: "box_air_temperature",
+            4: "tick_changes_state",
             # 1: "heater_ctrl",
             # 2: "temperature_desired",
             # 3: "heating_time",
@@ -89,6 +103,14 @@ class Model:
                                **self.parameters,
                                **self.tunable_parameters}
 
+        # Optional array-backed variable store (see store.py), enabled by the master through the environment
+        self.store = None
+        if os.environ.get("UNIFMU_VARIABLE_STORE"):
+            from store import attach_store
+            attach_store(self, os.environ["UNIFMU_VARIABLE_STORE"])
+
+        self._compile_access_tables()
+
     # ================= FMI3 =================
 
     # ================= doStep and updateDiscreteStates =================
@@ -106,25 +128,10 @@ class Model:
 
         self.condition = current_communication_point + communication_step_size
 
-        if self.controller_state == ControllerState.Cooling:
-            assert self.cached_heater_on is False
-            if self.box_air_temperature <= self.temperature_desired - self.lower_bound:
-                self.next_action_timer = self.condition + self.heating_time
-            
-        if self.controller_state == ControllerState.Heating:
-            assert self.cached_heater_on is True
-            if 0 < self.next_action_timer <= self.condition:
-                self.next_action_timer = self.condition + self.heating_gap
-            elif self.box_air_temperature > self.temperature_desired:
-                self.next_action_timer = -1.0
-            
-        if self.controller_state == ControllerState.Waiting:
-            assert self.cached_heater_on is False
-            if 0 < self.next_action_timer <= self.condition:
-                if self.box_air_temperature <= self.temperature_desired:
-                    self.next_action_timer = self.condition + self.heating_time
-                else:
-                    self.next_action_timer = -1.0
+        assert self.cached_heater_on is (self.controller_state == ControllerState.Heating)
+        self.next_action_timer = step_timer(self.controller_state, self.next_action_timer, self.box_air_temperature,
+                                            self.temperature_desired, self.lower_bound, self.heating_time,
+                                            self.heating_gap, self.condition)
      
         return (
             Fmi3Status.ok,
@@ -144,39 +151,12 @@ class Model:
         next_event_time = 1.0
 
 
-        if self.controller_state == ControllerState.Cooling:
-            assert self.cached_heater_on is False
-            if self.box_air_temperature <= self.temperature_desired - self.lower_bound:
-                self.controller_state = ControllerState.Heating
-                self.cached_heater_on = True
-                #self.next_action_timer = current_communication_point + communication_step_size + self.heating_time
-            
-        if self.controller_state == ControllerState.Heating:
-            assert self.cached_heater_on is True
-            if 0 < self.next_action_timer <= self.condition:
-                self.controller_state = ControllerState.Waiting
-                self.cached_heater_on = False
-                #self.next_action_timer = current_communication_point + communication_step_size + self.heating_gap
-            elif self.box_air_temperature > self.temperature_desired:
-                self.controller_state = ControllerState.Cooling
-                self.cached_heater_on = False
-                #self.next_action_timer = -1.0
-            
-        if self.controller_state == ControllerState.Waiting:
-            assert self.cached_heater_on is False
-            if 0 < self.next_action_timer <= self.condition:
-                if self.box_air_temperature <= self.temperature_desired:
-                    self.controller_state = ControllerState.Heating
-                    self.cached_heater_on = True
-                    #self.next_action_timer = current_communication_point + communication_step_size + self.heating_time
-                else:
-                    self.controller_state = ControllerState.Cooling
-                    self.cached_heater_on = False
-                    #self.next_action_timer = -1.0
+        self.controller_state, self.cached_heater_on = self._next_state()
 
         # Resetting the clock
         if (self.controller_clock):
             self.controller_clock = False
+            self.ticked_heater_on = self.cached_heater_on
 
         # Setting outputs
         self.heater_ctrl = self.cached_heater_on
@@ -240,6 +220,7 @@ class Model:
         self.controller_state = ControllerState.Cooling
         self.next_action_timer = -1.0
         self.cached_heater_on = False
+        self.ticked_heater_on = False
         self.controller_clock = False
         self.supervisor_clock = False
         
@@ -251,6 +232,9 @@ class Model:
     # ================= Serialization =================
 
     def fmi3SerializeFmuState(self):
+        if self.store is not None:
+            # A copy of the variable buffer, and the internal state
+            return Fmi3Status.ok, pickle.dumps((self.store.dump(), self.controller_state, self.next_action_timer, self.cached_heater_on, self.clock_reference_to_interval, self.condition, self.ticked_heater_on))
 
         bytes = pickle.dumps(
             (
@@ -266,11 +250,24 @@ class Model:
                 self.clock_reference_to_interval,
                 self.controller_clock,
                 self.supervisor_clock,
+                self.condition,
+                self.ticked_heater_on,
             )
         )
         return Fmi3Status.ok, bytes
 
     def fmi3DeserializeFmuState(self, bytes: bytes):
+        if self.store is not None:
+            variables, controller_state, next_action_timer, cached_heater_on, clock_reference_to_interval, condition, ticked_heater_on = pickle.loads(bytes)
+            self.store.load(variables)
+            self.controller_state = controller_state
+            self.next_action_timer = next_action_timer
+            self.cached_heater_on = cached_heater_on
+            self.clock_reference_to_interval = clock_reference_to_interval
+            self.condition = condition
+            self.ticked_heater_on = ticked_heater_on
+            return Fmi3Status.ok
+
         (
             temperature_desired,
             lower_bound,
@@ -284,6 +281,8 @@ class Model:
             clock_reference_to_interval,
             controller_clock,
             supervisor_clock,
+            condition,
+            ticked_heater_on,
         ) = pickle.loads(bytes)
         self.temperature_desired = temperature_desired
         self.lower_bound = lower_bound
@@ -297,6 +296,8 @@ class Model:
         self.clock_reference_to_interval = clock_reference_to_interval
         self.controller_clock = controller_clock
         self.supervisor_clock = supervisor_clock
+        self.condition = condition
+        self.ticked_heater_on = ticked_heater_on
         return Fmi3Status.ok
     
     # ================= Getters =================
@@ -459,36 +460,104 @@ class Model:
 
     # ================= Helpers =================
 
-    def _set_value(self, references, values):
-        for r, v in zip(references, values):
+    def _next_state(self):
+        """ Return the (state, heater on) that fmi3UpdateDiscreteStates moves to from the current state and inputs """
+
+        assert self.cached_heater_on is (self.controller_state == ControllerState.Heating)
+        state = next_state(self.controller_state, self.next_action_timer, self.box_air_temperature,
+                           self.temperature_desired, self.lower_bound, self.condition)
+        heater_on = state == ControllerState.Heating
+
+        return state, heater_on
+
+    def _update_tick_prediction(self):
+        """ Compute tick_changes_state: whether a tick of controller_clock now would change the state or heater_ctrl
+
+        The transitions of fmi3UpdateDiscreteStates depend on box_air_temperature against the temperature_desired
+        and lower_bound bounds, and on next_action_timer (set from heating_time and heating_gap by fmi3DoStep)
+        against the end of the last doStep. heater_ctrl is compared with its value at the last tick, as the
+        state may also change when supervisor_clock ticks. With the same inputs, a tick for which this is false
+        only resets controller_clock, and a master may skip it.
+
+        Called by the getters of tick_changes_state only, so the steps of a master that does not read it
+        do not pay for it.
+        """
+
+        state, heater_on = self._next_state()
+        self.tick_changes_state = state != self.controller_state or heater_on != self.ticked_heater_on
+
+    def _compile_access_tables(self):
+        """ Precompute, per value reference, the attribute holding it and the FMIState bitmasks in which it can be set and read """
+
+        any_state = int(~FMIState(0))
+        event_or_initialization = int(FMIState.FMIEventModeState | FMIState.FMIInitializationModeState)
+        configuration = int(FMIState.FMIConfigurationModeState | FMIState.FMIReconfigurationModeState | FMIState.FMIInitializationModeState)
+
+        self.access_table = {}
+        for r, name in self.all_references.items():
             if (r in self.clocked_variables or r in self.tunable_parameters):
-                if (self.state == FMIState.FMIEventModeState or self.state == FMIState.FMIInitializationModeState):
-                    pass
-                else:
-                    return Fmi3Status.error
+                set_mask = event_or_initialization
             elif (r in self.tunable_structural_parameters):
-                if (self.state == FMIState.FMIConfigurationModeState or self.state == FMIState.FMIReconfigurationModeState or self.state == FMIState.FMIInitializationModeState):
-                    pass
-                else:
-                    return Fmi3Status.error
+                set_mask = configuration
             elif (r in self.parameters):
-                if (self.state == FMIState.FMIInitializationModeState):
-                    pass
+                set_mask = int(FMIState.FMIInitializationModeState)
+            else:
+                set_mask = any_state
+            get_mask = event_or_initialization if r in self.clocked_variables else any_state
+            self.access_table[r] = (name, get_mask, set_mask)
+
+        # Compiled (getter, setter, readable states, writable states) per sequence of value references
+        self.access_plans = {}
+        self.any_state = any_state
+
+    def _access_plan(self, references):
+        key = tuple(references)
+        plan = self.access_plans.get(key)
+        if plan is None:
+            names = []
+            get_mask = set_mask = self.any_state
+            for r in key:
+                name, get_allowed, set_allowed = self.access_table[r]
+                names.append(name)
+                get_mask &= get_allowed
+                set_mask &= set_allowed
+            accessors = self.store.accessors(key) if self.store is not None else None
+            if accessors is not None:
+                getter, setter = accessors # One slice or fancy-indexing operation on a store array
+            else:
+                if len(names) == 1:
+                    getter = lambda model, name=names[0]: (getattr(model, name),)
+                elif names:
+                    getter = attrgetter(*names)
+                else:
+                    getter = lambda model: ()
+                if self.store is None:
+                    setter = lambda model, values, names=tuple(names): model.__dict__.update(zip(names, values))
                 else:
-                    return Fmi3Status.error
-            setattr(self, self.all_references[r], v)
+                    setter = lambda model, values, names=tuple(names): [setattr(model, n, v) for n, v in zip(names, values)]
+            if TICK_PREDICTION_REFERENCE in key: # Computed from the state when it is read
+                getter = lambda model, read=getter: model._update_tick_prediction() or read(model)
+            if len(self.access_plans) >= 64: # A master uses a handful of reference sets, bound the odd one
+                self.access_plans.clear()
+            # The combined masks are expanded to the sets of states they allow, one membership test per call
+            readable = frozenset(state for state in FMIState if state & get_mask)
+            writable = frozenset(state for state in FMIState if state & set_mask)
+            plan = self.access_plans[key] = (getter, setter, readable, writable)
+        return plan
+
+    def _set_value(self, references, values):
+        # All references are checked before any value is stored
+        _, setter, _, writable = self.access_plans.get(tuple(references)) or self._access_plan(references)
+        if self.state not in writable:
+            return Fmi3Status.error
+        setter(self, values)
         return Fmi3Status.ok
 
     def _get_value(self, references):
-
-        values = []
-        for r in references:
-            if r in self.clocked_variables:
-                if not ((self.state == FMIState.FMIEventModeState) or (self.state == FMIState.FMIInitializationModeState)):
-                    return Fmi3Status.error
-            values.append(getattr(self, self.all_references[r]))
-
-        return Fmi3Status.ok, values
+        getter, _, readable, _ = self.access_plans.get(tuple(references)) or self._access_plan(references)
+        if self.state not in readable:
+            return Fmi3Status.error, []
+        return Fmi3Status.ok, list(getter(self))
 
 
 class Fmi3Status():
@@ -521,6 +590,9 @@ class FMIState(IntFlag):
     FMIStepModeState            = 1 << 8,
     FMIClockActivationMode      = 1 << 9
 
+# Value reference of tick_changes_state, computed when it is read
+TICK_PREDICTION_REFERENCE = 4
+
 class ControllerState():
     Initialized = 0
     Cooling = 1
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x13\x66mi3_messages.proto\x12\rfmi3_messages\"\x8e\x01\n\x1c\x46mi3InstantiateModelExchange\x12\x15\n\rinstance_name\x18\x01 \x01(\t\x12\x1b\n\x13instantiation_token\x18\x02 \x01(\t\x12\x15\n\rresource_path\x18\x03 \x01(\t\x12\x0f\n\x07visible\x18\x04 \x01(\x08\x12\x12\n\nlogging_on\x18\x05 \x01(\x08\"\xed\x01\n\x1b\x46mi3InstantiateCoSimulation\x12\x15\n\rinstance_name\x18\x01 \x01(\t\x12\x1b\n\x13instantiation_token\x18\x02 \x01(\t\x12\x15\n\rresource_path\x18\x03 \x01(\t\x12\x0f\n\x07visible\x18\x04 \x01(\x08\x12\x12\n\nlogging_on\x18\x05 \x01(\x08\x12\x17\n\x0f\x65vent_mode_used\x18\x06 \x01(\x08\x12\x1c\n\x14\x65\x61rly_return_allowed\x18\x07 \x01(\x08\x12\'\n\x1frequired_intermediate_variables\x18\x08 \x03(\r\"\x93\x01\n!Fmi3InstantiateScheduledExecution\x12\x15\n\rinstance_name\x18\x01 \x01(\t\x12\x1b\n\x13instantiation_token\x18\x02 \x01(\t\x12\x15\n\rresource_path\x18\x03 \x01(\t\x12\x0f\n\x07visible\x18\x04 \x01(\x08\x12\x12\n\nlogging_on\x18\x05 \x01(\x08\"\x83\x01\n\nFmi3DoStep\x12#\n\x1b\x63urrent_communication_point\x18\x01 \x01(\x01\x12\x1f\n\x17\x63ommunication_step_size\x18\x02 \x01(\x01\x12/\n\'no_set_fmu_state_prior_to_current_point\x18\x03 \x01(\x08\"=\n\x13\x46mi3SetDebugLogging\x12\x12\n\nlogging_on\x18\x01 \x01(\x08\x12\x12\n\ncategories\x18\x02 \x03(\t\"\xb3\x01\n\x1b\x46mi3EnterInitializationMode\x12\x19\n\x11tolerance_defined\x18\x01 \x01(\x08\x12\x16\n\ttolerance\x18\x02 \x01(\x01H\x00\x88\x01\x01\x12\x12\n\nstart_time\x18\x03 \x01(\x01\x12\x19\n\x11stop_time_defined\x18\x04 \x01(\x08\x12\x16\n\tstop_time\x18\x05 \x01(\x01H\x01\x88\x01\x01\x42\x0c\n\n_toleranceB\x0c\n\n_stop_time\"\x1c\n\x1a\x46mi3ExitInitializationMode\"\x13\n\x11\x46mi3EnterStepMode\"\x14\n\x12\x46mi3EnterEventMode\"\x12\n\x10\x46mi3FreeInstance\"\x0f\n\rFmi3Terminate\"\x0b\n\tFmi3Reset\"\x17\n\x15\x46mi3SerializeFmuState\"(\n\x17\x46mi3DeserializeFmuState\x12\r\n\x05state\x18\x01 \x01(\x0c\"\x1a\n\x18\x46mi3UpdateDiscreteStates\"\x1c\n\x1a\x46mi3EnterConfigurationMode\"\x1b\n\x19\x46mi3ExitConfigurationMode\"*\n\x0e\x46mi3GetFloat32\x12\x18\n\x10value_references\x18\x01 \x03(\r\"*\n\x0e\x46mi3GetFloat64\x12\x18\n\x10value_references\x18\x01 \x03(\r\"\'\n\x0b\x46mi3GetInt8\x12\x18\n\x10value_references\x18\x01 \x03(\r\"(\n\x0c\x46mi3GetUInt8\x12\x18\n\x10value_references\x18\x01 \x03(\r\"(\n\x0c\x46mi3GetInt16\x12\x18\n\x10value_references\x18\x01 \x03(\r\")\n\rFmi3GetUInt16\x12\x18\n\x10value_references\x18\x01 \x03(\r\"(\n\x0c\x46mi3GetInt32\x12\x18\n\x10value_references\x18\x01 \x03(\r\")\n\rFmi3GetUInt32\x12\x18\n\x10value_references\x18\x01 \x03(\r\"(\n\x0c\x46mi3GetInt64\x12\x18\n\x10value_references\x18\x01 \x03(\r\")\n\rFmi3GetUInt64\x12\x18\n\x10value_references\x18\x01 \x03(\r\"*\n\x0e\x46mi3GetBoolean\x12\x18\n\x10value_references\x18\x01 \x03(\r\")\n\rFmi3GetString\x12\x18\n\x10value_references\x18\x01 \x03(\r\")\n\rFmi3GetBinary\x12\x18\n\x10value_references\x18\x01 \x03(\r\"(\n\x0c\x46mi3GetClock\x12\x18\n\x10value_references\x18\x01 \x03(\r\"c\n\x1c\x46mi3GetDirectionalDerivative\x12\x10\n\x08unknowns\x18\x01 \x03(\r\x12\x0e\n\x06knowns\x18\x02 \x03(\r\x12\x0c\n\x04seed\x18\x03 \x03(\x01\x12\x13\n\x0bsensitivity\x18\x04 \x03(\x01\"_\n\x18\x46mi3GetAdjointDerivative\x12\x10\n\x08unknowns\x18\x01 \x03(\r\x12\x0e\n\x06knowns\x18\x02 \x03(\r\x12\x0c\n\x04seed\x18\x03 \x03(\x01\x12\x13\n\x0bsensitivity\x18\x04 \x03(\x01\"T\n\x18\x46mi3GetOutputDerivatives\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06orders\x18\x02 \x03(\r\x12\x0e\n\x06values\x18\x03 \x03(\x01\":\n\x0e\x46mi3SetFloat32\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x02\":\n\x0e\x46mi3SetFloat64\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x01\"7\n\x0b\x46mi3SetInt8\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x05\"8\n\x0c\x46mi3SetUInt8\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\r\"8\n\x0c\x46mi3SetInt16\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x05\"9\n\rFmi3SetUInt16\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\r\"8\n\x0c\x46mi3SetInt32\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x05\"9\n\rFmi3SetUInt32\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\r\"8\n\x0c\x46mi3SetInt64\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x03\"9\n\rFmi3SetUInt64\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x04\":\n\x0e\x46mi3SetBoolean\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x08\"9\n\rFmi3SetString\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\t\"N\n\rFmi3SetBinary\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x13\n\x0bvalue_sizes\x18\x02 \x03(\x04\x12\x0e\n\x06values\x18\x03 \x03(\x0c\"8\n\x0c\x46mi3SetClock\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x08\"\xae\x01\n\x10\x46mi3DoStepReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x1d\n\x15\x65vent_handling_needed\x18\x02 \x01(\x08\x12\x1c\n\x14terminate_simulation\x18\x03 \x01(\x08\x12\x14\n\x0c\x65\x61rly_return\x18\x04 \x01(\x08\x12\x1c\n\x14last_successful_time\x18\x05 \x01(\x01\"\x11\n\x0f\x46mi3EmptyReturn\"=\n\x10\x46mi3StatusReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\"\x18\n\x16\x46mi3FreeInstanceReturn\"Q\n\x14\x46mi3GetFloat32Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x02\"Q\n\x14\x46mi3GetFloat64Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x01\"N\n\x11\x46mi3GetInt8Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x05\"O\n\x12\x46mi3GetUInt8Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\r\"O\n\x12\x46mi3GetInt16Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x05\"P\n\x13\x46mi3GetUInt16Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\r\"O\n\x12\x46mi3GetInt32Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x05\"P\n\x13\x46mi3GetUInt32Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\r\"O\n\x12\x46mi3GetInt64Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x03\"P\n\x13\x46mi3GetUInt64Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x04\"Q\n\x14\x46mi3GetBooleanReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x08\"P\n\x13\x46mi3GetStringReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\t\"P\n\x13\x46mi3GetBinaryReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x0c\"_\n\"Fmi3GetDirectionalDerivativeReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x01\"[\n\x1e\x46mi3GetAdjointDerivativeReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x01\"[\n\x1e\x46mi3GetOutputDerivativesReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x01\"W\n\x1b\x46mi3SerializeFmuStateReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\r\n\x05state\x18\x02 \x01(\x0c\"O\n\x12\x46mi3GetClockReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x08\"\x9e\x02\n\x1e\x46mi3UpdateDiscreteStatesReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12#\n\x1b\x64iscrete_states_need_update\x18\x02 \x01(\x08\x12\x1c\n\x14terminate_simulation\x18\x03 \x01(\x08\x12*\n\"nominals_continuous_states_changed\x18\x04 \x01(\x08\x12(\n values_continuous_states_changed\x18\x05 \x01(\x08\x12\x1f\n\x17next_event_time_defined\x18\x06 \x01(\x08\x12\x17\n\x0fnext_event_time\x18\x07 \x01(\x01\"2\n\x16\x46mi3GetIntervalDecimal\x12\x18\n\x10value_references\x18\x01 \x03(\r\"p\n\x1c\x46mi3GetIntervalDecimalReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x11\n\tintervals\x18\x02 \x03(\x01\x12\x12\n\nqualifiers\x18\x03 \x03(\x05\"3\n\x17\x46mi3GetIntervalFraction\x12\x18\n\x10value_references\x18\x01 \x03(\r\"\x85\x01\n\x1d\x46mi3GetIntervalFractionReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x10\n\x08\x63ounters\x18\x02 \x03(\x04\x12\x13\n\x0bresolutions\x18\x03 \x03(\x04\x12\x12\n\nqualifiers\x18\x04 \x03(\x05\"/\n\x13\x46mi3GetShiftDecimal\x12\x18\n\x10value_references\x18\x01 \x03(\r\"V\n\x19\x46mi3GetShiftDecimalReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06shifts\x18\x02 \x03(\x01\"0\n\x14\x46mi3GetShiftFraction\x12\x18\n\x10value_references\x18\x01 \x03(\r\"n\n\x1a\x46mi3GetShiftFractionReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x10\n\x08\x63ounters\x18\x02 \x03(\x04\x12\x13\n\x0bresolutions\x18\x03 \x03(\x04\"E\n\x16\x46mi3SetIntervalDecimal\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x11\n\tintervals\x18\x02 \x03(\x01\"Z\n\x17\x46mi3SetIntervalFraction\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x10\n\x08\x63ounters\x18\x02 \x03(\x04\x12\x13\n\x0bresolutions\x18\x03 \x03(\x04\"?\n\x13\x46mi3SetShiftDecimal\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06shifts\x18\x02 \x03(\x01\"W\n\x14\x46mi3SetShiftFraction\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x10\n\x08\x63ounters\x18\x02 \x03(\x04\x12\x13\n\x0bresolutions\x18\x03 \x03(\x04\"\xf4\x1b\n\x0b\x46mi3Command\x12S\n\x1c\x46mi3InstantiateModelExchange\x18\x01 \x01(\x0b\x32+.fmi3_messages.Fmi3InstantiateModelExchangeH\x00\x12Q\n\x1b\x46mi3InstantiateCoSimulation\x18\x02 \x01(\x0b\x32*.fmi3_messages.Fmi3InstantiateCoSimulationH\x00\x12]\n!Fmi3InstantiateScheduledExecution\x18\x03 \x01(\x0b\x32\x30.fmi3_messages.Fmi3InstantiateScheduledExecutionH\x00\x12/\n\nFmi3DoStep\x18\x04 \x01(\x0b\x32\x19.fmi3_messages.Fmi3DoStepH\x00\x12\x41\n\x13\x46mi3SetDebugLogging\x18\x05 \x01(\x0b\x32\".fmi3_messages.Fmi3SetDebugLoggingH\x00\x12Q\n\x1b\x46mi3EnterInitializationMode\x18\x06 \x01(\x0b\x32*.fmi3_messages.Fmi3EnterInitializationModeH\x00\x12O\n\x1a\x46mi3ExitInitializationMode\x18\x07 \x01(\x0b\x32).fmi3_messages.Fmi3ExitInitializationModeH\x00\x12;\n\x10\x46mi3FreeInstance\x18\x08 \x01(\x0b\x32\x1f.fmi3_messages.Fmi3FreeInstanceH\x00\x12\x35\n\rFmi3Terminate\x18\t \x01(\x0b\x32\x1c.fmi3_messages.Fmi3TerminateH\x00\x12-\n\tFmi3Reset\x18\n \x01(\x0b\x32\x18.fmi3_messages.Fmi3ResetH\x00\x12\x37\n\x0e\x46mi3GetFloat32\x18\r \x01(\x0b\x32\x1d.fmi3_messages.Fmi3GetFloat32H\x00\x12\x37\n\x0e\x46mi3GetFloat64\x18\x0e \x01(\x0b\x32\x1d.fmi3_messages.Fmi3GetFloat64H\x00\x12\x31\n\x0b\x46mi3GetInt8\x18\x0f \x01(\x0b\x32\x1a.fmi3_messages.Fmi3GetInt8H\x00\x12\x33\n\x0c\x46mi3GetUInt8\x18\x10 \x01(\x0b\x32\x1b.fmi3_messages.Fmi3GetUInt8H\x00\x12\x33\n\x0c\x46mi3GetInt16\x18\x11 \x01(\x0b\x32\x1b.fmi3_messages.Fmi3GetInt16H\x00\x12\x35\n\rFmi3GetUInt16\x18\x12 \x01(\x0b\x32\x1c.fmi3_messages.Fmi3GetUInt16H\x00\x12\x33\n\x0c\x46mi3GetInt32\x18\x13 \x01(\x0b\x32\x1b.fmi3_messages.Fmi3GetInt32H\x00\x12\x35\n\rFmi3GetUInt32\x18\x14 \x01(\x0b\x32\x1c.fmi3_messages.Fmi3GetUInt32H\x00\x12\x33\n\x0c\x46mi3GetInt64\x18\x15 \x01(\x0b\x32\x1b.fmi3_messages.Fmi3GetInt64H\x00\x12\x35\n\rFmi3GetUInt64\x18\x16 \x01(\x0b\x32\x1c.fmi3_messages.Fmi3GetUInt64H\x00\x12\x37\n\x0e\x46mi3GetBoolean\x18\x17 \x01(\x0b\x32\x1d.fmi3_messages.Fmi3GetBooleanH\x00\x12\x35\n\rFmi3GetString\x18\x18 \x01(\x0b\x32\x1c.fmi3_messages.Fmi3GetStringH\x00\x12\x35\n\rFmi3GetBinary\x18\x19 \x01(\x0b\x32\x1c.fmi3_messages.Fmi3GetBinaryH\x00\x12S\n\x1c\x46mi3GetDirectionalDerivative\x18\x1a \x01(\x0b\x32+.fmi3_messages.Fmi3GetDirectionalDerivativeH\x00\x12K\n\x18\x46mi3GetAdjointDerivative\x18\x1b \x01(\x0b\x32\'.fmi3_messages.Fmi3GetAdjointDerivativeH\x00\x12K\n\x18\x46mi3GetOutputDerivatives\x18\x1c \x01(\x0b\x32\'.fmi3_messages.Fmi3GetOutputDerivativesH\x00\x12\x37\n\x0e\x46mi3SetFloat32\x18\x1d \x01(\x0b\x32\x1d.fmi3_messages.Fmi3SetFloat32H\x00\x12\x37\n\x0e\x46mi3SetFloat64\x18\x1e \x01(\x0b\x32\x1d.fmi3_messages.Fmi3SetFloat64H\x00\x12\x31\n\x0b\x46mi3SetInt8\x18\x1f \x01(\x0b\x32\x1a.fmi3_messages.Fmi3SetInt8H\x00\x12\x33\n\x0c\x46mi3SetUInt8\x18  \x01(\x0b\x32\x1b.fmi3_messages.Fmi3SetUInt8H\x00\x12\x33\n\x0c\x46mi3SetInt16\x18! \x01(\x0b\x32\x1b.fmi3_messages.Fmi3SetInt16H\x00\x12\x35\n\rFmi3SetUInt16\x18\" \x01(\x0b\x32\x1c.fmi3_messages.Fmi3SetUInt16H\x00\x12\x33\n\x0c\x46mi3SetInt32\x18# \x01(\x0b\x32\x1b.fmi3_messages.Fmi3SetInt32H\x00\x12\x35\n\rFmi3SetUInt32\x18$ \x01(\x0b\x32\x1c.fmi3_messages.Fmi3SetUInt32H\x00\x12\x33\n\x0c\x46mi3SetInt64\x18% \x01(\x0b\x32\x1b.fmi3_messages.Fmi3SetInt64H\x00\x12\x35\n\rFmi3SetUInt64\x18& \x01(\x0b\x32\x1c.fmi3_messages.Fmi3SetUInt64H\x00\x12\x37\n\x0e\x46mi3SetBoolean\x18\' \x01(\x0b\x32\x1d.fmi3_messages.Fmi3SetBooleanH\x00\x12\x35\n\rFmi3SetString\x18( \x01(\x0b\x32\x1c.fmi3_messages.Fmi3SetStringH\x00\x12\x35\n\rFmi3SetBinary\x18) \x01(\x0b\x32\x1c.fmi3_messages.Fmi3SetBinaryH\x00\x12\x45\n\x15\x46mi3SerializeFmuState\x18* \x01(\x0b\x32$.fmi3_messages.Fmi3SerializeFmuStateH\x00\x12I\n\x17\x46mi3DeserializeFmuState\x18+ \x01(\x0b\x32&.fmi3_messages.Fmi3DeserializeFmuStateH\x00\x12\x33\n\x0c\x46mi3GetClock\x18, \x01(\x0b\x32\x1b.fmi3_messages.Fmi3GetClockH\x00\x12\x33\n\x0c\x46mi3SetClock\x18- \x01(\x0b\x32\x1b.fmi3_messages.Fmi3SetClockH\x00\x12G\n\x16\x46mi3GetIntervalDecimal\x18. \x01(\x0b\x32%.fmi3_messages.Fmi3GetIntervalDecimalH\x00\x12=\n\x11\x46mi3EnterStepMode\x18/ \x01(\x0b\x32 .fmi3_messages.Fmi3EnterStepModeH\x00\x12?\n\x12\x46mi3EnterEventMode\x18\x30 \x01(\x0b\x32!.fmi3_messages.Fmi3EnterEventModeH\x00\x12K\n\x18\x46mi3UpdateDiscreteStates\x18\x31 \x01(\x0b\x32\'.fmi3_messages.Fmi3UpdateDiscreteStatesH\x00\x12O\n\x1a\x46mi3EnterConfigurationMode\x18\x32 \x01(\x0b\x32).fmi3_messages.Fmi3EnterConfigurationModeH\x00\x12M\n\x19\x46mi3ExitConfigurationMode\x18\x33 \x01(\x0b\x32(.fmi3_messages.Fmi3ExitConfigurationModeH\x00\x12I\n\x17\x46mi3GetIntervalFraction\x18\x34 \x01(\x0b\x32&.fmi3_messages.Fmi3GetIntervalFractionH\x00\x12\x41\n\x13\x46mi3GetShiftDecimal\x18\x35 \x01(\x0b\x32\".fmi3_messages.Fmi3GetShiftDecimalH\x00\x12\x43\n\x14\x46mi3GetShiftFraction\x18\x36 \x01(\x0b\x32#.fmi3_messages.Fmi3GetShiftFractionH\x00\x12G\n\x16\x46mi3SetIntervalDecimal\x18\x37 \x01(\x0b\x32%.fmi3_messages.Fmi3SetIntervalDecimalH\x00\x12I\n\x17\x46mi3SetIntervalFraction\x18\x38 \x01(\x0b\x32&.fmi3_messages.Fmi3SetIntervalFractionH\x00\x12\x41\n\x13\x46mi3SetShiftDecimal\x18\x39 \x01(\x0b\x32\".fmi3_messages.Fmi3SetShiftDecimalH\x00\x12\x43\n\x14\x46mi3SetShiftFraction\x18: \x01(\x0b\x32#.fmi3_messages.Fmi3SetShiftFractionH\x00\x42\t\n\x07\x63ommand*]\n\nFmi3Status\x12\x0b\n\x07\x46MI3_OK\x10\x00\x12\x10\n\x0c\x46MI3_WARNING\x10\x01\x12\x10\n\x0c\x46MI3_DISCARD\x10\x02\x12\x0e\n\nFMI3_ERROR\x10\x03\x12\x0e\n\nFMI3_FATAL\x10\x04*k\n\x15\x46mi3IntervalQualifier\x12\x1c\n\x18\x46MI3_INTERVALNOTYETKNOWN\x10\x00\x12\x1a\n\x16\x46MI3_INTERVALUNCHANGED\x10\x01\x12\x18\n\x14\x46MI3_INTERVALCHANGED\x10\x02\x42\x10\n\x00\x42\x0c\x46mi3Messagesb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x13\x66mi3_messages.proto\x12\rfmi3_messages\"\x8e\x01\n\x1c\x46mi3InstantiateModelExchange\x12\x15\n\rinstance_name\x18\x01 \x01(\t\x12\x1b\n\x13instantiation_token\x18\x02 \x01(\t\x12\x15\n\rresource_path\x18\x03 \x01(\t\x12\x0f\n\x07visible\x18\x04 \x01(\x08\x12\x12\n\nlogging_on\x18\x05 \x01(\x08\"\xed\x01\n\x1b\x46mi3InstantiateCoSimulation\x12\x15\n\rinstance_name\x18\x01 \x01(\t\x12\x1b\n\x13instantiation_token\x18\x02 \x01(\t\x12\x15\n\rresource_path\x18\x03 \x01(\t\x12\x0f\n\x07visible\x18\x04 \x01(\x08\x12\x12\n\nlogging_on\x18\x05 \x01(\x08\x12\x17\n\x0f\x65vent_mode_used\x18\x06 \x01(\x08\x12\x1c\n\x14\x65\x61rly_return_allowed\x18\x07 \x01(\x08\x12\'\n\x1frequired_intermediate_variables\x18\x08 \x03(\r\"\x93\x01\n!Fmi3InstantiateScheduledExecution\x12\x15\n\rinstance_name\x18\x01 \x01(\t\x12\x1b\n\x13instantiation_token\x18\x02 \x01(\t\x12\x15\n\rresource_path\x18\x03 \x01(\t\x12\x0f\n\x07visible\x18\x04 \x01(\x08\x12\x12\n\nlogging_on\x18\x05 \x01(\x08\"\x83\x01\n\nFmi3DoStep\x12#\n\x1b\x63urrent_communication_point\x18\x01 \x01(\x01\x12\x1f\n\x17\x63ommunication_step_size\x18\x02 \x01(\x01\x12/\n\'no_set_fmu_state_prior_to_current_point\x18\x03 \x01(\x08\"=\n\x13\x46mi3SetDebugLogging\x12\x12\n\nlogging_on\x18\x01 \x01(\x08\x12\x12\n\ncategories\x18\x02 \x03(\t\"\xb3\x01\n\x1b\x46mi3EnterInitializationMode\x12\x19\n\x11tolerance_defined\x18\x01 \x01(\x08\x12\x16\n\ttolerance\x18\x02 \x01(\x01H\x00\x88\x01\x01\x12\x12\n\nstart_time\x18\x03 \x01(\x01\x12\x19\n\x11stop_time_defined\x18\x04 \x01(\x08\x12\x16\n\tstop_time\x18\x05 \x01(\x01H\x01\x88\x01\x01\x42\x0c\n\n_toleranceB\x0c\n\n_stop_time\"\x1c\n\x1a\x46mi3ExitInitializationMode\"\x13\n\x11\x46mi3EnterStepMode\"\x14\n\x12\x46mi3EnterEventMode\"\x12\n\x10\x46mi3FreeInstance\"\x0f\n\rFmi3Terminate\"\x0b\n\tFmi3Reset\"\x17\n\x15\x46mi3SerializeFmuState\"(\n\x17\x46mi3DeserializeFmuState\x12\r\n\x05state\x18\x01 \x01(\x0c\"\x1a\n\x18\x46mi3UpdateDiscreteStates\"\x1c\n\x1a\x46mi3EnterConfigurationMode\"\x1b\n\x19\x46mi3ExitConfigurationMode\"*\n\x0e\x46mi3GetFloat32\x12\x18\n\x10value_references\x18\x01 \x03(\r\"*\n\x0e\x46mi3GetFloat64\x12\x18\n\x10value_references\x18\x01 \x03(\r\"\'\n\x0b\x46mi3GetInt8\x12\x18\n\x10value_references\x18\x01 \x03(\r\"(\n\x0c\x46mi3GetUInt8\x12\x18\n\x10value_references\x18\x01 \x03(\r\"(\n\x0c\x46mi3GetInt16\x12\x18\n\x10value_references\x18\x01 \x03(\r\")\n\rFmi3GetUInt16\x12\x18\n\x10value_references\x18\x01 \x03(\r\"(\n\x0c\x46mi3GetInt32\x12\x18\n\x10value_references\x18\x01 \x03(\r\")\n\rFmi3GetUInt32\x12\x18\n\x10value_references\x18\x01 \x03(\r\"(\n\x0c\x46mi3GetInt64\x12\x18\n\x10value_references\x18\x01 \x03(\r\")\n\rFmi3GetUInt64\x12\x18\n\x10value_references\x18\x01 \x03(\r\"*\n\x0e\x46mi3GetBoolean\x12\x18\n\x10value_references\x18\x01 \x03(\r\")\n\rFmi3GetString\x12\x18\n\x10value_references\x18\x01 \x03(\r\")\n\rFmi3GetBinary\x12\x18\n\x10value_references\x18\x01 \x03(\r\"(\n\x0c\x46mi3GetClock\x12\x18\n\x10value_references\x18\x01 \x03(\r\"c\n\x1c\x46mi3GetDirectionalDerivative\x12\x10\n\x08unknowns\x18\x01 \x03(\r\x12\x0e\n\x06knowns\x18\x02 \x03(\r\x12\x0c\n\x04seed\x18\x03 \x03(\x01\x12\x13\n\x0bsensitivity\x18\x04 \x03(\x01\"_\n\x18\x46mi3GetAdjointDerivative\x12\x10\n\x08unknowns\x18\x01 \x03(\r\x12\x0e\n\x06knowns\x18\x02 \x03(\r\x12\x0c\n\x04seed\x18\x03 \x03(\x01\x12\x13\n\x0bsensitivity\x18\x04 \x03(\x01\"T\n\x18\x46mi3GetOutputDerivatives\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06orders\x18\x02 \x03(\r\x12\x0e\n\x06values\x18\x03 \x03(\x01\":\n\x0e\x46mi3SetFloat32\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x02\":\n\x0e\x46mi3SetFloat64\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x01\"7\n\x0b\x46mi3SetInt8\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x05\"8\n\x0c\x46mi3SetUInt8\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\r\"8\n\x0c\x46mi3SetInt16\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x05\"9\n\rFmi3SetUInt16\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\r\"8\n\x0c\x46mi3SetInt32\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x05\"9\n\rFmi3SetUInt32\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\r\"8\n\x0c\x46mi3SetInt64\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x03\"9\n\rFmi3SetUInt64\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x04\":\n\x0e\x46mi3SetBoolean\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x08\"9\n\rFmi3SetString\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\t\"N\n\rFmi3SetBinary\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x13\n\x0bvalue_sizes\x18\x02 \x03(\x04\x12\x0e\n\x06values\x18\x03 \x03(\x0c\"8\n\x0c\x46mi3SetClock\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06values\x18\x02 \x03(\x08\"\xae\x01\n\x10\x46mi3DoStepReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x1d\n\x15\x65vent_handling_needed\x18\x02 \x01(\x08\x12\x1c\n\x14terminate_simulation\x18\x03 \x01(\x08\x12\x14\n\x0c\x65\x61rly_return\x18\x04 \x01(\x08\x12\x1c\n\x14last_successful_time\x18\x05 \x01(\x01\"\x11\n\x0f\x46mi3EmptyReturn\"=\n\x10\x46mi3StatusReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\"\x18\n\x16\x46mi3FreeInstanceReturn\"Q\n\x14\x46mi3GetFloat32Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x02\"Q\n\x14\x46mi3GetFloat64Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x01\"N\n\x11\x46mi3GetInt8Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x05\"O\n\x12\x46mi3GetUInt8Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\r\"O\n\x12\x46mi3GetInt16Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x05\"P\n\x13\x46mi3GetUInt16Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\r\"O\n\x12\x46mi3GetInt32Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x05\"P\n\x13\x46mi3GetUInt32Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\r\"O\n\x12\x46mi3GetInt64Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x03\"P\n\x13\x46mi3GetUInt64Return\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x04\"Q\n\x14\x46mi3GetBooleanReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x08\"P\n\x13\x46mi3GetStringReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\t\"P\n\x13\x46mi3GetBinaryReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x0c\"_\n\"Fmi3GetDirectionalDerivativeReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x01\"[\n\x1e\x46mi3GetAdjointDerivativeReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x01\"[\n\x1e\x46mi3GetOutputDerivativesReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x01\"W\n\x1b\x46mi3SerializeFmuStateReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\r\n\x05state\x18\x02 \x01(\x0c\"O\n\x12\x46mi3GetClockReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06values\x18\x02 \x03(\x08\"\x9e\x02\n\x1e\x46mi3UpdateDiscreteStatesReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12#\n\x1b\x64iscrete_states_need_update\x18\x02 \x01(\x08\x12\x1c\n\x14terminate_simulation\x18\x03 \x01(\x08\x12*\n\"nominals_continuous_states_changed\x18\x04 \x01(\x08\x12(\n values_continuous_states_changed\x18\x05 \x01(\x08\x12\x1f\n\x17next_event_time_defined\x18\x06 \x01(\x08\x12\x17\n\x0fnext_event_time\x18\x07 \x01(\x01\"2\n\x16\x46mi3GetIntervalDecimal\x12\x18\n\x10value_references\x18\x01 \x03(\r\"p\n\x1c\x46mi3GetIntervalDecimalReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x11\n\tintervals\x18\x02 \x03(\x01\x12\x12\n\nqualifiers\x18\x03 \x03(\x05\"3\n\x17\x46mi3GetIntervalFraction\x12\x18\n\x10value_references\x18\x01 \x03(\r\"\x85\x01\n\x1d\x46mi3GetIntervalFractionReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x10\n\x08\x63ounters\x18\x02 \x03(\x04\x12\x13\n\x0bresolutions\x18\x03 \x03(\x04\x12\x12\n\nqualifiers\x18\x04 \x03(\x05\"/\n\x13\x46mi3GetShiftDecimal\x12\x18\n\x10value_references\x18\x01 \x03(\r\"V\n\x19\x46mi3GetShiftDecimalReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x0e\n\x06shifts\x18\x02 \x03(\x01\"0\n\x14\x46mi3GetShiftFraction\x12\x18\n\x10value_references\x18\x01 \x03(\r\"n\n\x1a\x46mi3GetShiftFractionReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x10\n\x08\x63ounters\x18\x02 \x03(\x04\x12\x13\n\x0bresolutions\x18\x03 \x03(\x04\"E\n\x16\x46mi3SetIntervalDecimal\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x11\n\tintervals\x18\x02 \x03(\x01\"Z\n\x17\x46mi3SetIntervalFraction\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x10\n\x08\x63ounters\x18\x02 \x03(\x04\x12\x13\n\x0bresolutions\x18\x03 \x03(\x04\"?\n\x13\x46mi3SetShiftDecimal\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x0e\n\x06shifts\x18\x02 \x03(\x01\"W\n\x14\x46mi3SetShiftFraction\x12\x18\n\x10value_references\x18\x01 \x03(\r\x12\x10\n\x08\x63ounters\x18\x02 \x03(\x04\x12\x13\n\x0bresolutions\x18\x03 \x03(\x04\"\x89\n\n\x0f\x46mi3FusedDoStep\x12\x32\n\x0bset_float32\x18\x01 \x01(\x0b\x32\x1d.fmi3_messages.Fmi3SetFloat32\x12\x32\n\x0bset_float64\x18\x02 \x01(\x0b\x32\x1d.fmi3_messages.Fmi3SetFloat64\x12,\n\x08set_int8\x18\x03 \x01(\x0b\x32\x1a.fmi3_messages.Fmi3SetInt8\x12.\n\tset_uint8\x18\x04 \x01(\x0b\x32\x1b.fmi3_messages.Fmi3SetUInt8\x12.\n\tset_int16\x18\x05 \x01(\x0b\x32\x1b.fmi3_messages.Fmi3SetInt16\x12\x30\n\nset_uint16\x18\x06 \x01(\x0b\x32\x1c.fmi3_messages.Fmi3SetUInt16\x12.\n\tset_int32\x18\x07 \x01(\x0b\x32\x1b.fmi3_messages.Fmi3SetInt32\x12\x30\n\nset_uint32\x18\x08 \x01(\x0b\x32\x1c.fmi3_messages.Fmi3SetUInt32\x12.\n\tset_int64\x18\t \x01(\x0b\x32\x1b.fmi3_messages.Fmi3SetInt64\x12\x30\n\nset_uint64\x18\n \x01(\x0b\x32\x1c.fmi3_messages.Fmi3SetUInt64\x12\x32\n\x0bset_boolean\x18\x0b \x01(\x0b\x32\x1d.fmi3_messages.Fmi3SetBoolean\x12#\n\x1b\x63urrent_communication_point\x18\x0c \x01(\x01\x12\x1f\n\x17\x63ommunication_step_size\x18\r \x01(\x01\x12/\n\'no_set_fmu_state_prior_to_current_point\x18\x0e \x01(\x08\x12\x32\n\x0bget_float32\x18\x0f \x01(\x0b\x32\x1d.fmi3_messages.Fmi3GetFloat32\x12\x32\n\x0bget_float64\x18\x10 \x01(\x0b\x32\x1d.fmi3_messages.Fmi3GetFloat64\x12,\n\x08get_int8\x18\x11 \x01(\x0b\x32\x1a.fmi3_messages.Fmi3GetInt8\x12.\n\tget_uint8\x18\x12 \x01(\x0b\x32\x1b.fmi3_messages.Fmi3GetUInt8\x12.\n\tget_int16\x18\x13 \x01(\x0b\x32\x1b.fmi3_messages.Fmi3GetInt16\x12\x30\n\nget_uint16\x18\x14 \x01(\x0b\x32\x1c.fmi3_messages.Fmi3GetUInt16\x12.\n\tget_int32\x18\x15 \x01(\x0b\x32\x1b.fmi3_messages.Fmi3GetInt32\x12\x30\n\nget_uint32\x18\x16 \x01(\x0b\x32\x1c.fmi3_messages.Fmi3GetUInt32\x12.\n\tget_int64\x18\x17 \x01(\x0b\x32\x1b.fmi3_messages.Fmi3GetInt64\x12\x30\n\nget_uint64\x18\x18 \x01(\x0b\x32\x1c.fmi3_messages.Fmi3GetUInt64\x12\x32\n\x0bget_boolean\x18\x19 \x01(\x0b\x32\x1d.fmi3_messages.Fmi3GetBoolean\x12?\n\x0eget_derivative\x18\x1a \x01(\x0b\x32\'.fmi3_messages.Fmi3GetOutputDerivatives\"\xc8\x03\n\x15\x46mi3FusedDoStepReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x1d\n\x15\x65vent_handling_needed\x18\x02 \x01(\x08\x12\x1c\n\x14terminate_simulation\x18\x03 \x01(\x08\x12\x14\n\x0c\x65\x61rly_return\x18\x04 \x01(\x08\x12\x1c\n\x14last_successful_time\x18\x05 \x01(\x01\x12\x16\n\x0e\x66loat32_values\x18\x06 \x03(\x02\x12\x16\n\x0e\x66loat64_values\x18\x07 \x03(\x01\x12\x13\n\x0bint8_values\x18\x08 \x03(\x05\x12\x14\n\x0cuint8_values\x18\t \x03(\r\x12\x14\n\x0cint16_values\x18\n \x03(\x05\x12\x15\n\ruint16_values\x18\x0b \x03(\r\x12\x14\n\x0cint32_values\x18\x0c \x03(\x05\x12\x15\n\ruint32_values\x18\r \x03(\r\x12\x14\n\x0cint64_values\x18\x0e \x03(\x03\x12\x15\n\ruint64_values\x18\x0f \x03(\x04\x12\x16\n\x0e\x62oolean_values\x18\x10 \x03(\x08\x12\x19\n\x11\x64\x65rivative_values\x18\x11 \x03(\x01\"D\n\x13\x46mi3CoalescedDoStep\x12-\n\x05steps\x18\x01 \x03(\x0b\x32\x1e.fmi3_messages.Fmi3FusedDoStep\"\xe0\x03\n\x19\x46mi3CoalescedDoStepReturn\x12)\n\x06status\x18\x01 \x01(\x0e\x32\x19.fmi3_messages.Fmi3Status\x12\x1d\n\x15\x65vent_handling_needed\x18\x02 \x01(\x08\x12\x1c\n\x14terminate_simulation\x18\x03 \x01(\x08\x12\x14\n\x0c\x65\x61rly_return\x18\x04 \x01(\x08\x12\x1c\n\x14last_successful_time\x18\x05 \x01(\x01\x12\x16\n\x0e\x66loat32_values\x18\x06 \x03(\x02\x12\x16\n\x0e\x66loat64_values\x18\x07 \x03(\x01\x12\x13\n\x0bint8_values\x18\x08 \x03(\x05\x12\x14\n\x0cuint8_values\x18\t \x03(\r\x12\x14\n\x0cint16_values\x18\n \x03(\x05\x12\x15\n\ruint16_values\x18\x0b \x03(\r\x12\x14\n\x0cint32_values\x18\x0c \x03(\x05\x12\x15\n\ruint32_values\x18\r \x03(\r\x12\x14\n\x0cint64_values\x18\x0e \x03(\x03\x12\x15\n\ruint64_values\x18\x0f \x03(\x04\x12\x16\n\x0e\x62oolean_values\x18\x10 \x03(\x08\x12\x12\n\nsteps_done\x18\x11 \x01(\r\x12\x19\n\x11\x64\x65rivative_values\x18\x12 \x03(\x01\"\xf2\x1c\n\x0b\x46mi3Command\x12S\n\x1c\x46mi3InstantiateModelExchange\x18\x01 \x01(\x0b\x32+.fmi3_messages.Fmi3InstantiateModelExchangeH\x00\x12Q\n\x1b\x46mi3InstantiateCoSimulation\x18\x02 \x01(\x0b\x32*.fmi3_messages.Fmi3InstantiateCoSimulationH\x00\x12]\n!Fmi3InstantiateScheduledExecution\x18\x03 \x01(\x0b\x32\x30.fmi3_messages.Fmi3InstantiateScheduledExecutionH\x00\x12/\n\nFmi3DoStep\x18\x04 \x01(\x0b\x32\x19.fmi3_messages.Fmi3DoStepH\x00\x12\x41\n\x13\x46mi3SetDebugLogging\x18\x05 \x01(\x0b\x32\".fmi3_messages.Fmi3SetDebugLoggingH\x00\x12Q\n\x1b\x46mi3EnterInitializationMode\x18\x06 \x01(\x0b\x32*.fmi3_messages.Fmi3EnterInitializationModeH\x00\x12O\n\x1a\x46mi3ExitInitializationMode\x18\x07 \x01(\x0b\x32).fmi3_messages.Fmi3ExitInitializationModeH\x00\x12;\n\x10\x46mi3FreeInstance\x18\x08 \x01(\x0b\x32\x1f.fmi3_messages.Fmi3FreeInstanceH\x00\x12\x35\n\rFmi3Terminate\x18\t \x01(\x0b\x32\x1c.fmi3_messages.Fmi3TerminateH\x00\x12-\n\tFmi3Reset\x18\n \x01(\x0b\x32\x18.fmi3_messages.Fmi3ResetH\x00\x12\x37\n\x0e\x46mi3GetFloat32\x18\r \x01(\x0b\x32\x1d.fmi3_messages.Fmi3GetFloat32H\x00\x12\x37\n\x0e\x46mi3GetFloat64\x18\x0e \x01(\x0b\x32\x1d.fmi3_messages.Fmi3GetFloat64H\x00\x12\x31\n\x0b\x46mi3GetInt8\x18\x0f \x01(\x0b\x32\x1a.fmi3_messages.Fmi3GetInt8H\x00\x12\x33\n\x0c\x46mi3GetUInt8\x18\x10 \x01(\x0b\x32\x1b.fmi3_messages.Fmi3GetUInt8H\x00\x12\x33\n\x0c\x46mi3GetInt16\x18\x11 \x01(\x0b\x32\x1b.fmi3_messages.Fmi3GetInt16H\x00\x12\x35\n\rFmi3GetUInt16\x18\x12 \x01(\x0b\x32\x1c.fmi3_messages.Fmi3GetUInt16H\x00\x12\x33\n\x0c\x46mi3GetInt32\x18\x13 \x01(\x0b\x32\x1b.fmi3_messages.Fmi3GetInt32H\x00\x12\x35\n\rFmi3GetUInt32\x18\x14 \x01(\x0b\x32\x1c.fmi3_messages.Fmi3GetUInt32H\x00\x12\x33\n\x0c\x46mi3GetInt64\x18\x15 \x01(\x0b\x32\x1b.fmi3_messages.Fmi3GetInt64H\x00\x12\x35\n\rFmi3GetUInt64\x18\x16 \x01(\x0b\x32\x1c.fmi3_messages.Fmi3GetUInt64H\x00\x12\x37\n\x0e\x46mi3GetBoolean\x18\x17 \x01(\x0b\x32\x1d.fmi3_messages.Fmi3GetBooleanH\x00\x12\x35\n\rFmi3GetString\x18\x18 \x01(\x0b\x32\x1c.fmi3_messages.Fmi3GetStringH\x00\x12\x35\n\rFmi3GetBinary\x18\x19 \x01(\x0b\x32\x1c.fmi3_messages.Fmi3GetBinaryH\x00\x12S\n\x1c\x46mi3GetDirectionalDerivative\x18\x1a \x01(\x0b\x32+.fmi3_messages.Fmi3GetDirectionalDerivativeH\x00\x12K\n\x18\x46mi3GetAdjointDerivative\x18\x1b \x01(\x0b\x32\'.fmi3_messages.Fmi3GetAdjointDerivativeH\x00\x12K\n\x18\x46mi3GetOutputDerivatives\x18\x1c \x01(\x0b\x32\'.fmi3_messages.Fmi3GetOutputDerivativesH\x00\x12\x37\n\x0e\x46mi3SetFloat32\x18\x1d \x01(\x0b\x32\x1d.fmi3_messages.Fmi3SetFloat32H\x00\x12\x37\n\x0e\x46mi3SetFloat64\x18\x1e \x01(\x0b\x32\x1d.fmi3_messages.Fmi3SetFloat64H\x00\x12\x31\n\x0b\x46mi3SetInt8\x18\x1f \x01(\x0b\x32\x1a.fmi3_messages.Fmi3SetInt8H\x00\x12\x33\n\x0c\x46mi3SetUInt8\x18  \x01(\x0b\x32\x1b.fmi3_messages.Fmi3SetUInt8H\x00\x12\x33\n\x0c\x46mi3SetInt16\x18! \x01(\x0b\x32\x1b.fmi3_messages.Fmi3SetInt16H\x00\x12\x35\n\rFmi3SetUInt16\x18\" \x01(\x0b\x32\x1c.fmi3_messages.Fmi3SetUInt16H\x00\x12\x33\n\x0c\x46mi3SetInt32\x18# \x01(\x0b\x32\x1b.fmi3_messages.Fmi3SetInt32H\x00\x12\x35\n\rFmi3SetUInt32\x18$ \x01(\x0b\x32\x1c.fmi3_messages.Fmi3SetUInt32H\x00\x12\x33\n\x0c\x46mi3SetInt64\x18% \x01(\x0b\x32\x1b.fmi3_messages.Fmi3SetInt64H\x00\x12\x35\n\rFmi3SetUInt64\x18& \x01(\x0b\x32\x1c.fmi3_messages.Fmi3SetUInt64H\x00\x12\x37\n\x0e\x46mi3SetBoolean\x18\' \x01(\x0b\x32\x1d.fmi3_messages.Fmi3SetBooleanH\x00\x12\x35\n\rFmi3SetString\x18( \x01(\x0b\x32\x1c.fmi3_messages.Fmi3SetStringH\x00\x12\x35\n\rFmi3SetBinary\x18) \x01(\x0b\x32\x1c.fmi3_messages.Fmi3SetBinaryH\x00\x12\x45\n\x15\x46mi3SerializeFmuState\x18* \x01(\x0b\x32$.fmi3_messages.Fmi3SerializeFmuStateH\x00\x12I\n\x17\x46mi3DeserializeFmuState\x18+ \x01(\x0b\x32&.fmi3_messages.Fmi3DeserializeFmuStateH\x00\x12\x33\n\x0c\x46mi3GetClock\x18, \x01(\x0b\x32\x1b.fmi3_messages.Fmi3GetClockH\x00\x12\x33\n\x0c\x46mi3SetClock\x18- \x01(\x0b\x32\x1b.fmi3_messages.Fmi3SetClockH\x00\x12G\n\x16\x46mi3GetIntervalDecimal\x18. \x01(\x0b\x32%.fmi3_messages.Fmi3GetIntervalDecimalH\x00\x12=\n\x11\x46mi3EnterStepMode\x18/ \x01(\x0b\x32 .fmi3_messages.Fmi3EnterStepModeH\x00\x12?\n\x12\x46mi3EnterEventMode\x18\x30 \x01(\x0b\x32!.fmi3_messages.Fmi3EnterEventModeH\x00\x12K\n\x18\x46mi3UpdateDiscreteStates\x18\x31 \x01(\x0b\x32\'.fmi3_messages.Fmi3UpdateDiscreteStatesH\x00\x12O\n\x1a\x46mi3EnterConfigurationMode\x18\x32 \x01(\x0b\x32).fmi3_messages.Fmi3EnterConfigurationModeH\x00\x12M\n\x19\x46mi3ExitConfigurationMode\x18\x33 \x01(\x0b\x32(.fmi3_messages.Fmi3ExitConfigurationModeH\x00\x12I\n\x17\x46mi3GetIntervalFraction\x18\x34 \x01(\x0b\x32&.fmi3_messages.Fmi3GetIntervalFractionH\x00\x12\x41\n\x13\x46mi3GetShiftDecimal\x18\x35 \x01(\x0b\x32\".fmi3_messages.Fmi3GetShiftDecimalH\x00\x12\x43\n\x14\x46mi3GetShiftFraction\x18\x36 \x01(\x0b\x32#.fmi3_messages.Fmi3GetShiftFractionH\x00\x12G\n\x16\x46mi3SetIntervalDecimal\x18\x37 \x01(\x0b\x32%.fmi3_messages.Fmi3SetIntervalDecimalH\x00\x12I\n\x17\x46mi3SetIntervalFraction\x18\x38 \x01(\x0b\x32&.fmi3_messages.Fmi3SetIntervalFractionH\x00\x12\x41\n\x13\x46mi3SetShiftDecimal\x18\x39 \x01(\x0b\x32\".fmi3_messages.Fmi3SetShiftDecimalH\x00\x12\x43\n\x14\x46mi3SetShiftFraction\x18: \x01(\x0b\x32#.fmi3_messages.Fmi3SetShiftFractionH\x00\x12\x39\n\x0f\x46mi3FusedDoStep\x18; \x01(\x0b\x32\x1e.fmi3_messages.Fmi3FusedDoStepH\x00\x12\x41\n\x13\x46mi3CoalescedDoStep\x18< \x01(\x0b\x32\".fmi3_messages.Fmi3CoalescedDoStepH\x00\x42\t\n\x07\x63ommand*]\n\nFmi3Status\x12\x0b\n\x07\x46MI3_OK\x10\x00\x12\x10\n\x0c\x46MI3_WARNING\x10\x01\x12\x10\n\x0c\x46MI3_DISCARD\x10\x02\x12\x0e\n\nFMI3_ERROR\x10\x03\x12\x0e\n\nFMI3_FATAL\x10\x04*k\n\x15\x46mi3IntervalQualifier\x12\x1c\n\x18\x46MI3_INTERVALNOTYETKNOWN\x10\x00\x12\x1a\n\x16\x46MI3_INTERVALUNCHANGED\x10\x01\x12\x18\n\x14\x46MI3_INTERVALCHANGED\x10\x02\x42\x10\n\x00\x42\x0c\x46mi3Messagesb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -32,10 +32,10 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'fmi3_messages_pb2', _global
 if not _descriptor._USE_C_DESCRIPTORS:
   _globals['DESCRIPTOR']._loaded_options = None
   _globals['DESCRIPTOR']._serialized_options = b'\n\000B\014Fmi3Messages'
-  _globals['_FMI3STATUS']._serialized_start=9590
-  _globals['_FMI3STATUS']._serialized_end=9683
-  _globals['_FMI3INTERVALQUALIFIER']._serialized_start=9685
-  _globals['_FMI3INTERVALQUALIFIER']._serialized_end=9792
+  _globals['_FMI3STATUS']._serialized_start=12020
+  _globals['_FMI3STATUS']._serialized_end=12113
+  _globals['_FMI3INTERVALQUALIFIER']._serialized_start=12115
+  _globals['_FMI3INTERVALQUALIFIER']._serialized_end=12222
   _globals['_FMI3INSTANTIATEMODELEXCHANGE']._serialized_start=39
   _globals['_FMI3INSTANTIATEMODELEXCHANGE']._serialized_end=181
   _globals['_FMI3INSTANTIATECOSIMULATION']._serialized_start=184
@@ -202,6 +202,14 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_FMI3SETSHIFTDECIMAL']._serialized_end=5924
   _globals['_FMI3SETSHIFTFRACTION']._serialized_start=5926
   _globals['_FMI3SETSHIFTFRACTION']._serialized_end=6013
-  _globals['_FMI3COMMAND']._serialized_start=6016
-  _globals['_FMI3COMMAND']._serialized_end=9588
+  _globals['_FMI3FUSEDDOSTEP']._serialized_start=6016
+  _globals['_FMI3FUSEDDOSTEP']._serialized_end=7305
+  _globals['_FMI3FUSEDDOSTEPRETURN']._serialized_start=7308
+  _globals['_FMI3FUSEDDOSTEPRETURN']._serialized_end=7764
+  _globals['_FMI3COALESCEDDOSTEP']._serialized_start=7766
+  _globals['_FMI3COALESCEDDOSTEP']._serialized_end=7834
+  _globals['_FMI3COALESCEDDOSTEPRETURN']._serialized_start=7837
+  _globals['_FMI3COALESCEDDOSTEPRETURN']._serialized_end=8317
+  _globals['_FMI3COMMAND']._serialized_start=8320
+  _globals['_FMI3COMMAND']._serialized_end=12018
 # @@protoc_insertion_point(module_scope)
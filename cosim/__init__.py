@@ -0,0 +1 @@
+""" Helpers shared by the incubator co-simulation scripts """
@@ -0,0 +1,398 @@
+""" Master algorithm on asyncio, for many concurrent co-simulations in one process
+
+AsyncOrchestrator runs a scenario as Orchestrator does (same step plan, same
+results), with every FMU served by its backend through an AsyncBackendSlave:
+the commands are awaited instead of blocking, so while a backend computes, the
+event loop serves the other FMUs and scenarios. Within a step, the FMUs do
+their steps concurrently, and the gets and sets of different FMUs overlap.
+Event mode stays sequential, since the discrete states are updated from the
+sources to the sinks of the clocked connections.
+
+    steps = asyncio.run(run_scenarios([load_scenario("scenarios/incubator.toml")] * 8, limit=4))
+
+or from the command line, e.g. 16 instances of the incubator of 1000 steps:
+
+    python -m cosim.async_orchestrator scenarios/incubator.toml --instances 16 --steps 1000 --results-dir data/async
+
+The FMUs use the backend interface (the UniFMU binary is not awaitable), or the
+remote one to spread the backends of many scenarios over workers (see cosim.remote).
+Their steps are not deferred when dormant nor at their own rate, every clock
+tick is handled in event mode, the coupling is always jacobi without
+extrapolated inputs, and the FMI calls are not profiled.
+"""
+
+import argparse
+import asyncio
+import copy
+import logging
+import math
+from collections import defaultdict
+from pathlib import Path
+
+from .model_cache import default_cache_dir
+from .orchestrator import VALUE_TYPES, Orchestrator, load_scenario
+from .realtime import RealTimePacer
+from .remote import AsyncRemoteBackendSlave
+from .unifmu import AsyncBackendSlave
+
+
+logger = logging.getLogger(__name__)
+
+
+def _by_fmu(calls):
+    """ Group the Read or Write tuples of `calls` per FMU (the instance of their bound method) """
+    groups = defaultdict(list)
+    for call in calls:
+        groups[call[0].__self__].append(call)
+    return groups.values()
+
+
+class AsyncOrchestrator(Orchestrator):
+    """ Runs a co-simulation scenario in an asyncio event loop
+
+    Parameters:
+        scenario          scenario as returned by load_scenario, the interface of its FMUs is set to "backend"
+                          unless it is "remote"
+        model_cache_dir   cache of the parsed model descriptions (see cosim.model_cache), None to disable it
+
+    Usage:
+        orchestrator = AsyncOrchestrator(scenario)
+        try:
+            await orchestrator.run()
+        finally:
+            await orchestrator.aclose()
+    """
+
+    backend_class = AsyncBackendSlave
+    remote_class = AsyncRemoteBackendSlave
+
+    def __init__(self, scenario, model_cache_dir=default_cache_dir):
+        scenario = copy.deepcopy(scenario)
+        for config in scenario["fmus"].values():
+            if config["interface"] != "remote":
+                config["interface"] = "backend"
+            config["dormancy"] = {} # The FMUs step concurrently, deferring steps would not save time
+            config["step_size"] = None
+            config["tick_prediction"] = None # The ticks are handled in event mode, as by the original master
+        if scenario["simulation"].get("coupling", "jacobi") != "jacobi":
+            logger.info(f"The FMUs step concurrently with the jacobi coupling, not {scenario['simulation']['coupling']}")
+            scenario["simulation"]["coupling"] = "jacobi"
+        if scenario["simulation"].get("extrapolation"):
+            logger.info("The inputs are not extrapolated when the FMUs step concurrently")
+            scenario["simulation"]["extrapolation"] = False
+        super().__init__(scenario, model_cache_dir=model_cache_dir)
+
+    @staticmethod
+    async def _transfer_async(reads, writes, values):
+        """ As Orchestrator._transfer, the calls of each FMU in sequence and the FMUs concurrently """
+
+        async def read(group):
+            for get, vrs, slots, _ in group:
+                for slot, value in zip(slots, await get(vrs)):
+                    values[slot] = value
+
+        async def write(group):
+            for set, vrs, slots, convert, _ in group:
+                if convert is None:
+                    await set(vrs, [values[slot] for slot in slots])
+                else:
+                    await set(vrs, [convert(values[slot]) for slot in slots])
+
+        if reads:
+            await asyncio.gather(*(read(group) for group in _by_fmu(reads)))
+        if writes:
+            await asyncio.gather(*(write(group) for group in _by_fmu(writes)))
+
+    # ================= Initialization =================
+
+    async def initialize(self):
+        """ Start and instantiate the FMUs, set parameters and clocks, exchange the initial values and open the results """
+
+        simulation = self.simulation
+        start_time = simulation["start_time"]
+
+        # The backends start concurrently
+        await asyncio.gather(*(instance.fmu.instantiate(visible=False, loggingOn=False,
+                                                        eventModeUsed=instance.config["event_mode_used"],
+                                                        earlyReturnAllowed=instance.config["early_return_allowed"])
+                               for instance in self.fmus))
+        self._initialized = True
+
+        async def configure(instance):
+            fmu = instance.fmu
+            await fmu.enterInitializationMode(startTime=start_time, stopTime=simulation["end_time"])
+            for name, value in instance.config["parameters"].items():
+                variable = instance.variable(name)
+                await getattr(fmu, f"set{variable.type}")([variable.vr], [VALUE_TYPES[variable.type](value)])
+            for name, interval in instance.config["clocks"].items():
+                await fmu.setIntervalDecimal([instance.variable(name).vr], [float(interval)])
+            if instance.periodic_clocks:
+                intervals, _ = await fmu.getIntervalDecimal(instance.periodic_clocks)
+                return intervals
+            return []
+
+        intervals = await asyncio.gather(*(configure(instance) for instance in self.fmus))
+
+        # Periodic input clocks: [fmu index, clock vr, interval, ticks so far]
+        self._schedule = []
+        for i, instance in enumerate(self.fmus):
+            for vr, interval in zip(instance.periodic_clocks, intervals[i]):
+                logger.info(f"{instance.name}: periodic clock {vr} with interval {interval}")
+                self._schedule.append([i, vr, interval, 0])
+
+        await self._transfer_async(self._initial_reads, self._initial_writes, self.values)
+
+        async def exit_initialization(instance):
+            await instance.fmu.exitInitializationMode()
+            if instance.config["event_mode_used"] and instance.event_mode:
+                await instance.fmu.enterStepMode()
+
+        await asyncio.gather(*(exit_initialization(instance) for instance in self.fmus))
+
+        self.results = self._result_writer()
+        self.time = start_time
+        self.steps = 0
+
+    # ================= Simulation loop =================
+
+    async def _event_mode(self, due, event_fmus):
+        """ As Orchestrator._event_mode, awaiting each call """
+
+        affected = set(due) | event_fmus
+        active = defaultdict(list, {i: list(vrs) for i, vrs in due.items()})
+        entered = []
+        terminate = False
+        values = self.values
+        fmus = self.fmus
+
+        for i in self._event_order:
+            if i not in affected:
+                continue
+            instance = fmus[i]
+            fmu = instance.fmu
+            if i not in entered:
+                await fmu.enterEventMode()
+                entered.append(i)
+            if active[i]:
+                await fmu.setClock(active[i], [True] * len(active[i]))
+            if instance.output_clocks:
+                for vr, ticking in zip(instance.output_clocks, await fmu.getClock(instance.output_clocks)):
+                    if ticking:
+                        active[i].append(vr)
+
+            discrete_states_need_update = True
+            while discrete_states_need_update:
+                discrete_states_need_update, terminate_simulation, *_ = await fmu.updateDiscreteStates()
+                terminate = terminate or terminate_simulation
+
+            plans = self._clock_plans.get(i, {})
+            for vr in active[i]:
+                plan = plans.get(vr)
+                if plan is None:
+                    continue
+                if plan.slot is not None:
+                    values[plan.slot] = True
+                for j in plan.sink_fmus:
+                    if fmus[j].event_mode and j not in entered:
+                        await fmus[j].fmu.enterEventMode()
+                        entered.append(j)
+                        affected.add(j)
+                await self._transfer_async(plan.reads, plan.writes, values)
+                for j, sink_vr in plan.clock_sinks:
+                    active[j].append(sink_vr)
+
+        await asyncio.gather(*(fmus[i].fmu.enterStepMode() for i in entered))
+        return terminate
+
+    async def run(self):
+        """ Run the scenario from the start to the end time, return the number of steps """
+
+        if not self._initialized:
+            await self.initialize()
+
+        simulation = self.simulation
+        start_time = simulation["start_time"]
+        step_size = simulation["step_size"]
+        n_steps = math.ceil((simulation["end_time"] - start_time) / step_size - 1e-9)
+        tolerance = step_size * 1e-9
+        values = self.values
+        timed_reads, timed_writes = self._timed_reads, self._timed_writes
+        transfer = self._transfer_async
+        record, write_row = self._record, self.results.write_row
+        fused_steps = self._fused_steps
+        clock_slots = self._clock_slots
+
+        async def do_step(i, instance, time, fused_inputs):
+            fused = fused_steps.get(i)
+            if fused is None:
+                event_handling_needed, terminate_simulation, _, _ = await instance.fmu.doStep(time, step_size)
+            else:
+                event_handling_needed, terminate_simulation, _, _, outputs = await instance.fmu.fusedDoStep(
+                    time, step_size, True, fused_inputs[i], fused.outputs)
+                for slots, output_values in zip(fused.output_slots, outputs):
+                    for slot, value in zip(slots, output_values):
+                        values[slot] = value
+            event_slot = self._event_slots.get(instance.name)
+            if event_slot is not None:
+                values[event_slot] = event_handling_needed
+            return event_handling_needed and instance.event_mode, terminate_simulation
+
+        if simulation["real_time"]:
+            self.pacer = RealTimePacer(step_size, policy=simulation["overrun_policy"])
+            self.pacer.start()
+
+        logger.info(f"Co-simulation of {', '.join(i.name for i in self.fmus)} for {n_steps} steps of {step_size} s, "
+                    f"real-time {simulation['real_time']}")
+
+        terminate = False
+        while self.steps < n_steps and not terminate:
+            time = self.time
+            next_time = start_time + (self.steps + 1) * step_size
+
+            await transfer((), timed_writes, values)
+            fused_inputs = {i: [(type_name, vrs, [values[slot] for slot in slots] if convert is None else
+                                 [convert(values[slot]) for slot in slots])
+                                for type_name, vrs, slots, convert in fused.inputs]
+                            for i, fused in fused_steps.items()}
+
+            # The FMUs step concurrently, from the same inputs as in Orchestrator.run
+            outcomes = await asyncio.gather(*(do_step(i, instance, time, fused_inputs)
+                                              for i, instance in enumerate(self.fmus)))
+            event_fmus = {i for i, (event, _) in enumerate(outcomes) if event}
+            terminate = any(terminate_simulation for _, terminate_simulation in outcomes)
+
+            for slot in clock_slots:
+                values[slot] = False
+            due = self._due_clocks(next_time, tolerance) if self._schedule else {}
+            if due or event_fmus:
+                terminate = await self._event_mode(due, event_fmus) or terminate
+
+            await transfer(timed_reads, (), values)
+
+            write_row(time, *record(values))
+            self.steps += 1
+            self.time = next_time
+            if self.pacer is not None:
+                await self.pacer.wait_async()
+
+        if self.pacer is not None:
+            logger.info(f"Real-time pacing: {self.pacer.statistics.summary()}")
+        if terminate:
+            logger.info(f"An FMU terminated the simulation at t = {self.time}")
+        return self.steps
+
+    async def aclose(self):
+        """ Terminate and free the FMUs, close the results and remove the extracted FMUs """
+
+        async def free(instance):
+            try:
+                if self._initialized:
+                    await instance.fmu.terminate()
+                await instance.fmu.freeInstance()
+            except Exception as e:
+                logger.warning(f"Failed to free FMU '{instance.name}': {e}")
+                instance.fmu.connection.kill()
+            finally:
+                instance.remove_extracted()
+                instance.remove_store()
+
+        await asyncio.gather(*(free(instance) for instance in self.fmus))
+        self.fmus = []
+        self._initialized = False
+        if self.results is not None:
+            self.results.close()
+            self.results = None
+
+    def close(self):
+        """ Stop the backends without the event loop (e.g. when the scenario fails to compile), prefer aclose() """
+
+        for instance in self.fmus:
+            instance.fmu.connection.kill()
+            instance.remove_extracted()
+            instance.remove_store()
+        self.fmus = []
+        self._initialized = False
+        if self.results is not None:
+            self.results.close()
+            self.results = None
+
+
+async def run_scenario(scenario, model_cache_dir=default_cache_dir):
+    """ Run one scenario with an AsyncOrchestrator and return the number of steps """
+
+    orchestrator = AsyncOrchestrator(scenario, model_cache_dir)
+    try:
+        return await orchestrator.run()
+    finally:
+        await orchestrator.aclose()
+
+
+async def run_scenarios(scenarios, limit=None, model_cache_dir=default_cache_dir):
+    """ Run the scenarios concurrently, at most `limit` at a time (all of them if None)
+
+    Returns:
+        the number of steps of each scenario, or the exception it raised
+    """
+
+    semaphore = asyncio.Semaphore(limit or max(len(scenarios), 1))
+
+    async def run(scenario):
+        async with semaphore:
+            return await run_scenario(scenario, model_cache_dir)
+
+    return await asyncio.gather(*(run(scenario) for scenario in scenarios), return_exceptions=True)
+
+
+def instance_scenarios(scenario, instances, results_dir=None):
+    """ Return `instances` copies of `scenario`, each writing its results to a file of its own
+
+    The results of copy k go to <results_dir>/<results file stem>_<k><suffix> (the folder of the
+    scenario's results file if `results_dir` is None), and its shared variable stores are suffixed with _<k>.
+    """
+
+    results_file = Path(scenario["results"]["file"])
+    folder = Path(results_dir) if results_dir is not None else results_file.parent
+    scenarios = []
+    for k in range(instances):
+        copy_k = copy.deepcopy(scenario)
+        copy_k["results"]["file"] = str(folder / f"{results_file.stem}_{k}{results_file.suffix}")
+        copy_k["results"]["csv_export"] = None
+        for config in copy_k["fmus"].values():
+            if config["variable_store"] not in (None, "private"):
+                config["variable_store"] = f"{config['variable_store']}_{k}"
+        scenarios.append(copy_k)
+    return scenarios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run instances of a co-simulation scenario concurrently with asyncio.")
+    parser.add_argument("scenario", type=str, help="Scenario file")
+    parser.add_argument("--instances", type=int, default=1, help="Number of instances of the scenario")
+    parser.add_argument("--limit", type=int, help="Maximum number of instances running at a time (all by default)")
+    parser.add_argument("--steps", type=int, help="Number of co-simulation steps (overrides the end time)")
+    parser.add_argument("--results-dir", type=str, help="Folder of the results files (that of the scenario by default)")
+    parser.add_argument("--log-level", type=str, default="INFO", help="Logging level")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level)
+
+    scenario = load_scenario(args.scenario)
+    simulation = scenario["simulation"]
+    if args.steps is not None:
+        simulation["end_time"] = simulation["start_time"] + args.steps * simulation["step_size"]
+    if args.results_dir is not None:
+        Path(args.results_dir).mkdir(parents=True, exist_ok=True)
+
+    scenarios = instance_scenarios(scenario, args.instances, args.results_dir)
+    outcomes = asyncio.run(run_scenarios(scenarios, args.limit))
+    failed = 0
+    for scenario_k, outcome in zip(scenarios, outcomes):
+        if isinstance(outcome, BaseException):
+            failed += 1
+            logger.error(f"{scenario_k['results']['file']}: {outcome!r}")
+        else:
+            logger.info(f"{scenario_k['results']['file']}: {outcome} steps")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
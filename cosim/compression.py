@@ -0,0 +1,218 @@
+""" Lossless compression of result columns, the .xor result format
+
+Consecutive samples of a smooth series share their sign, exponent and upper
+mantissa bits. As in Gorilla (Pelkonen et al., VLDB 2015), each value is XORed
+with the one before, which leaves mostly zero upper bits, or replaced by the
+delta-of-delta of the bit patterns, which is zero over regular steps such as
+the simulation time (whichever is smaller, per column and block). Gorilla then
+writes a bit code per value, which is decoded one value at a time; here the
+encoded words are split into byte planes (all their lowest bytes, then all
+their second bytes, ...) compressed with zlib, where the zero upper bytes make
+long runs. Encoding and decoding are a few NumPy operations per column and
+block, and the values are restored bit for bit, NaNs included. Booleans are
+packed as bits, strings joined as text.
+
+A file holds its schema, then a block per flush of the ResultWriter, each
+encoded independently of the others, so a crash only loses the rows since the
+last block:
+
+    XORTS1\\n  <uint32 size><schema JSON>
+    per block: <uint32 rows>, per column <uint8 codec><uint32 size><data>
+
+    writer = XorWriter("results.xor", [("sim_time", "float64", None), ...])
+    writer.write_block([times, ...])
+    writer.close()
+    fields, columns, rows = read_xor("results.xor", ["sim_time"])
+"""
+
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+
+MAGIC = b"XORTS1\n"
+
+_SIZE = struct.Struct("<I")
+_COLUMN = struct.Struct("<BI")
+
+# Codecs of a column in a block
+EMPTY = 0  # A null column, whose values are in the change log
+XOR = 1
+DELTA_OF_DELTA = 2
+BITS = 3
+TEXT = 4
+
+_UNSIGNED = {1: np.uint8, 2: np.uint16, 4: np.uint32, 8: np.uint64}
+
+
+def _planes(words):
+    """ The bytes of the words, plane by plane """
+    return np.ascontiguousarray(words.view(np.uint8).reshape(len(words), words.itemsize).T).tobytes()
+
+
+def _words(data, n, unsigned):
+    """ The words of `n` values from their byte planes """
+    planes = np.frombuffer(data, dtype=np.uint8).reshape(np.dtype(unsigned).itemsize, n)
+    return np.ascontiguousarray(planes.T).view(unsigned).ravel()
+
+
+def encode_column(values, dtype, level=6):
+    """ Return (codec, data) of the values of a column, of type `dtype` ('null' for an empty column) """
+
+    if dtype == "null":
+        return EMPTY, b""
+    if dtype == "bool":
+        return BITS, zlib.compress(np.packbits(np.asarray(values, dtype=bool)).tobytes(), level)
+    if dtype == "string":
+        return TEXT, zlib.compress("\0".join(values).encode(), level)
+
+    values = np.asarray(values, dtype=dtype)
+    words = values.view(_UNSIGNED[values.itemsize])
+    xor = words.copy()
+    xor[1:] ^= words[:-1]
+    delta = np.diff(words, prepend=words.dtype.type(0))
+    delta_of_delta = np.diff(delta, prepend=words.dtype.type(0))
+    return min(((XOR, zlib.compress(_planes(xor), level)),
+                (DELTA_OF_DELTA, zlib.compress(_planes(delta_of_delta), level))), key=lambda encoded: len(encoded[1]))
+
+
+def decode_column(codec, data, n, dtype):
+    """ The `n` values of a column of type `dtype` from (codec, data) returned by encode_column """
+
+    if codec == EMPTY:
+        return np.full(n, None, dtype=object)
+    data = zlib.decompress(data)
+    if codec == BITS:
+        return np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=n).astype(bool)
+    if codec == TEXT:
+        return np.array(data.decode().split("\0") if n else [], dtype=object)
+
+    unsigned = _UNSIGNED[np.dtype(dtype).itemsize]
+    words = _words(data, n, unsigned)
+    if codec == XOR:
+        words = np.bitwise_xor.accumulate(words)
+    elif codec == DELTA_OF_DELTA:
+        # Unsigned sums wrap around as the differences did
+        words = np.cumsum(np.cumsum(words, dtype=unsigned), dtype=unsigned)
+    else:
+        raise ValueError(f"Unknown codec {codec}")
+    return words.view(dtype)
+
+
+class XorWriter:
+    """ Writer of .xor result files, a block per call to write_block
+
+    Parameters:
+        path     output file
+        fields   list of (column name, type, type of its change log or None) tuples, the type of a column stored
+                 in a change log is 'null'
+        level    zlib compression level
+    """
+
+    def __init__(self, path, fields, level=6):
+        self.fields = [tuple(field) for field in fields]
+        self.level = level
+        self._file = open(path, "wb")
+        schema = json.dumps([{"name": name, "type": dtype, "changes": changes}
+                             for name, dtype, changes in self.fields]).encode()
+        self._file.write(MAGIC + _SIZE.pack(len(schema)) + schema)
+
+    def write_block(self, columns):
+        """ Encode and write one block, with a sequence of values per field (ignored for the null ones) """
+
+        n = next((len(values) for values, (_, dtype, _) in zip(columns, self.fields) if dtype != "null"), 0)
+        parts = [_SIZE.pack(n)]
+        for values, (_, dtype, _) in zip(columns, self.fields):
+            codec, data = encode_column(values, dtype, self.level)
+            parts += [_COLUMN.pack(codec, len(data)), data]
+        self._file.write(b"".join(parts))
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _read_schema(data, path):
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a .xor result file")
+    offset = len(MAGIC)
+    (size,) = _SIZE.unpack_from(data, offset)
+    offset += _SIZE.size
+    fields = [(field["name"], field["type"], field["changes"]) for field in json.loads(data[offset:offset + size])]
+    return fields, offset + size
+
+
+def read_xor_schema(path):
+    """ The (name, type, change log type) fields of a .xor result file """
+
+    with open(path, "rb") as f:
+        head = f.read(len(MAGIC) + _SIZE.size)
+        (size,) = _SIZE.unpack_from(head, len(MAGIC)) if len(head) == len(MAGIC) + _SIZE.size else (0,)
+        return _read_schema(head + f.read(size), path)[0]
+
+
+def iter_xor(path, columns=None):
+    """ Yield (rows, {name: NumPy array}) for each block of a .xor result file, with the selected columns
+
+    Blocks are read one at a time and the other columns are skipped without reading them.
+    """
+
+    fields = read_xor_schema(path)
+    names = [name for name, _, _ in fields]
+    selected = names if columns is None else list(columns)
+    for name in selected:
+        if name not in names:
+            raise KeyError(f"Column '{name}' not found in {path}")
+    wanted = {names.index(name): name for name in selected}
+
+    with open(path, "rb") as f:
+        end = os.fstat(f.fileno()).st_size
+        f.seek(len(MAGIC))
+        (size,) = _SIZE.unpack(f.read(_SIZE.size))
+        offset = len(MAGIC) + _SIZE.size + size
+        while offset + _SIZE.size <= end:
+            f.seek(offset)
+            (n,) = _SIZE.unpack(f.read(_SIZE.size))
+            offset += _SIZE.size
+            decoded = {}
+            for i, (_, dtype, _) in enumerate(fields):
+                if offset + _COLUMN.size > end:
+                    return # A block cut short by a crash
+                f.seek(offset)
+                codec, size = _COLUMN.unpack(f.read(_COLUMN.size))
+                offset += _COLUMN.size
+                if offset + size > end:
+                    return
+                if i in wanted:
+                    decoded[wanted[i]] = decode_column(codec, f.read(size), n, dtype)
+                offset += size
+            yield n, {name: decoded[name] for name in selected}
+
+
+def read_xor(path, columns=None):
+    """ Decode the selected columns of a .xor result file, the others are skipped without decompressing them
+
+    Returns:
+        (fields, {name: NumPy array}, number of rows), the columns in the order of `columns` (all if None)
+    """
+
+    fields = read_xor_schema(path)
+    types = {name: dtype for name, dtype, _ in fields}
+    selected = list(types) if columns is None else list(columns)
+    chunks = {name: [] for name in selected}
+    rows = 0
+    for n, block in iter_xor(path, selected):
+        for name, values in block.items():
+            chunks[name].append(values)
+        rows += n
+
+    decoded = {}
+    for name in selected:
+        dtype = types[name]
+        decoded[name] = np.concatenate(chunks[name]) if chunks[name] else \
+            np.array([], dtype=object if dtype in ("null", "string") else dtype)
+    return fields, decoded, rows
@@ -0,0 +1,274 @@
+""" Level-of-detail reduction of long time series before plotting
+
+Continuous traces are reduced to a min/max envelope per bucket, so peaks stay
+visible however many samples fall on one pixel. Piecewise-constant traces
+(events, clocked outputs) are run-length compressed to the samples around
+their changes, and enveloped as well if they still have too many changes.
+Both keep the number of drawn points bounded by the bucket count. The
+changes of a ChangeSeries (columns stored as a change log, cosim.results) are
+taken from its log, without expanding it.
+
+Envelope and StepEnvelope do the same reductions on a series read chunk by
+chunk, keeping a running minimum and maximum per bucket and the samples around
+the changes, so that a file of any length is decimated in bounded memory
+(decimate_chunks, with cosim.results.iter_columns).
+"""
+
+import numpy as np
+
+
+def minmax_indices(y, n_buckets):
+    """ Indices of the minimum and maximum sample of each of `n_buckets` equal-size buckets
+
+    The first and last samples are always kept, and the indices are returned sorted.
+    """
+
+    n = len(y)
+    if n_buckets <= 0 or n <= 2 * n_buckets:
+        return np.arange(n)
+
+    bucket_size = n // n_buckets
+    n_full = bucket_size * n_buckets
+    buckets = np.asarray(y[:n_full]).reshape(n_buckets, bucket_size)
+    offsets = np.arange(n_buckets) * bucket_size
+
+    indices = [
+        [0, n - 1],
+        offsets + buckets.argmin(axis=1),
+        offsets + buckets.argmax(axis=1),
+    ]
+    if n_full < n:
+        tail = np.asarray(y[n_full:])
+        indices.append([n_full + tail.argmin(), n_full + tail.argmax()])
+
+    return np.unique(np.concatenate(indices))
+
+
+def change_indices(y):
+    """ Indices of the samples just before and just after each change of a piecewise-constant series
+
+    Drawing only these samples, as a line or with plt.step, gives the same
+    figure as drawing every sample.
+    """
+
+    n = len(y)
+    if n == 0:
+        return np.arange(0)
+
+    if hasattr(y, "rows"):
+        changes = y.rows[1:] - 1 # A ChangeSeries
+    else:
+        y = np.asarray(y)
+        changes = np.flatnonzero(y[1:] != y[:-1])
+    return np.unique(np.concatenate([[0, n - 1], changes, changes + 1]))
+
+
+def decimate(x, y, n_buckets):
+    """ Min/max envelope of a continuous series, returns the reduced (x, y) """
+
+    indices = minmax_indices(y, n_buckets)
+    return x[indices], y[indices]
+
+
+def decimate_steps(x, y, n_buckets):
+    """ Run-length compression of a piecewise-constant series, returns the reduced (x, y)
+
+    If more than 2 * `n_buckets` samples remain after the compression, the
+    remaining samples are reduced with a min/max envelope, so short pulses
+    such as clock events are kept.
+    """
+
+    if not hasattr(y, "rows"):
+        y = np.asarray(y)
+    indices = change_indices(y)
+    if n_buckets > 0 and len(indices) > 2 * n_buckets:
+        indices = indices[minmax_indices(y[indices], n_buckets)]
+    return x[indices], y[indices]
+
+
+def _bucket_of(rows, n, n_buckets):
+    """ Bucket of each row as in minmax_indices, the rows after the full buckets are in bucket `n_buckets` """
+    return np.minimum(rows // (n // n_buckets), n_buckets)
+
+
+def _segment_extremes(y, starts):
+    """ Positions of the first minimum and of the first maximum of each segment of `y` beginning at `starts` """
+
+    lengths = np.diff(np.append(starts, len(y)))
+    positions = np.arange(len(y))
+    extremes = []
+    for reduce in (np.minimum, np.maximum):
+        extreme = np.repeat(reduce.reduceat(y, starts), lengths)
+        hit = y == extreme
+        if y.dtype.kind == "f":
+            hit |= np.isnan(y) & np.isnan(extreme) # argmin and argmax stop at the first NaN
+        extremes.append(np.minimum.reduceat(np.where(hit, positions, len(y)), starts))
+    return extremes
+
+
+class Envelope:
+    """ Min/max envelope of a continuous series read in chunks, the (x, y) of decimate() on the whole series
+
+    Parameters:
+        n           number of samples of the series
+        n_buckets   number of buckets, 0 keeps every sample
+    """
+
+    def __init__(self, n, n_buckets):
+        self.n = n
+        self.n_buckets = n_buckets
+        self.keep_all = n_buckets <= 0 or n <= 2 * n_buckets
+        self._chunks = []
+        self._ends = [] # (row, x, y) of the first and last samples
+        self._buckets = None
+
+    def update(self, offset, x, y):
+        """ Add the samples `offset` to `offset + len(y)` of the series """
+
+        x, y = np.asarray(x), np.asarray(y)
+        if len(y) == 0:
+            return
+        if self.keep_all:
+            self._chunks.append((x.copy(), y.copy()))
+            return
+
+        if offset == 0:
+            self._ends.append((0, x[0], y[0]))
+        if offset + len(y) == self.n:
+            self._ends.append((self.n - 1, x[-1], y[-1]))
+
+        if self._buckets is None:
+            size = self.n_buckets + 1
+            self._buckets = [(np.full(size, -1), np.empty(size, dtype=x.dtype), np.empty(size, dtype=y.dtype))
+                             for _ in range(2)]
+        buckets = _bucket_of(offset + np.arange(len(y)), self.n, self.n_buckets)
+        starts = np.flatnonzero(np.append(True, buckets[1:] != buckets[:-1]))
+        bucket = buckets[starts]
+        for (rows, xs, ys), positions, better in zip(self._buckets, _segment_extremes(y, starts),
+                                                     (np.less, np.greater)):
+            # A bucket spanning chunks keeps its first extreme
+            new, old = y[positions], ys[bucket]
+            replace = (rows[bucket] < 0) | better(new, old)
+            if y.dtype.kind == "f":
+                replace |= np.isnan(new) & ~np.isnan(old)
+            selected = bucket[replace]
+            rows[selected] = offset + positions[replace]
+            xs[selected] = x[positions[replace]]
+            ys[selected] = new[replace]
+
+    def result(self):
+        """ The reduced (x, y) """
+
+        if self.keep_all:
+            if not self._chunks:
+                return np.array([]), np.array([])
+            return tuple(np.concatenate(c) for c in zip(*self._chunks))
+        rows, xs, ys = [], [], []
+        for row, x, y in self._ends:
+            rows.append([row])
+            xs.append([x])
+            ys.append([y])
+        for bucket_rows, x, y in self._buckets:
+            filled = bucket_rows >= 0
+            rows.append(bucket_rows[filled])
+            xs.append(x[filled])
+            ys.append(y[filled])
+        _, first = np.unique(np.concatenate(rows), return_index=True)
+        return np.concatenate(xs)[first], np.concatenate(ys)[first]
+
+
+class StepEnvelope:
+    """ Run-length compression of a piecewise-constant series read in chunks, the (x, y) of decimate_steps()
+
+    The samples around the changes are kept until they exceed `limit`; the
+    buckets with more than four of them are then reduced to their first, last,
+    minimum and maximum samples, which keeps the memory bounded while the
+    pulses stay visible.
+
+    Parameters:
+        n           number of samples of the series
+        n_buckets   number of buckets, 0 keeps every change
+        limit       number of kept samples above which they are reduced, 8 * n_buckets (at least 1024) by default
+    """
+
+    def __init__(self, n, n_buckets, limit=None):
+        self.n = n
+        self.n_buckets = n_buckets
+        self.limit = limit or max(8 * n_buckets, 1024)
+        self._samples = [] # (rows, x, y) chunks, in increasing rows
+        self._count = 0
+        self._previous = None # (row, x, y) of the last sample of the previous chunk
+
+    def update(self, offset, x, y):
+        """ Add the samples `offset` to `offset + len(y)` of the series """
+
+        x, y = np.asarray(x), np.asarray(y)
+        if len(y) == 0:
+            return
+        changes = np.flatnonzero(y[1:] != y[:-1])
+        positions = [changes, changes + 1]
+        if offset == 0:
+            positions.append([0])
+        if offset + len(y) == self.n:
+            positions.append([len(y) - 1])
+        if self._previous is not None and y[0] != self._previous[2]:
+            row, previous_x, previous_y = self._previous
+            self._append(np.array([row]), np.array([previous_x]), np.array([previous_y]))
+            positions.append([0])
+        positions = np.unique(np.concatenate(positions)).astype(np.int64)
+        self._append(offset + positions, x[positions], y[positions])
+        self._previous = (offset + len(y) - 1, x[-1], y[-1])
+
+    def _append(self, rows, x, y):
+        self._samples.append((rows, x.copy(), y.copy()))
+        self._count += len(rows)
+        if self.n_buckets > 0 and self._count > self.limit:
+            self._reduce()
+
+    def _collected(self):
+        rows, x, y = (np.concatenate(c) for c in zip(*self._samples))
+        rows, first = np.unique(rows, return_index=True)
+        return rows, x[first], y[first]
+
+    def _reduce(self):
+        rows, x, y = self._collected()
+        buckets = _bucket_of(rows, self.n, self.n_buckets)
+        starts = np.flatnonzero(np.append(True, buckets[1:] != buckets[:-1]))
+        ends = np.append(starts[1:], len(rows)) - 1
+        kept = np.unique(np.concatenate([starts, ends, *_segment_extremes(y, starts)]))
+        self._samples = [(rows[kept], x[kept], y[kept])]
+        self._count = len(kept)
+
+    def result(self):
+        """ The reduced (x, y) """
+
+        if not self._samples:
+            return np.array([]), np.array([])
+        _, x, y = self._collected()
+        if self.n_buckets > 0 and len(y) > 2 * self.n_buckets:
+            kept = minmax_indices(y, self.n_buckets)
+            return x[kept], y[kept]
+        return x, y
+
+
+def decimate_chunks(chunks, n, x, continuous=(), steps=(), n_buckets=2000):
+    """ Decimate columns read chunk by chunk, in memory bounded by the bucket count
+
+    Parameters:
+        chunks       iterable of (first row, {column name: values}), e.g. cosim.results.iter_columns
+        n            total number of rows
+        x            name of the column of the x values
+        continuous   names of the columns reduced as by decimate()
+        steps        names of the columns reduced as by decimate_steps()
+        n_buckets    number of buckets, 0 keeps every sample
+
+    Returns:
+        a dict mapping each column name to its reduced (x, y)
+    """
+
+    reducers = {**{name: Envelope(n, n_buckets) for name in continuous},
+                **{name: StepEnvelope(n, n_buckets) for name in steps}}
+    for offset, chunk in chunks:
+        for name, reducer in reducers.items():
+            reducer.update(offset, chunk[x], chunk[name])
+    return {name: reducer.result() for name, reducer in reducers.items()}
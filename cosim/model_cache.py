@@ -0,0 +1,139 @@
+""" On-disk cache of parsed model descriptions
+
+Parsing modelDescription.xml with fmpy takes milliseconds per FMU and is
+repeated by every run of a sweep for identical files. The information the
+master algorithm needs (variables with their types, causality, variability and
+clocks, and the model structure) is stored once in a pickle file named after
+the SHA-256 of the FMU's modelDescription.xml, so later runs only hash the
+XML and unpickle a few tuples.
+
+The cache lives in $COSIM_CACHE_DIR or ~/.cache/cosim/model_descriptions.
+
+    python -m cosim.model_cache plant.fmu controller.fmu   # parse (or load) and summarize
+    python -m cosim.model_cache --clear                    # empty the cache
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+import tempfile
+import zipfile
+from collections import namedtuple
+from pathlib import Path
+
+
+# Bumped whenever ModelInfo or VariableInfo change, older cache files are then ignored
+CACHE_FORMAT = 3
+
+# `outputs` and `initial_unknowns` are tuples of (value reference, value references of the dependencies)
+ModelInfo = namedtuple("ModelInfo", "fmi_version guid model_identifier has_event_mode can_handle_variable_step "
+                                    "max_output_derivative_order variables outputs initial_unknowns")
+
+# `clocks` holds the value references of the variable's clocks, `start` the start value as written in the XML
+VariableInfo = namedtuple("VariableInfo", "name vr type causality variability clocks interval_variability start")
+
+
+def default_cache_dir():
+    if "COSIM_CACHE_DIR" in os.environ:
+        return Path(os.environ["COSIM_CACHE_DIR"])
+    return Path.home() / ".cache" / "cosim" / "model_descriptions"
+
+
+def fmu_hash(path):
+    """ SHA-256 of the modelDescription.xml of an .fmu file or FMU folder
+
+    Only the model description is hashed, so large binaries in the FMU do not
+    slow down the lookup and rebuilding an FMU with the same interface reuses
+    its entry.
+    """
+
+    path = Path(path)
+    if path.is_dir():
+        content = (path / "modelDescription.xml").read_bytes()
+    else:
+        with zipfile.ZipFile(path) as archive:
+            content = archive.read("modelDescription.xml")
+    return hashlib.sha256(content).hexdigest()
+
+
+def parse_model_info(path):
+    """ Parse the model description of an .fmu file or FMU folder with fmpy """
+
+    from fmpy import read_model_description
+
+    md = read_model_description(str(path))
+
+    def references(variables):
+        return tuple(v.valueReference for v in variables or ())
+
+    variables = tuple(
+        VariableInfo(v.name, v.valueReference, v.type, v.causality, v.variability, references(v.clocks),
+                     getattr(v, "intervalVariability", None), v.start)
+        for v in md.modelVariables
+    )
+    outputs = tuple((u.variable.valueReference, references(u.dependencies)) for u in md.outputs)
+    initial_unknowns = tuple((u.variable.valueReference, references(u.dependencies)) for u in md.initialUnknowns)
+    return ModelInfo(md.fmiVersion, md.guid, md.coSimulation.modelIdentifier, bool(md.coSimulation.hasEventMode),
+                     bool(md.coSimulation.canHandleVariableCommunicationStepSize),
+                     int(md.coSimulation.maxOutputDerivativeOrder or 0), variables, outputs, initial_unknowns)
+
+
+def load_model_info(path, cache_dir=default_cache_dir):
+    """ Return the ModelInfo of an .fmu file or FMU folder, from the cache when possible
+
+    Parameters:
+        path        .fmu file or FMU folder
+        cache_dir   cache folder, a callable returning it, or None to always parse
+    """
+
+    if cache_dir is None:
+        return parse_model_info(path)
+    cache_dir = Path(cache_dir() if callable(cache_dir) else cache_dir)
+    cache_file = cache_dir / f"{fmu_hash(path)}.v{CACHE_FORMAT}.pickle"
+
+    try:
+        with open(cache_file, "rb") as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+        pass # Missing, truncated or stale entry
+
+    info = parse_model_info(path)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Written to a temporary file first, so concurrent runs never read a partial entry
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    except OSError:
+        return info # Read-only cache folder, the description is parsed every time
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(info, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_file)
+    except OSError:
+        Path(tmp).unlink(missing_ok=True)
+    return info
+
+
+def clear_cache(cache_dir=None):
+    """ Remove the cached model descriptions, return the number of files removed """
+
+    cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    removed = 0
+    for entry in cache_dir.glob("*.pickle"):
+        entry.unlink()
+        removed += 1
+    return removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cache the parsed model descriptions of FMUs.")
+    parser.add_argument("fmus", nargs="*", help=".fmu files or FMU folders")
+    parser.add_argument("--clear", action="store_true", help="Empty the cache")
+    args = parser.parse_args()
+
+    if args.clear:
+        print(f"Removed {clear_cache()} cached model description(s) from {default_cache_dir()}")
+    for fmu in args.fmus:
+        info = load_model_info(fmu)
+        print(f"{fmu}: {info.model_identifier} {info.guid}, {len(info.variables)} variables, "
+              f"{sum(v.type == 'Clock' for v in info.variables)} clocks")
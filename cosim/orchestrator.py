@@ -0,0 +1,1336 @@
+""" Data-driven master algorithm for FMI3 co-simulation scenarios
+
+The FMUs, their parameters and clocks, the connections between them and the
+recorded columns are read from a scenario file (TOML, see
+scenarios/incubator.toml). Getters and setters are inferred from the variable
+types in modelDescription.xml, and the connections are compiled once into a
+step plan of batched get/set calls:
+
+    timed connections     outputs without clocks, exchanged at every communication point
+    clocked connections   outputs of a clock (and clocks themselves), exchanged in event mode
+                          when the clock of the output ticks
+
+Each step, the inputs are set, every FMU does a step, and if an FMU asks for
+event handling or a periodic clock is due, the FMUs with clocks that are
+involved go through event mode. Their discrete states are updated in the
+order of the clocked connections, so a clocked output is propagated to its
+sinks right after its source has been updated. Periodic input clocks tick on
+the simulation time grid (every interval, starting at the start time).
+
+The `coupling` of the scenario selects the inputs of the timed connections:
+
+    jacobi         every FMU steps with the outputs of the previous communication point (the default)
+    gauss_seidel   the FMUs step from the sources to the sinks of the timed connections, each with the
+                   outputs of the FMUs that have already stepped
+    iterative      the FMUs whose inputs changed during the step are restored to their state before it and step
+                   again with the new outputs, until the inputs change by less than `coupling_tolerance`
+                   (at most `max_iterations` times)
+
+An FMU with its own `step_size` (a multiple of the simulation step size, or
+"clock" for the interval of its periodic clocks) steps only at the multiples of
+it, with the inputs of the last communication point, and its outputs are held
+in between. Before event mode, the FMUs with clocks are brought to the time of
+the event with a shorter step, which needs canHandleVariableCommunicationStepSize.
+
+With `extrapolation`, the Float inputs of the timed connections whose source FMU
+provides output derivatives (maxOutputDerivativeOrder) are extrapolated to the
+end of the step, value + derivative * step size, instead of being held at their
+value of the communication point. The sinks then act at the end of the step on
+an estimate of the output there, which reduces the coupling error of larger steps.
+
+An FMU with periodic clocks can name in `tick_prediction` a Boolean output
+that is false when the next tick of its periodic clocks would not change its
+state (the controller's tick_changes_state). A due tick of that FMU is then not
+handled in event mode when nothing else involves the FMU, and only recorded.
+
+    orchestrator = Orchestrator(load_scenario("scenarios/incubator.toml"))
+    try:
+        orchestrator.run()
+    finally:
+        orchestrator.close()
+"""
+
+import logging
+import math
+import shutil
+from collections import defaultdict, namedtuple
+from operator import itemgetter
+from pathlib import Path
+
+from .model_cache import default_cache_dir, load_model_info
+from .profiling import CallProfiler
+from .realtime import OVERRUN_POLICIES, RealTimePacer
+from .results import CHANGE_TYPES, ResultWriter
+
+try:
+    import tomllib
+except ImportError: # Python < 3.11
+    tomllib = None
+
+
+logger = logging.getLogger(__name__)
+
+# Types of the result columns per FMI type
+COLUMN_TYPES = {
+    "Float32": "float32", "Float64": "float64",
+    "Int8": "int8", "UInt8": "uint8", "Int16": "int16", "UInt16": "uint16",
+    "Int32": "int32", "UInt32": "uint32", "Int64": "int64", "UInt64": "uint64",
+    "Boolean": "bool", "Clock": "bool", "String": "string",
+}
+
+# Python type of the values of each FMI type, used when a connection joins two different types
+VALUE_TYPES = {
+    "Float32": float, "Float64": float,
+    "Int8": int, "UInt8": int, "Int16": int, "UInt16": int, "Int32": int, "UInt32": int, "Int64": int, "UInt64": int,
+    "Boolean": bool, "Clock": bool, "String": str,
+}
+
+# Interval variabilities of clocks that tick periodically
+PERIODIC_CLOCKS = ("constant", "fixed", "tunable", "changing")
+
+INTERFACES = ("auto", "fmpy", "backend", "remote")
+
+# Coupling of the timed connections: inputs from the previous communication point, from the sources that have
+# already stepped (sources before sinks), or iterated from the FMU states saved before the step until they converge
+COUPLINGS = ("jacobi", "gauss_seidel", "iterative")
+
+SIMULATION_DEFAULTS = {
+    "start_time": 0.0,
+    "end_time": 10.0,
+    "step_size": 0.5,
+    "real_time": False,
+    "overrun_policy": "catch_up",
+    "event_location": False,
+    "event_tolerance": 1e-3,
+    "coupling": "jacobi",
+    "coupling_tolerance": 1e-6,
+    "max_iterations": 10,
+    "extrapolation": False,
+}
+
+RESULTS_DEFAULTS = {
+    "file": "data/simulation_data.arrow",
+    "flush_every": 1000,
+    "csv_export": None,
+    "changes_only": False,
+    "columns": [],
+}
+
+# Broker of the workers running the backends of the "remote" FMUs, and address of the master as they reach it
+REMOTE_DEFAULTS = {
+    "broker": "tcp://127.0.0.1:5555",
+    "host": "127.0.0.1",
+}
+
+FMU_DEFAULTS = {
+    "interface": "auto",
+    "worker": None,
+    "fused_step": True,
+    "fused_outputs": False,
+    "event_mode_used": False,
+    "early_return_allowed": False,
+    "dormancy": {},
+    "tick_prediction": None,
+    "step_size": None,
+    "variable_store": None,
+    "parameters": {},
+    "clocks": {},
+}
+
+
+class ScenarioError(Exception):
+    """ Raised for an invalid scenario """
+
+
+def _converged(value, previous, tolerance):
+    """ True if a value of a coupling iteration is within the tolerance of its previous value (relative above 1) """
+    if isinstance(value, float):
+        return abs(value - previous) <= tolerance * max(1.0, abs(previous))
+    return value == previous
+
+
+def load_scenario(path):
+    """ Read a scenario file and fill in the defaults
+
+    Returns:
+        a dict with the 'simulation', 'results', 'remote', 'fmus' and 'connections' tables
+    """
+
+    if tomllib is not None:
+        with open(path, "rb") as f:
+            scenario = tomllib.load(f)
+    else:
+        import toml
+        scenario = toml.load(path)
+
+    scenario["simulation"] = {**SIMULATION_DEFAULTS, **scenario.get("simulation", {})}
+    scenario["results"] = {**RESULTS_DEFAULTS, **scenario.get("results", {})}
+    scenario["remote"] = {**REMOTE_DEFAULTS, **scenario.get("remote", {})}
+    if not scenario.get("fmus"):
+        raise ScenarioError(f"Scenario {path} does not define any FMU")
+    for name, config in scenario["fmus"].items():
+        if "path" not in config:
+            raise ScenarioError(f"FMU '{name}' of scenario {path} has no path")
+        scenario["fmus"][name] = {**FMU_DEFAULTS, **config}
+        if scenario["fmus"][name]["interface"] not in INTERFACES:
+            raise ScenarioError(f"Unknown interface '{config['interface']}' of FMU '{name}', expected one of {', '.join(INTERFACES)}")
+    scenario.setdefault("connections", {})
+    return scenario
+
+
+# A variable of one FMU of the scenario, `clocks` holds the value references of its clocks
+Variable = namedtuple("Variable", "fmu name vr type causality clocks")
+
+# Batched get: fmu.get<type>(vrs) stored in the value slots
+Read = namedtuple("Read", "get vrs slots type")
+
+# Batched set: fmu.set<type>(vrs, values of the slots), converted to the sink type if needed
+Write = namedtuple("Write", "set vrs slots convert type")
+
+# Sets, step and gets of an FMU in one Fmi3FusedDoStep: `inputs` holds (type, vrs, slots, convert) and
+# `outputs` (type, vrs) per type, the values of the outputs go to `output_slots`
+FusedStep = namedtuple("FusedStep", "inputs outputs output_slots")
+
+# Deferred steps of a dormant FMU: its doSteps are sent together in one Fmi3CoalescedDoStep while the FMU reports,
+# in the variables of `steps_slot`, `low_slot` and `high_slot`, that they cannot raise an event as long as the value of
+# `input_slot` stays within [low, high]. `pending` holds the deferred (time, step size, inputs), `counts` the numbers
+# of deferred steps and of coalesced commands
+Dormancy = namedtuple("Dormancy", "coalesced_step reads timed_reads input_slot steps_slot low_slot high_slot pending counts")
+
+# Ticks predicted not to change an FMU: the slot of its prediction output, the reads of the output when it is not read
+# with the step, and the numbers of skipped and due ticks
+TickPrediction = namedtuple("TickPrediction", "slot reads counts")
+
+# Transfers of one clock: reads of its clocked outputs, writes to the sinks and clocks triggered in other FMUs
+ClockPlan = namedtuple("ClockPlan", "reads writes sink_fmus clock_sinks slot")
+
+
+class FMUInstance:
+    """ An FMU of the scenario, its model description and variables
+
+    Parameters:
+        name              name of the FMU in the scenario (also used as instance name)
+        config            the FMU's table of the scenario
+        profiler          CallProfiler instrumenting the FMU's calls
+        model_cache_dir   cache of the parsed model descriptions, None to parse modelDescription.xml every time
+        backend_class     class serving the FMU with the backend interface, BackendSlave by default (RemoteBackendSlave
+                          with the remote interface)
+        remote            the 'remote' table of the scenario, for the remote interface
+    """
+
+    def __init__(self, name, config, profiler, model_cache_dir=default_cache_dir, backend_class=None, remote=None):
+        from fmpy import extract
+
+        self.name = name
+        self.config = dict(config)
+        path = Path(config["path"])
+        if not path.exists():
+            raise ScenarioError(f"FMU '{name}': {path} does not exist")
+        self.model_info = load_model_info(path, model_cache_dir)
+        if path.is_dir():
+            self.unzipdir, self._extracted = path, False
+        else:
+            self.unzipdir, self._extracted = Path(extract(str(path))), True
+
+        self.variables = {}
+        for variable in self.model_info.variables:
+            self.variables[variable.name] = Variable(name, variable.name, variable.vr, variable.type,
+                                                     variable.causality, variable.clocks)
+        self.clocks = [v for v in self.model_info.variables if v.type == "Clock"]
+        self.output_clocks = [v.vr for v in self.clocks if v.causality == "output"]
+        self.periodic_clocks = [v.vr for v in self.clocks
+                                if v.causality == "input" and v.interval_variability in PERIODIC_CLOCKS]
+        # FMUs without clocks stay in step mode, their inputs are set between steps
+        self.event_mode = len(self.clocks) > 0
+
+        # Dormancy and tick prediction are optimizations: FMUs built without their outputs (e.g. the original FMUs)
+        # run without them
+        dormancy = config["dormancy"]
+        missing = [dormancy[key] for key in ("steps", "low", "high") if key in dormancy and dormancy[key] not in self.variables]
+        if dormancy and missing:
+            logger.warning(f"FMU '{name}' has no variable {', '.join(missing)}, its steps are not deferred while "
+                           f"dormant")
+            self.config["dormancy"] = {}
+        prediction = config["tick_prediction"]
+        if prediction is not None and prediction not in self.variables:
+            logger.warning(f"FMU '{name}' has no variable {prediction}, all its clock ticks are handled in event mode")
+            self.config["tick_prediction"] = None
+
+        self.interface = config["interface"]
+        if self.interface == "auto":
+            from fmpy import platform_tuple
+            self.interface = "fmpy" if (self.unzipdir / "binaries" / platform_tuple).is_dir() else "backend"
+
+        # Backends built before Fmi3FusedDoStep (e.g. the original FMUs) are sent one command per call
+        schema = self.unzipdir / "resources" / "schemas" / "fmi3_messages_pb2.py"
+        self.fused = self.interface in ("backend", "remote") and b"Fmi3FusedDoStep" in schema.read_bytes()
+        if self.interface in ("backend", "remote") and config["fused_step"] and not self.fused:
+            logger.warning(f"FMU '{name}': its backend has no Fmi3FusedDoStep command, its calls are sent one by one")
+
+        # Array-backed variable store of the backend (see plant/resources/store.py), set in its own environment. A
+        # shared block is named after the instance, so the FMUs and the copies of a scenario do not collide
+        store = config["variable_store"]
+        self.shared_store = f"{store}_{name}" if store not in (None, "private") else None
+        options = {"env": {"UNIFMU_VARIABLE_STORE": store}} if store is not None else {}
+        if store is not None and self.interface == "fmpy":
+            raise ScenarioError(f"FMU '{name}': variable_store needs the backend or the remote interface")
+
+        if self.interface == "fmpy":
+            from fmpy.fmi3 import FMU3Slave
+            self.fmu = FMU3Slave(guid=self.model_info.guid, unzipDirectory=str(self.unzipdir),
+                                 modelIdentifier=self.model_info.model_identifier, instanceName=name)
+        elif self.interface == "remote":
+            if backend_class is None:
+                from .remote import RemoteBackendSlave as backend_class
+            remote = remote or REMOTE_DEFAULTS
+            self.fmu = backend_class(self.unzipdir, instanceName=name, guid=self.model_info.guid, broker=remote["broker"],
+                                     host=remote["host"], worker=config["worker"], **options)
+        else:
+            if backend_class is None:
+                from .unifmu import BackendSlave as backend_class
+            self.fmu = backend_class(self.unzipdir, instanceName=name, guid=self.model_info.guid, **options)
+        profiler.instrument(self.fmu, name)
+
+    def variable(self, name):
+        if name not in self.variables:
+            raise ScenarioError(f"FMU '{self.name}' has no variable '{name}'")
+        return self.variables[name]
+
+    def free(self, instantiated):
+        """ Terminate and free the instance, stop its backend and remove the extracted FMU """
+        try:
+            if instantiated:
+                self.fmu.terminate()
+                self.fmu.freeInstance()
+            elif self.interface in ("backend", "remote"):
+                self.fmu.freeInstance()
+            else:
+                self.fmu.freeLibrary()
+        finally:
+            self.remove_extracted()
+            self.remove_store()
+
+    def remove_extracted(self):
+        if self._extracted:
+            shutil.rmtree(self.unzipdir, ignore_errors=True)
+
+    def remove_store(self):
+        """ Unlink the shared variable store left by a backend that did not exit cleanly (e.g. failed to start) """
+        if self.shared_store is not None and self.interface == "backend":
+            from multiprocessing import shared_memory
+            try:
+                block = shared_memory.SharedMemory(self.shared_store)
+            except FileNotFoundError:
+                return # Unlinked by the backend
+            block.close()
+            block.unlink()
+
+
+class Orchestrator:
+    """ Runs a co-simulation scenario
+
+    Parameters:
+        scenario          scenario as returned by load_scenario
+        profiler          optional CallProfiler, the FMUs are instrumented when they are created
+        model_cache_dir   cache of the parsed model descriptions (see cosim.model_cache), None to disable it
+    """
+
+    # Classes serving the FMUs with the backend and the remote interfaces, None for BackendSlave and RemoteBackendSlave
+    backend_class = None
+    remote_class = None
+
+    def __init__(self, scenario, profiler=None, model_cache_dir=default_cache_dir):
+        self.scenario = scenario
+        self.simulation = scenario["simulation"]
+        self.profiler = profiler if profiler is not None else CallProfiler(enabled=False)
+        self.fmus = []
+        self.results = None
+        self.time = self.simulation["start_time"]
+        self.steps = 0
+        self.pacer = None
+        self.located_events = [] # Times of the threshold crossings located within the steps
+        self.located_steps = 0 # Communication points added by the located events
+        self.iterations = [0, 0] # Sweeps of the iterative coupling, and steps that did not converge
+        self._initialized = False
+
+        try:
+            for name, config in scenario["fmus"].items():
+                backend_class = self.remote_class if config["interface"] == "remote" else self.backend_class
+                self.fmus.append(FMUInstance(name, config, self.profiler, model_cache_dir, backend_class,
+                                             scenario.get("remote")))
+            self._index = {instance.name: i for i, instance in enumerate(self.fmus)}
+            self._compile()
+        except BaseException:
+            self.close()
+            raise
+
+    def _lookup(self, reference):
+        """ Return the Variable of a 'fmu.variable' reference """
+        fmu_name, _, variable_name = reference.partition(".")
+        if fmu_name not in self._index or not variable_name:
+            raise ScenarioError(f"Unknown variable '{reference}', expected <fmu>.<variable> with one of the FMUs "
+                                f"{', '.join(self._index)}")
+        return self.fmus[self._index[fmu_name]].variable(variable_name)
+
+    # ================= Step plan =================
+
+    def _slot(self, variable):
+        key = (variable.fmu, variable.vr)
+        if key not in self._slots:
+            self._slots[key] = len(self.values)
+            self.values.append(None)
+        return self._slots[key]
+
+    def _reads(self, variables):
+        """ Batch the gets of `variables` per FMU and type """
+        groups = defaultdict(list)
+        for variable in dict.fromkeys(variables):
+            groups[(variable.fmu, variable.type)].append(variable)
+        reads = []
+        for (fmu_name, type_name), group in groups.items():
+            fmu = self.fmus[self._index[fmu_name]].fmu
+            reads.append(Read(getattr(fmu, f"get{type_name}"), [v.vr for v in group], [self._slot(v) for v in group],
+                              type_name))
+        return reads
+
+    def _writes(self, pairs):
+        """ Batch the sets of (source, sink) pairs per sink FMU and type """
+        groups = defaultdict(list)
+        for source, sink in pairs:
+            groups[(sink.fmu, sink.type)].append((source, sink))
+        writes = []
+        for (fmu_name, type_name), group in groups.items():
+            fmu = self.fmus[self._index[fmu_name]].fmu
+            convert = None
+            if any(VALUE_TYPES[source.type] is not VALUE_TYPES[type_name] for source, _ in group):
+                convert = VALUE_TYPES[type_name]
+            writes.append(Write(getattr(fmu, f"set{type_name}"), [sink.vr for _, sink in group],
+                                [self._input_slot(source) for source, _ in group], convert, type_name))
+        return writes
+
+    def _input_slot(self, source):
+        """ Slot of the value written to the inputs connected to `source`, its extrapolation if it is extrapolated """
+        slot = self._slot(source)
+        return self._extrapolated[slot][1] if slot in self._extrapolated else slot
+
+    def _derivative_reads(self, variables):
+        """ Batch the gets of the first order derivatives of the extrapolated outputs among `variables` per FMU """
+        groups = defaultdict(list)
+        for variable in dict.fromkeys(variables):
+            slot = self._slots.get((variable.fmu, variable.vr))
+            if slot in self._extrapolated:
+                groups[variable.fmu].append(variable)
+        reads = []
+        for fmu_name, group in groups.items():
+            get = self.fmus[self._index[fmu_name]].fmu.getOutputDerivatives
+            reads.append(Read(lambda vrs, get=get: get(vrs, [1] * len(vrs)), [v.vr for v in group],
+                              [self._extrapolated[self._slot(v)][0] for v in group], "Derivative"))
+        return reads
+
+    def _compile(self):
+        """ Compile the connections and recorded columns into batched get/set calls """
+
+        self._slots = {}
+        self.values = []
+        self._extrapolated = {} # Slot of an output -> slots of its derivative and of its extrapolation
+
+        simulation = self.simulation
+        if simulation["coupling"] not in COUPLINGS:
+            raise ScenarioError(f"Unknown coupling '{simulation['coupling']}', expected one of {', '.join(COUPLINGS)}")
+        if simulation["real_time"] and simulation["overrun_policy"] not in OVERRUN_POLICIES:
+            raise ScenarioError(f"Unknown overrun_policy '{simulation['overrun_policy']}', expected one of "
+                                f"{', '.join(OVERRUN_POLICIES)}")
+        if simulation["coupling"] == "iterative" and simulation["event_location"]:
+            raise ScenarioError("Event location is not supported with the iterative coupling")
+        if simulation["extrapolation"] and (simulation["coupling"] != "jacobi" or simulation["event_location"]):
+            raise ScenarioError("The extrapolation of the inputs needs the jacobi coupling, without event location")
+
+        timed = []
+        clocked = defaultdict(list) # (fmu, clock vr) -> [(source, sink)]
+        clock_sinks = defaultdict(list) # (fmu, clock vr) -> [sink clock]
+        order_edges = defaultdict(set)
+
+        for source_reference, sink_references in self.scenario["connections"].items():
+            source = self._lookup(source_reference)
+            if isinstance(sink_references, str):
+                sink_references = [sink_references]
+            for sink_reference in sink_references:
+                sink = self._lookup(sink_reference)
+                if source.type == "Clock":
+                    if sink.type != "Clock":
+                        raise ScenarioError(f"Clock {source_reference} can only be connected to a clock, not {sink_reference}")
+                    clock_sinks[(source.fmu, source.vr)].append(sink)
+                elif source.clocks:
+                    for clock in source.clocks:
+                        clocked[(source.fmu, clock)].append((source, sink))
+                elif sink.clocks:
+                    raise ScenarioError(f"Connection {source_reference} -> {sink_reference}: the output has no clock "
+                                        f"but the input is clocked")
+                else:
+                    timed.append((source, sink))
+                if source.fmu != sink.fmu and self.fmus[self._index[sink.fmu]].event_mode:
+                    order_edges[source.fmu].add(sink.fmu)
+
+        # Multi-rate FMUs: their timed inputs are set and their outputs read when they step
+        self._multirate = set()
+        for i, instance in enumerate(self.fmus):
+            step_size = instance.config["step_size"]
+            if step_size is None:
+                continue
+            if step_size != "clock" and (isinstance(step_size, bool) or not isinstance(step_size, (int, float))):
+                raise ScenarioError(f"FMU '{instance.name}': step_size must be a number or \"clock\", not {step_size!r}")
+            if instance.config["dormancy"]:
+                raise ScenarioError(f"FMU '{instance.name}': dormancy and step_size cannot be combined")
+            if instance.event_mode and not instance.model_info.can_handle_variable_step:
+                raise ScenarioError(f"FMU '{instance.name}' has clocks and is synchronized at events, its own "
+                                    f"step_size needs canHandleVariableCommunicationStepSize")
+            self._multirate.add(i)
+        multirate = {self.fmus[i].name for i in self._multirate}
+        if multirate and (simulation["coupling"] == "iterative" or simulation["event_location"]):
+            raise ScenarioError(f"FMUs with their own step_size ({', '.join(sorted(multirate))}) are not supported with "
+                                f"the iterative coupling or the event location, remove their step_size to step them at "
+                                f"every communication point")
+
+        # Tick predictions: a Boolean output without clock, read with the steps of the FMU
+        predictions = {}
+        for i, instance in enumerate(self.fmus):
+            if instance.config["tick_prediction"] is None:
+                continue
+            variable = instance.variable(instance.config["tick_prediction"])
+            if variable.type != "Boolean" or variable.causality != "output" or variable.clocks:
+                raise ScenarioError(f"FMU '{instance.name}': the tick prediction {variable.name} must be a Boolean "
+                                    f"output without clock")
+            if not instance.periodic_clocks or instance.output_clocks:
+                raise ScenarioError(f"FMU '{instance.name}': a tick prediction needs periodic clocks, and no output "
+                                    f"clocks")
+            predictions[i] = variable
+
+        # Extrapolated outputs: Float outputs of timed connections to other FMUs, from FMUs with output derivatives
+        if simulation["extrapolation"]:
+            for source, sink in timed:
+                source_info = self.fmus[self._index[source.fmu]].model_info
+                if (source.fmu != sink.fmu and source.type.startswith("Float") and
+                        source_info.max_output_derivative_order >= 1 and self._slot(source) not in self._extrapolated):
+                    self._extrapolated[self._slot(source)] = (len(self.values), len(self.values) + 1)
+                    self.values += [0.0, None]
+            if not self._extrapolated:
+                logger.warning("No timed connection has a Float output with derivatives, no input is extrapolated")
+
+        # Recorded columns
+        schema = [("sim_time", "float64")]
+        self.change_columns = []
+        record_slots = []
+        recorded_timed = []
+        recorded_clocked = defaultdict(list)
+        self._event_slots = {}
+        for column in self.scenario["results"]["columns"]:
+            if "event" in column:
+                fmu_name = column["event"]
+                if fmu_name not in self._index:
+                    raise ScenarioError(f"Column {column['name']}: unknown FMU '{fmu_name}'")
+                slot = self._event_slots.setdefault(fmu_name, len(self.values))
+                if slot == len(self.values):
+                    self.values.append(False)
+                schema.append((column["name"], "bool"))
+                if column.get("changes", True):
+                    self.change_columns.append(column["name"])
+            else:
+                variable = self._lookup(column["variable"])
+                slot = self._slot(variable)
+                if variable.type == "Clock":
+                    self.values[slot] = False
+                elif variable.clocks:
+                    for clock in variable.clocks:
+                        recorded_clocked[(variable.fmu, clock)].append(variable)
+                else:
+                    recorded_timed.append(variable)
+                schema.append((column["name"], COLUMN_TYPES[variable.type]))
+                # Clocks, clocked variables and the discrete types only change at events
+                discrete = variable.type == "Clock" or bool(variable.clocks) or not variable.type.startswith("Float")
+                changes = column.get("changes", discrete and COLUMN_TYPES[variable.type] in CHANGE_TYPES)
+                if changes and COLUMN_TYPES[variable.type] not in CHANGE_TYPES:
+                    raise ScenarioError(f"Column {column['name']}: {variable.type} values cannot be stored as changes")
+                if changes:
+                    self.change_columns.append(column["name"])
+            record_slots.append(slot)
+        self.schema = schema
+        self._record = itemgetter(*record_slots) if len(record_slots) > 1 else (lambda values: (values[record_slots[0]],) if record_slots else ())
+
+        # Timed outputs are read once after each step, for the record and for the inputs of the next step
+        timed_outputs = [source for source, _ in timed] + recorded_timed
+
+        # With the backend (or remote) interface, the timed inputs of an FMU and its step are sent in one
+        # Fmi3FusedDoStep. Its timed outputs are read in the same round trip when no value can reach the FMU in event
+        # mode (or when the scenario states that its outputs do not depend on those values), since they are read after
+        # event mode
+        event_sinks = {sink.fmu for pairs in clocked.values() for _, sink in pairs}
+        self._fused_steps = {}
+        fused_inputs, fused_outputs = set(), set()
+        dormancy_variables = {}
+        for i, instance in enumerate(self.fmus):
+            if not instance.fused or not instance.config["fused_step"]:
+                if instance.config["dormancy"]:
+                    logger.info(f"FMU '{instance.name}': dormancy needs the backend interface with fused_step, "
+                                f"its steps are not deferred")
+                continue
+            fused_inputs.add(instance.name)
+            inputs = self._writes([pair for pair in timed if pair[1].fmu == instance.name])
+            outputs = []
+            if instance.config["fused_outputs"] or not (instance.event_mode or instance.name in event_sinks):
+                fused_outputs.add(instance.name)
+                outputs = [v for v in timed_outputs if v.fmu == instance.name]
+            if instance.config["dormancy"]:
+                # The dormancy variables are read with every step the FMU does
+                dormancy_variables[i] = self._dormancy_variables(instance, timed, clocked, clock_sinks)
+                outputs += dormancy_variables[i][:3]
+            if i in predictions:
+                outputs.append(predictions[i])
+            outputs = self._reads(outputs) + self._derivative_reads(outputs)
+            self._fused_steps[i] = FusedStep([(w.type, w.vrs, w.slots, w.convert) for w in inputs],
+                                             [(r.type, r.vrs) for r in outputs], [r.slots for r in outputs])
+
+        # The timed outputs of a dormant FMU do not change while its steps are deferred, they are read after its steps
+        dormant = {self.fmus[i].name for i in dormancy_variables}
+        self._dormancy = {}
+        self._sources = {} # Output connected to the dormancy input, watched by the event location
+        for i, (steps, low, high, source) in dormancy_variables.items():
+            instance = self.fmus[i]
+            self._sources[i] = source
+            dormant_outputs = [v for v in timed_outputs if v.fmu == instance.name and v.fmu not in fused_outputs]
+            self._dormancy[i] = Dormancy(instance.fmu.coalescedDoStep, self._reads([steps, low, high]),
+                                         self._reads(dormant_outputs) + self._derivative_reads(dormant_outputs),
+                                         self._input_slot(source), self._slot(steps), self._slot(low),
+                                         self._slot(high), [], [0, 0])
+
+        timed_reads = [v for v in timed_outputs if v.fmu not in fused_outputs and v.fmu not in dormant | multirate]
+        self._timed_reads = self._reads(timed_reads) + self._derivative_reads(timed_reads)
+        self._timed_writes = self._writes([pair for pair in timed if pair[1].fmu not in fused_inputs | multirate])
+
+        # Gauss-Seidel and iterative coupling: the timed inputs set and the outputs read per FMU, and the slots
+        # of the outputs its inputs come from
+        self._input_writes, self._output_reads, self._input_slots = {}, {}, {}
+        for i, instance in enumerate(self.fmus):
+            name = instance.name
+            self._input_writes[i] = self._writes([pair for pair in timed
+                                                  if pair[1].fmu == name and name not in fused_inputs])
+            output_reads = [v for v in timed_outputs if v.fmu == name and name not in fused_outputs | dormant]
+            self._output_reads[i] = self._reads(output_reads) + self._derivative_reads(output_reads)
+            self._input_slots[i] = [self._slot(source) for source, sink in timed if sink.fmu == name]
+        if simulation["coupling"] == "gauss_seidel":
+            timed_edges = defaultdict(set)
+            for source, sink in timed:
+                if source.fmu != sink.fmu:
+                    timed_edges[source.fmu].add(sink.fmu)
+            self._step_order = self._order([i.name for i in self.fmus], timed_edges, "Timed connections")
+        else:
+            self._step_order = list(range(len(self.fmus)))
+        self._initial_reads = self._reads([source for source, _ in timed] +
+                                          [source for pairs in clocked.values() for source, _ in pairs] +
+                                          recorded_timed +
+                                          [v for variables in recorded_clocked.values() for v in variables] +
+                                          [v for variables in dormancy_variables.values() for v in variables[:3]])
+        self._initial_writes = self._writes(timed + [pair for pairs in clocked.values() for pair in pairs])
+        # The derivatives after the initialization, and after event mode of the FMUs whose inputs it can change
+        self._initial_derivative_reads = self._derivative_reads([source for source, _ in timed])
+        self._event_derivative_reads = self._derivative_reads([source for source, _ in timed
+                                                               if source.fmu in event_sinks])
+
+        # Clocks: what happens in event mode when they tick
+        self._clock_plans = defaultdict(dict)
+        for instance in self.fmus:
+            for clock in instance.clocks:
+                key = (instance.name, clock.vr)
+                pairs = clocked.get(key, [])
+                reads = self._reads([source for source, _ in pairs] + recorded_clocked.get(key, []))
+                slot = self._slots.get(key)
+                if pairs or key in clock_sinks or reads or slot is not None:
+                    sinks = clock_sinks.get(key, [])
+                    sink_fmus = sorted({self._index[sink.fmu] for _, sink in pairs} |
+                                       {self._index[sink.fmu] for sink in sinks})
+                    self._clock_plans[self._index[instance.name]][clock.vr] = ClockPlan(
+                        reads, self._writes(pairs), sink_fmus, [(self._index[s.fmu], s.vr) for s in sinks], slot)
+        self._clock_slots = [plan.slot for plans in self._clock_plans.values() for plan in plans.values()
+                             if plan.slot is not None]
+
+        # A skipped tick must not have reached another FMU in event mode
+        self._tick_predictions = {}
+        for i, variable in predictions.items():
+            plans = self._clock_plans.get(i, {})
+            for vr in self.fmus[i].periodic_clocks:
+                plan = plans.get(vr)
+                if plan is not None and (plan.clock_sinks or any(self.fmus[j].event_mode for j in plan.sink_fmus)):
+                    raise ScenarioError(f"FMU '{self.fmus[i].name}': a tick prediction needs periodic clocks whose "
+                                        f"connections reach no FMU with clocks")
+            self._tick_predictions[i] = TickPrediction(self._slot(variable),
+                                                       [] if i in self._fused_steps else self._reads([variable]),
+                                                       [0, 0])
+
+        # Discrete states are updated from the sources to the sinks of the clocked connections
+        self._event_order = self._order([i.name for i in self.fmus if i.event_mode], order_edges)
+
+    def _dormancy_variables(self, instance, timed, clocked, clock_sinks):
+        """ Return the steps, low and high variables of the dormancy of `instance` and the source of its input """
+
+        dormancy = instance.config["dormancy"]
+        missing = [key for key in ("steps", "input", "low", "high") if key not in dormancy]
+        if missing:
+            raise ScenarioError(f"FMU '{instance.name}': dormancy misses {', '.join(missing)}")
+        # Deferred steps cannot go through event mode, which the FMU may only enter on its own events
+        clock_sink_fmus = {sink.fmu for sinks in clock_sinks.values() for sink in sinks}
+        clock_sink_fmus |= {sink.fmu for pairs in clocked.values() for _, sink in pairs}
+        if instance.periodic_clocks or instance.name in clock_sink_fmus:
+            raise ScenarioError(f"FMU '{instance.name}': dormancy is only supported for FMUs without periodic or "
+                                f"connected input clocks")
+        input_variable = instance.variable(dormancy["input"])
+        sources = [source for source, sink in timed if sink == input_variable]
+        if not sources:
+            raise ScenarioError(f"FMU '{instance.name}': the dormancy input {dormancy['input']} is not connected")
+        return (instance.variable(dormancy["steps"]), instance.variable(dormancy["low"]),
+                instance.variable(dormancy["high"]), sources[0])
+
+    def _order(self, names, edges, connections="Clocked connections"):
+        """ Indices of the FMUs `names` sorted so that sources come before their sinks (file order otherwise) """
+
+        remaining = list(names)
+        ordered = []
+        while remaining:
+            ready = [n for n in remaining if not any(n in edges[m] for m in remaining if m != n)]
+            if not ready: # Algebraic loop between clocked connections, keep the file order
+                logger.warning(f"{connections} form a loop between {', '.join(remaining)}")
+                ready = remaining[:1]
+            ordered.append(ready[0])
+            remaining.remove(ready[0])
+        return [self._index[name] for name in ordered]
+
+    @staticmethod
+    def _transfer(reads, writes, values):
+        for get, vrs, slots, _ in reads:
+            for slot, value in zip(slots, get(vrs)):
+                values[slot] = value
+        for set, vrs, slots, convert, _ in writes:
+            if convert is None:
+                set(vrs, [values[slot] for slot in slots])
+            else:
+                set(vrs, [convert(values[slot]) for slot in slots])
+
+    # ================= Initialization =================
+
+    def initialize(self):
+        """ Instantiate the FMUs, set parameters and clocks, exchange the initial values and open the results """
+
+        simulation = self.simulation
+        start_time = simulation["start_time"]
+
+        for instance in self.fmus:
+            instance.fmu.instantiate(visible=False, loggingOn=False,
+                                     eventModeUsed=instance.config["event_mode_used"],
+                                     earlyReturnAllowed=instance.config["early_return_allowed"],
+                                     logMessage=None, intermediateUpdate=None)
+        self._initialized = True
+
+        for instance in self.fmus:
+            instance.fmu.enterInitializationMode(startTime=start_time, stopTime=simulation["end_time"])
+
+        for instance in self.fmus:
+            for name, value in instance.config["parameters"].items():
+                variable = instance.variable(name)
+                getattr(instance.fmu, f"set{variable.type}")([variable.vr], [VALUE_TYPES[variable.type](value)])
+            for name, interval in instance.config["clocks"].items():
+                instance.fmu.setIntervalDecimal([instance.variable(name).vr], [float(interval)])
+
+        # Periodic input clocks: [fmu index, clock vr, interval, ticks so far]
+        self._schedule = []
+        for i, instance in enumerate(self.fmus):
+            if instance.periodic_clocks:
+                intervals, _ = instance.fmu.getIntervalDecimal(instance.periodic_clocks)
+                for vr, interval in zip(instance.periodic_clocks, intervals):
+                    logger.info(f"{instance.name}: periodic clock {vr} with interval {interval}")
+                    self._schedule.append([i, vr, interval, 0])
+
+        self._macro_steps = {i: self._macro_step(i) for i in sorted(self._multirate)}
+
+        self._transfer(self._initial_reads, (), self.values)
+        self._extrapolate(0.0)
+        self._transfer((), self._initial_writes, self.values)
+
+        for instance in self.fmus:
+            instance.fmu.exitInitializationMode()
+            if instance.config["event_mode_used"] and instance.event_mode:
+                instance.fmu.enterStepMode()
+        self._transfer(self._initial_derivative_reads, (), self.values)
+
+        self.results = self._result_writer()
+        self.time = start_time
+        self.steps = 0
+
+    def _result_writer(self):
+        results = self.scenario["results"]
+        return ResultWriter(results["file"], schema=self.schema, flush_every=results["flush_every"],
+                            csv_export=results["csv_export"],
+                            changes=self.change_columns if results["changes_only"] else ())
+
+    def _macro_step(self, i):
+        """ Return the macro step of the multi-rate FMU `i`, in steps of the simulation """
+
+        instance = self.fmus[i]
+        simulation = self.simulation
+        step_size = simulation["step_size"]
+        macro_step = instance.config["step_size"]
+        if macro_step == "clock":
+            # The largest multiple of the step size that divides the intervals of the periodic clocks
+            multiples = [interval / step_size for fmu, _, interval, _ in self._schedule if fmu == i]
+            if multiples and all(abs(m - round(m)) < 1e-9 and round(m) >= 1 for m in multiples):
+                steps = math.gcd(*(round(m) for m in multiples))
+            else:
+                logger.warning(f"{instance.name}: no periodic clock interval is a multiple of the step size, "
+                               f"it steps at every communication point")
+                steps = 1
+        else:
+            steps = round(macro_step / step_size)
+            if steps < 1 or abs(macro_step / step_size - steps) > 1e-9:
+                raise ScenarioError(f"FMU '{instance.name}': step_size {macro_step} is not a multiple of the "
+                                    f"simulation step size {step_size}")
+        n_steps = math.ceil((simulation["end_time"] - simulation["start_time"]) / step_size - 1e-9)
+        if n_steps % steps and not instance.model_info.can_handle_variable_step:
+            raise ScenarioError(f"FMU '{instance.name}': its last step would be shorter than step_size, which needs "
+                                f"canHandleVariableCommunicationStepSize")
+        logger.info(f"{instance.name}: steps of {steps * step_size} s")
+        return steps
+
+    # ================= Simulation loop =================
+
+    def _extrapolate(self, horizon):
+        """ Extrapolate the extrapolated outputs by `horizon` from their values and derivatives """
+        values = self.values
+        for slot, (derivative_slot, extrapolated_slot) in self._extrapolated.items():
+            values[extrapolated_slot] = values[slot] + values[derivative_slot] * horizon
+
+    def _due_clocks(self, time, tolerance):
+        """ Return {fmu index: [clock vrs]} of the periodic clocks ticking up to `time` """
+
+        due = defaultdict(list)
+        start_time = self.simulation["start_time"]
+        for entry in self._schedule:
+            i, vr, interval, ticks = entry
+            if start_time + ticks * interval <= time + tolerance:
+                due[i].append(vr)
+                entry[3] = math.floor((time + tolerance - start_time) / interval) + 1
+        return due
+
+    def _skip_ticks(self, due, event_fmus):
+        """ Remove from `due` the ticks of the FMUs that predict them not to change their state
+
+        The ticks of an FMU are skipped only when it does not ask for event handling and no other FMU in event mode
+        can reach it through the clocked connections. The clocks are recorded as ticking.
+        """
+
+        values = self.values
+        for i, prediction in self._tick_predictions.items():
+            if i not in due:
+                continue
+            prediction.counts[1] += 1
+            if i in event_fmus:
+                continue
+            reachable, involved = (set(due) - {i}) | event_fmus, set()
+            while reachable:
+                j = reachable.pop()
+                involved.add(j)
+                reachable |= {k for plan in self._clock_plans.get(j, {}).values() for k in plan.sink_fmus} - involved
+            if i in involved:
+                continue
+            self._transfer(prediction.reads, (), values)
+            if values[prediction.slot]:
+                continue
+            plans = self._clock_plans.get(i, {})
+            for vr in due.pop(i):
+                plan = plans.get(vr)
+                if plan is not None and plan.slot is not None:
+                    values[plan.slot] = True
+            prediction.counts[0] += 1
+
+    def _event_mode(self, due, event_fmus):
+        """ Handle the clocks due and the event requests of the FMUs, return True if an FMU asked to terminate """
+
+        affected = set(due) | event_fmus
+        active = defaultdict(list, {i: list(vrs) for i, vrs in due.items()})
+        entered = []
+        terminate = False
+        values = self.values
+        fmus = self.fmus
+
+        for i in self._event_order:
+            if i not in affected:
+                continue
+            instance = fmus[i]
+            fmu = instance.fmu
+            if i not in entered:
+                fmu.enterEventMode()
+                entered.append(i)
+            if active[i]:
+                fmu.setClock(active[i], [True] * len(active[i]))
+            if instance.output_clocks:
+                for vr, ticking in zip(instance.output_clocks, fmu.getClock(instance.output_clocks)):
+                    if ticking:
+                        active[i].append(vr)
+
+            discrete_states_need_update = True
+            while discrete_states_need_update:
+                discrete_states_need_update, terminate_simulation, *_ = fmu.updateDiscreteStates()
+                terminate = terminate or terminate_simulation
+
+            plans = self._clock_plans.get(i, {})
+            for vr in active[i]:
+                plan = plans.get(vr)
+                if plan is None:
+                    continue
+                if plan.slot is not None:
+                    values[plan.slot] = True
+                for j in plan.sink_fmus:
+                    if fmus[j].event_mode and j not in entered:
+                        fmus[j].fmu.enterEventMode()
+                        entered.append(j)
+                        affected.add(j)
+                self._transfer(plan.reads, plan.writes, values)
+                for j, sink_vr in plan.clock_sinks:
+                    active[j].append(sink_vr)
+
+        for i in entered:
+            fmus[i].fmu.enterStepMode()
+        return terminate
+
+    def run(self):
+        """ Run the scenario from the start to the end time, return the number of steps """
+
+        if not self._initialized:
+            self.initialize()
+
+        simulation = self.simulation
+        start_time = simulation["start_time"]
+        step_size = simulation["step_size"]
+        n_steps = math.ceil((simulation["end_time"] - start_time) / step_size - 1e-9)
+        tolerance = step_size * 1e-9
+        profiler = self.profiler
+        values = self.values
+        timed_reads, timed_writes = self._timed_reads, self._timed_writes
+        transfer = self._transfer
+        record, write_row = self._record, self.results.write_row
+        fused_steps = self._fused_steps
+        dormancies = self._dormancy
+        do_steps = [(i, instance.fmu.fusedDoStep if i in fused_steps else instance.fmu.doStep, fused_steps.get(i),
+                     self._event_slots.get(instance.name), instance.event_mode, dormancies.get(i))
+                    for i, instance in ((i, self.fmus[i]) for i in self._step_order)]
+        gauss_seidel = simulation["coupling"] == "gauss_seidel"
+        iterative = simulation["coupling"] == "iterative"
+        input_writes, output_reads = self._input_writes, self._output_reads
+        multirate = self._macro_steps
+        steppers = {i: (do_step, fused) for i, do_step, fused, *_ in do_steps}
+        reached = {i: self.steps for i in multirate} # Step of the simulation each multi-rate FMU has reached
+        counts = {i: 0 for i in multirate}
+        clock_sinks = {i: {j for plan in self._clock_plans.get(i, {}).values() for j in plan.sink_fmus}
+                       for i in range(len(self.fmus))}
+        clock_slots = self._clock_slots
+        extrapolate = self._extrapolate if self._extrapolated else None
+        fmus = self.fmus
+        locate = simulation["event_location"] and self._dormancy
+        predictions = self._tick_predictions
+        debug = logger.isEnabledFor(logging.DEBUG)
+
+        if simulation["real_time"]:
+            self.pacer = RealTimePacer(step_size, policy=simulation["overrun_policy"])
+            self.pacer.start()
+
+        logger.info(f"Co-simulation of {', '.join(i.name for i in self.fmus)} for {n_steps} steps of {step_size} s, "
+                    f"{simulation['coupling']} coupling, real-time {simulation['real_time']}"
+                    f"{', extrapolated inputs' if extrapolate else ''}")
+        if simulation["event_location"] and not locate:
+            logger.warning("Event location needs an FMU with dormancy, the events are handled at the communication points")
+
+        def fused_values(fused, source=values):
+            return [(type_name, vrs, [source[slot] for slot in slots] if convert is None else
+                     [convert(source[slot]) for slot in slots])
+                    for type_name, vrs, slots, convert in fused.inputs]
+
+        def catch_up(i, n, source):
+            """ Step the multi-rate FMU `i` from the step it reached to step `n`, with the inputs in `source` """
+
+            do_step, fused = steppers[i]
+            step_time = start_time + reached[i] * step_size
+            size = start_time + n * step_size - step_time
+            transfer((), input_writes[i], source)
+            if fused is None:
+                event_handling_needed, terminate_simulation, _, _ = do_step(step_time, size)
+            else:
+                event_handling_needed, terminate_simulation, _, _, outputs = do_step(
+                    step_time, size, True, fused_values(fused, source), fused.outputs)
+                for slots, output_values in zip(fused.output_slots, outputs):
+                    for slot, value in zip(slots, output_values):
+                        values[slot] = value
+            if gauss_seidel:
+                transfer(output_reads[i], (), values)
+            reached[i] = n
+            counts[i] += 1
+            return event_handling_needed, terminate_simulation
+
+        def step_fmus(time, size, saved=None, restep=None, held=None):
+            """ Step the FMUs (those of `restep` only, with the current outputs) from `time` by `size`
+
+            With `saved`, the state of each FMU is stored in it before the FMU steps (see _rollback). The multi-rate
+            FMUs step when a multiple of their macro step is reached, with the inputs in `held`.
+            Returns the indices of the FMUs that ask for event handling and of those that ask to terminate.
+            """
+
+            if multirate:
+                n = self.steps + 1
+                due = [i for i, steps in multirate.items() if not n % steps]
+
+            if restep is not None:
+                fused_inputs = self._last_fused_inputs
+                for i in restep:
+                    transfer((), input_writes[i], values)
+                    if i in fused_steps:
+                        fused_inputs[i] = fused_values(fused_steps[i])
+            elif gauss_seidel:
+                fused_inputs = self._last_fused_inputs = {}
+            else:
+                transfer((), timed_writes, values)
+                # The inputs of the fused steps are taken before any FMU steps, as those of the other FMUs
+                fused_inputs = self._last_fused_inputs = {i: fused_values(fused) for i, fused in fused_steps.items()
+                                                          if i not in multirate}
+
+            profiler.phase("step")
+            event_fmus, terminating = set(), set()
+            for i, do_step, fused, event_slot, event_mode, dormancy in do_steps:
+                if i in multirate:
+                    if i in due:
+                        event_handling_needed, terminate_simulation = catch_up(i, n, held)
+                        if event_handling_needed and event_mode:
+                            event_fmus.add(i)
+                        if terminate_simulation:
+                            terminating.add(i)
+                        if event_slot is not None:
+                            values[event_slot] = event_handling_needed
+                    elif event_slot is not None:
+                        values[event_slot] = False # Held until its next macro step
+                    continue
+                if restep is not None:
+                    if i not in restep:
+                        continue
+                elif gauss_seidel:
+                    # The outputs of the FMUs stepped before are already in the values
+                    transfer((), input_writes[i], values)
+                    if fused is not None:
+                        fused_inputs[i] = fused_values(fused)
+                if dormancy is not None:
+                    pending = dormancy.pending
+                    if (len(pending) < values[dormancy.steps_slot] and
+                            values[dormancy.low_slot] <= values[dormancy.input_slot] <= values[dormancy.high_slot]):
+                        # The step cannot raise an event, it is sent with the next step the FMU does
+                        pending.append((time, size, fused_inputs[i]))
+                        if event_slot is not None:
+                            values[event_slot] = False
+                        continue
+                    if saved is not None and pending:
+                        self._flush_deferred(dormancy) # So that the saved state is that of `time`
+                if saved is not None:
+                    saved[i] = fmus[i].fmu.getFMUState()
+                if fused is None:
+                    event_handling_needed, terminate_simulation, _, _ = do_step(time, size)
+                else:
+                    if dormancy is not None and pending:
+                        pending.append((time, size, fused_inputs[i]))
+                        dormancy.counts[0] += len(pending) - 1
+                        dormancy.counts[1] += 1
+                        event_handling_needed, terminate_simulation, _, _, outputs = dormancy.coalesced_step(
+                            pending, fused.outputs)
+                        pending.clear()
+                    else:
+                        event_handling_needed, terminate_simulation, _, _, outputs = do_step(
+                            time, size, True, fused_inputs[i], fused.outputs)
+                    for slots, output_values in zip(fused.output_slots, outputs):
+                        for slot, value in zip(slots, output_values):
+                            values[slot] = value
+                if gauss_seidel:
+                    transfer(output_reads[i], (), values)
+                if event_handling_needed and event_mode:
+                    event_fmus.add(i)
+                if event_slot is not None:
+                    values[event_slot] = event_handling_needed
+                if terminate_simulation:
+                    terminating.add(i)
+            return event_fmus, terminating
+
+        def advance(time, size, end, saved=None):
+            """ Step the FMUs from `time` by `size` and exchange the values at `end`, return True to terminate """
+
+            if extrapolate is not None:
+                extrapolate(size)
+            if iterative:
+                event_fmus, terminating = self._iterate(step_fmus, time, size)
+            else:
+                # The multi-rate FMUs take the inputs of the communication point, as the others
+                held = values.copy() if multirate and not gauss_seidel else values
+                event_fmus, terminating = step_fmus(time, size, saved, held=held)
+            terminate = bool(terminating)
+
+            profiler.phase("event")
+            for slot in clock_slots:
+                values[slot] = False
+            due = self._due_clocks(end, tolerance) if self._schedule else {}
+            events = bool(due or event_fmus)
+            if events:
+                if multirate:
+                    # The multi-rate FMUs the event can reach through the clocks are brought to its time
+                    n = self.steps + 1
+                    involved, reachable = set(), set(due) | event_fmus
+                    while reachable:
+                        i = reachable.pop()
+                        involved.add(i)
+                        if i in multirate and reached[i] < n:
+                            event_handling_needed, terminate_simulation = catch_up(i, n, held)
+                            if event_handling_needed:
+                                event_fmus.add(i)
+                            terminate = terminate or terminate_simulation
+                        reachable |= clock_sinks[i] - involved
+                if predictions:
+                    self._skip_ticks(due, event_fmus)
+                if due or event_fmus:
+                    terminate = self._event_mode(due, event_fmus) or terminate
+
+            profiler.phase("outputs")
+            transfer(timed_reads, (), values)
+            if (due or event_fmus) and extrapolate is not None:
+                transfer(self._event_derivative_reads, (), values)
+            if multirate and (events or not gauss_seidel):
+                n = self.steps + 1
+                for i in multirate:
+                    if reached[i] == n:
+                        transfer(output_reads[i], (), values)
+            for i, dormancy in dormancies.items():
+                if i in event_fmus: # Event mode changes what the FMU can do next
+                    transfer(dormancy.reads, (), values)
+                if not dormancy.pending:
+                    transfer(dormancy.timed_reads, (), values)
+            return terminate
+
+        def write(time):
+            # As in the original scenario, the row of a step is labelled with the time the step started from
+            profiler.phase("record")
+            row = record(values)
+            write_row(time, *row)
+            if debug:
+                logger.debug(f"t = {time}: {dict(zip((name for name, _ in self.schema[1:]), row))}")
+
+        terminate = False
+        while self.steps < n_steps and not terminate:
+            time = self.time
+            next_time = start_time + (self.steps + 1) * step_size
+
+            profiler.begin_step("inputs")
+            if not locate:
+                terminate = advance(time, step_size, next_time)
+                write(time)
+            else:
+                terminate = self._located_step(advance, write, time, step_size, next_time)
+
+            self.steps += 1
+            self.time = next_time
+            profiler.end_step()
+            if self.pacer is not None:
+                self.pacer.wait()
+
+        # The multi-rate FMUs and the steps still deferred are brought to the end, as no event can follow them
+        if extrapolate is not None:
+            extrapolate(0.0)
+        for i, steps in multirate.items():
+            if reached[i] < self.steps:
+                catch_up(i, self.steps, values)
+            logger.info(f"{fmus[i].name}: {counts[i]} steps of {steps * step_size} s for {self.steps} communication "
+                        f"points")
+        for i, dormancy in dormancies.items():
+            self._flush_deferred(dormancy)
+            steps = self.steps + self.located_steps
+            logger.info(f"{self.fmus[i].name}: {dormancy.counts[0]} of {steps} steps deferred while dormant, "
+                        f"sent in {dormancy.counts[1]} coalesced commands")
+
+        for i, prediction in predictions.items():
+            logger.info(f"{fmus[i].name}: {prediction.counts[0]} of {prediction.counts[1]} clock ticks skipped as "
+                        f"predicted not to change its state")
+
+        if locate:
+            logger.info(f"{len(self.located_events)} threshold crossings located within the steps")
+        if iterative and self.steps:
+            logger.info(f"Iterative coupling: {self.iterations[0] / self.steps:.2f} sweeps per step, "
+                        f"{self.iterations[1]} steps not converged in {simulation['max_iterations']} iterations")
+        if self.pacer is not None:
+            logger.info(f"Real-time pacing: {self.pacer.statistics.summary()}")
+        if terminate:
+            logger.info(f"An FMU terminated the simulation at t = {self.time}")
+        return self.steps
+
+    @staticmethod
+    def _flush_deferred(dormancy):
+        """ Do the steps of a dormant FMU that are still deferred """
+        if dormancy.pending:
+            dormancy.counts[0] += len(dormancy.pending)
+            dormancy.counts[1] += 1
+            dormancy.coalesced_step(dormancy.pending)
+            dormancy.pending.clear()
+
+    # ================= Iterative coupling =================
+
+    def _iterate(self, step_fmus, time, size):
+        """ Step the FMUs from `time` by `size` until their timed inputs converge
+
+        The FMUs step first with the outputs at `time`. Then, as long as the outputs an FMU takes its inputs from
+        have changed by more than the coupling tolerance, the FMU is restored to its state before the step and steps
+        again with the new outputs. Returns the FMUs asking for event handling and to terminate in their last step.
+        """
+
+        values = self.values
+        tolerance = self.simulation["coupling_tolerance"]
+
+        def read_outputs():
+            self._transfer(self._timed_reads, (), values)
+            for dormancy in self._dormancy.values():
+                if not dormancy.pending:
+                    self._transfer(dormancy.timed_reads, (), values)
+
+        saved = {}
+        used = values.copy()
+        event_fmus, terminating = step_fmus(time, size, saved)
+        read_outputs()
+        sweeps = 1
+        while True:
+            restep = [i for i, slots in self._input_slots.items()
+                      if any(not _converged(values[slot], used[slot], tolerance) for slot in slots)]
+            if not restep:
+                break
+            if sweeps == self.simulation["max_iterations"]:
+                self.iterations[1] += 1
+                break
+            for i in restep:
+                if i in saved:
+                    self.fmus[i].fmu.setFMUState(saved[i])
+                elif self._dormancy[i].pending:
+                    self._dormancy[i].pending.pop() # The step was deferred, and not done
+            used = values.copy()
+            restep_events, restep_terminating = step_fmus(time, size, saved, set(restep))
+            event_fmus = (event_fmus - set(restep)) | restep_events
+            terminating = (terminating - set(restep)) | restep_terminating
+            read_outputs()
+            sweeps += 1
+        self.iterations[0] += sweeps
+        self._free_states(saved)
+        return event_fmus, terminating
+
+    # ================= Event location =================
+
+    def _located_step(self, advance, write, time, step_size, next_time):
+        """ Do the step from `time` to `next_time` and write its rows, splitting it at the first threshold crossing
+
+        The input of a dormant FMU leaving its band (e.g. the plant temperature crossing the setpoint for the
+        supervisor) means that the FMU raises an event in its next step. The crossing time is located by bisection
+        of the step of the FMU whose output is that input, from its state saved before the step. The FMUs are then
+        restored, and step to the crossing, by the event tolerance, in which the FMU raises its event, and to the
+        end of the step, with one row each. Returns True if an FMU asked to terminate.
+        """
+
+        values = self.values
+        snapshot = values.copy()
+        ticks = [entry[3] for entry in self._schedule]
+        counts = [list(counter.counts) for counter in (*self._dormancy.values(), *self._tick_predictions.values())]
+        saved = {}
+        terminate = advance(time, step_size, next_time, saved)
+        fused_inputs = self._last_fused_inputs
+
+        crossing = None
+        for i, dormancy in self._dormancy.items():
+            low, high = snapshot[dormancy.low_slot], snapshot[dormancy.high_slot]
+            if not (low <= snapshot[dormancy.input_slot] <= high) or low <= values[dormancy.input_slot] <= high:
+                continue
+            source = self._sources[i]
+            j = self._index[source.fmu]
+            if j not in saved:
+                continue # The source was deferred itself
+            located = self._locate_crossing(j, source, saved[j], fused_inputs.get(j), low, high, time, step_size)
+            crossing = located if crossing is None else min(crossing, located)
+
+        event_tolerance = self.simulation["event_tolerance"]
+        if terminate or crossing is None or crossing + event_tolerance >= next_time - 1e-9 * step_size:
+            self._free_states(saved)
+            write(time)
+            return terminate
+
+        self._rollback(saved, snapshot, ticks, counts)
+        self._free_states(saved)
+        self.located_events.append(crossing)
+        terminate = advance(time, crossing - time, crossing)
+        write(time)
+        if not terminate:
+            terminate = advance(crossing, event_tolerance, crossing + event_tolerance)
+            write(crossing)
+            self.located_steps += 1
+        if not terminate:
+            terminate = advance(crossing + event_tolerance, next_time - crossing - event_tolerance, next_time)
+            write(crossing + event_tolerance)
+            self.located_steps += 1
+        return terminate
+
+    def _locate_crossing(self, j, source, state, inputs, low, high, time, step_size):
+        """ Return the time in (time, time + step_size] at which the output `source` of FMU `j` leaves [low, high],
+        within the event tolerance, by bisection of the step of the FMU from `state` """
+
+        fmu = self.fmus[j].fmu
+        event_tolerance = self.simulation["event_tolerance"]
+        get = getattr(fmu, f"get{source.type}")
+        lo, hi = 0.0, step_size
+        while hi - lo > event_tolerance:
+            mid = 0.5 * (lo + hi)
+            fmu.setFMUState(state)
+            if inputs is not None:
+                *_, outputs = fmu.fusedDoStep(time, mid, False, inputs, [(source.type, [source.vr])])
+                value = outputs[0][0]
+            else:
+                fmu.doStep(time, mid, False)
+                value = get([source.vr])[0]
+            if low <= value <= high:
+                lo = mid
+            else:
+                hi = mid
+        return time + hi
+
+    def _rollback(self, saved, snapshot, ticks, counts):
+        """ Restore the FMUs from the states `saved` before a step, and the values, clock ticks and `counts` of the
+        dormancies and tick predictions from before it """
+
+        for i, state in saved.items():
+            self.fmus[i].fmu.setFMUState(state)
+        for (i, dormancy), dormancy_counts in zip(self._dormancy.items(), counts):
+            # The deferred steps an FMU sent before its state was saved are kept, with their counts
+            if i not in saved:
+                dormancy.counts[:] = dormancy_counts
+                if dormancy.pending:
+                    dormancy.pending.pop() # The step was deferred, and not done
+        for prediction, prediction_counts in zip(self._tick_predictions.values(), counts[len(self._dormancy):]):
+            prediction.counts[:] = prediction_counts
+        self.values[:] = snapshot
+        for entry, tick in zip(self._schedule, ticks):
+            entry[3] = tick
+
+    def _free_states(self, saved):
+        for i, state in saved.items():
+            self.fmus[i].fmu.freeFMUState(state)
+
+    def close(self):
+        """ Terminate and free the FMUs, close the results and remove the extracted FMUs """
+
+        for instance in self.fmus:
+            try:
+                instance.free(self._initialized)
+            except Exception as e:
+                logger.warning(f"Failed to free FMU '{instance.name}': {e}")
+        self.fmus = []
+        self._initialized = False
+        if self.results is not None:
+            self.results.close()
+            self.results = None
@@ -0,0 +1,283 @@
+""" Per-FMI-call latency profiling across the master, ctypes and backend layers
+
+Three layers are timed for every FMI call:
+
+    master      the FMU3Slave method called by the scenario, including the ctypes marshalling
+    ctypes      the call into the UniFMU shared library (the fmiCallTimer hook of fmpy/fmi3.py),
+                which forwards the command to the backend over ZeroMQ, or with the backend
+                interface the round trip of BackendSlave to the backend (its fmiCallTimer hook)
+    backend     protobuf parsing, the Model method and the serialization of the reply in
+                backend.py (written to UNIFMU_PROFILE_DIR when the FMU is freed)
+
+Calls are aligned per FMU and per function in call order, which gives the time
+spent in marshalling (master - ctypes) and in transit through the dispatcher and
+ZeroMQ (ctypes - backend). The scenario loop is split into phases whose spans are
+recorded as well.
+
+    profiler = CallProfiler()
+    profiler.enable_backend_profiling("data/profile")   # before the FMUs are instantiated
+    profiler.instrument(plant_fmu, "plant")
+    while ...:
+        profiler.begin_step("inputs")
+        ...
+        profiler.phase("step")
+        ...
+        profiler.end_step()
+    ...                                                 # terminate and free the FMUs
+    profiler.write_reports("data/profile")
+"""
+
+import csv
+import os
+from collections import defaultdict
+from pathlib import Path
+from time import perf_counter
+
+
+# FMU3Slave methods timed at the master layer
+INSTRUMENTED_METHODS = (
+    "instantiate", "enterInitializationMode", "exitInitializationMode", "enterEventMode", "enterStepMode",
+    "doStep", "fusedDoStep", "coalescedDoStep", "updateDiscreteStates", "terminate", "freeInstance", "reset",
+    "getFloat32", "getFloat64", "getInt32", "getUInt32", "getBoolean", "getString", "getClock",
+    "setFloat32", "setFloat64", "setInt32", "setUInt32", "setBoolean", "setString", "setClock",
+    "getIntervalDecimal", "setIntervalDecimal", "getOutputDerivatives", "getFMUState", "setFMUState",
+)
+
+LAYERS = ("master", "marshalling", "transit", "backend.parse", "backend.model", "backend.serialize")
+
+PERCENTILES = (50, 90, 99)
+
+
+def _percentile(sorted_values, q):
+    """ Nearest-rank percentile of an already sorted list """
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def backend_command(function_name):
+    """ Name of the backend command (e.g. Fmi3DoStep) that serves an FMI function (e.g. fmi3DoStep) """
+    return "F" + function_name[1:]
+
+
+class CallProfiler:
+    """ Collects the timings of the FMI calls of instrumented FMUs
+
+    Parameters:
+        enabled   if False, all methods return immediately and the FMUs are left untouched
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.step = -1 # Calls before the first begin_step() are attributed to the setup
+        self.backend_profile_dir = None
+        self._records = [] # [step, phase, fmu, method, master time, ctypes function, ctypes time]
+        self._phases = [] # (step, phase, duration)
+        self._phase = "setup"
+        self._phase_start = None
+        self._current = None
+
+    # ================= Collection =================
+
+    def enable_backend_profiling(self, profile_dir):
+        """ Ask the backends started from now on to time their commands (through UNIFMU_PROFILE_DIR) """
+        if not self.enabled:
+            return
+        self.backend_profile_dir = Path(profile_dir).resolve()
+        self.backend_profile_dir.mkdir(parents=True, exist_ok=True)
+        os.environ["UNIFMU_PROFILE_DIR"] = str(self.backend_profile_dir)
+
+    def instrument(self, fmu, name):
+        """ Time the FMU3Slave methods and the ctypes calls of `fmu`, reported under `name` """
+        if not self.enabled:
+            return
+        fmu.fmiCallTimer = self._on_fmi_call
+        for method_name in INSTRUMENTED_METHODS:
+            method = getattr(fmu, method_name, None)
+            if method is not None:
+                setattr(fmu, method_name, self._wrap(name, method_name, method))
+
+    def _wrap(self, fmu_name, method_name, method):
+        records = self._records
+
+        def wrapper(*args, **kwargs):
+            record = [self.step, self._phase, fmu_name, method_name, 0.0, None, None]
+            self._current = record
+            start = perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record[4] = perf_counter() - start
+                self._current = None
+                records.append(record)
+
+        return wrapper
+
+    def _on_fmi_call(self, function_name, duration):
+        if self._current is not None:
+            self._current[5] = function_name
+            self._current[6] = duration
+
+    def begin_step(self, phase):
+        """ Start a new co-simulation step with its first phase """
+        if not self.enabled:
+            return
+        self._close_phase()
+        self.step += 1
+        self._open_phase(phase)
+
+    def phase(self, name):
+        """ Start a new phase of the current step """
+        if not self.enabled:
+            return
+        self._close_phase()
+        self._open_phase(name)
+
+    def end_step(self):
+        """ Close the last phase of the current step, later calls are reported as 'other' """
+        if not self.enabled:
+            return
+        self._close_phase()
+        self._phase = "other"
+
+    def _open_phase(self, name):
+        self._phase = name
+        self._phase_start = perf_counter()
+
+    def _close_phase(self):
+        if self._phase_start is not None:
+            self._phases.append((self.step, self._phase, perf_counter() - self._phase_start))
+            self._phase_start = None
+
+    # ================= Aggregation =================
+
+    def _load_backend_profiles(self):
+        """ Return {fmu: {command: [(parse, model, serialize), ...]}} from the backend CSV files """
+        profiles = {}
+        if self.backend_profile_dir is None:
+            return profiles
+        fmu_names = {record[2] for record in self._records}
+        for fmu_name in fmu_names:
+            path = self.backend_profile_dir / f"backend_{fmu_name}.csv"
+            if not path.exists():
+                continue
+            commands = defaultdict(list)
+            with open(path, newline="") as f:
+                for row in csv.DictReader(f):
+                    commands[row["command"]].append((float(row["parse"]), float(row["model"]), float(row["serialize"])))
+            profiles[fmu_name] = commands
+        return profiles
+
+    def calls(self):
+        """ Return one dict per FMI call with the step, phase, FMU, method and the time per layer [s] """
+
+        backend = self._load_backend_profiles()
+        counters = defaultdict(int)
+        calls = []
+
+        for step, phase, fmu_name, method_name, master_time, function_name, ctypes_time in self._records:
+            layers = {"master": master_time}
+            if ctypes_time is not None:
+                layers["marshalling"] = master_time - ctypes_time
+                command = backend_command(function_name)
+                index = counters[(fmu_name, command)]
+                counters[(fmu_name, command)] += 1
+                samples = backend.get(fmu_name, {}).get(command, [])
+                if index < len(samples):
+                    parse_time, model_time, serialize_time = samples[index]
+                    layers["transit"] = ctypes_time - parse_time - model_time - serialize_time
+                    layers["backend.parse"] = parse_time
+                    layers["backend.model"] = model_time
+                    layers["backend.serialize"] = serialize_time
+            calls.append({"step": step, "phase": phase, "fmu": fmu_name, "method": method_name, "layers": layers})
+
+        return calls
+
+    def percentiles(self, calls=None):
+        """ Return rows of (fmu, method, layer, count, mean, p50, p90, p99, max, total) in seconds """
+
+        calls = self.calls() if calls is None else calls
+        samples = defaultdict(list)
+        for call in calls:
+            for layer, duration in call["layers"].items():
+                samples[(call["fmu"], call["method"], layer)].append(duration)
+
+        rows = []
+        for (fmu_name, method_name, layer), values in sorted(samples.items(), key=lambda item: (item[0][0], item[0][1], LAYERS.index(item[0][2]))):
+            values.sort()
+            total = sum(values)
+            rows.append((fmu_name, method_name, layer, len(values), total / len(values),
+                         *[_percentile(values, q) for q in PERCENTILES], values[-1], total))
+        return rows
+
+    # ================= Reports =================
+
+    def write_percentiles(self, path, calls=None):
+        """ CSV of latency percentiles per FMU, FMI function and layer """
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["fmu", "function", "layer", "count", "mean", *[f"p{q}" for q in PERCENTILES], "max", "total"])
+            writer.writerows(self.percentiles(calls))
+
+    def write_step_breakdown(self, path, calls=None):
+        """ CSV with one row per step: the duration of each phase and the total time per layer """
+
+        calls = self.calls() if calls is None else calls
+        phase_names = list(dict.fromkeys(phase for _, phase, _ in self._phases))
+        phases = defaultdict(lambda: defaultdict(float))
+        for step, phase, duration in self._phases:
+            phases[step][phase] += duration
+        layers = defaultdict(lambda: defaultdict(float))
+        for call in calls:
+            for layer, duration in call["layers"].items():
+                layers[call["step"]][layer] += duration
+
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["step", "total", *[f"phase.{name}" for name in phase_names], *LAYERS])
+            for step in sorted(phases):
+                writer.writerow([step, sum(phases[step].values()),
+                                 *[phases[step].get(name, 0.0) for name in phase_names],
+                                 *[layers[step].get(layer, 0.0) for layer in LAYERS]])
+
+    def write_folded(self, path, calls=None):
+        """ Folded stacks (phase;fmu;function;layer microseconds) for flame graph tools such as speedscope """
+
+        calls = self.calls() if calls is None else calls
+        stacks = defaultdict(float)
+        called = defaultdict(float)
+        for call in calls:
+            if call["step"] < 0:
+                continue
+            prefix = f"{call['phase']};{call['fmu']};{call['method']}"
+            layers = call["layers"]
+            children = 0.0
+            for layer in LAYERS[1:]:
+                if layer in layers:
+                    stacks[f"{prefix};{layer.replace('.', ';')}"] += layers[layer]
+                    children += layers[layer]
+            stacks[prefix] += layers["master"] - children
+            called[call["phase"]] += layers["master"]
+        for step, phase, duration in self._phases:
+            if step >= 0:
+                stacks[phase] += duration
+        for phase, duration in called.items():
+            stacks[phase] -= duration
+
+        with open(path, "w") as f:
+            for stack, duration in sorted(stacks.items()):
+                microseconds = int(round(duration * 1e6))
+                if microseconds > 0:
+                    f.write(f"{stack} {microseconds}\n")
+
+    def write_reports(self, output_dir):
+        """ Write fmi_call_percentiles.csv, step_breakdown.csv and fmi_calls.folded to `output_dir` """
+        if not self.enabled:
+            return
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        calls = self.calls()
+        self.write_percentiles(output_dir / "fmi_call_percentiles.csv", calls)
+        self.write_step_breakdown(output_dir / "step_breakdown.csv", calls)
+        self.write_folded(output_dir / "fmi_calls.folded", calls)
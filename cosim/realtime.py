@@ -0,0 +1,177 @@
+""" Real-time pacing of the co-simulation loop
+
+The pacer releases step k at the absolute deadline start + k * period of a
+monotonic clock, instead of sleeping for the remainder of each step, so the
+small errors of every sleep do not accumulate into drift. When a step takes
+longer than its period (an overrun), the configured policy decides how the
+schedule recovers:
+
+    catch_up    keep the original deadlines and run the late steps back to back
+    slow_down   restart the schedule one period after the late step
+
+Each step advances the simulation time by one period, so no policy drops
+periods: that would leave the simulation time behind the schedule.
+"""
+
+import math
+import time
+
+
+OVERRUN_POLICIES = ("catch_up", "slow_down")
+
+
+class PacingStatistics:
+    """ Per-step latency histogram, wake-up jitter and deadline misses
+
+    Latencies (computation time of a step) are counted in `n_bins` bins of
+    width period / `bins_per_period`, the last bin collecting everything above.
+    """
+
+    def __init__(self, period, bins_per_period=20, n_bins=40):
+        self.period = period
+        self.bin_width = period / bins_per_period
+        self.histogram = [0] * n_bins
+        self.steps = 0
+        self.deadline_misses = 0
+        self.max_latency = 0.0
+        self._latency_sum = 0.0
+        self.max_jitter = 0.0
+        self._jitter_sum = 0.0
+        self._jitter_sq_sum = 0.0
+        self._n_jitter = 0
+
+    def record_latency(self, latency):
+        self.steps += 1
+        self._latency_sum += latency
+        self.max_latency = max(self.max_latency, latency)
+        index = min(int(latency / self.bin_width), len(self.histogram) - 1)
+        self.histogram[index] += 1
+
+    def record_jitter(self, jitter):
+        self._n_jitter += 1
+        self._jitter_sum += jitter
+        self._jitter_sq_sum += jitter * jitter
+        self.max_jitter = max(self.max_jitter, jitter)
+
+    @property
+    def mean_latency(self):
+        return self._latency_sum / self.steps if self.steps else 0.0
+
+    @property
+    def mean_jitter(self):
+        return self._jitter_sum / self._n_jitter if self._n_jitter else 0.0
+
+    @property
+    def std_jitter(self):
+        if self._n_jitter < 2:
+            return 0.0
+        variance = self._jitter_sq_sum / self._n_jitter - self.mean_jitter ** 2
+        return math.sqrt(max(variance, 0.0))
+
+    def bins(self):
+        """ Return the histogram as (lower edge, upper edge, count) tuples, the last upper edge is inf """
+
+        edges = [i * self.bin_width for i in range(len(self.histogram))] + [math.inf]
+        return [(edges[i], edges[i + 1], count) for i, count in enumerate(self.histogram)]
+
+    def summary(self):
+        return (f"{self.steps} steps, {self.deadline_misses} deadline misses, "
+                f"latency mean {self.mean_latency * 1e3:.3f} ms max {self.max_latency * 1e3:.3f} ms, "
+                f"wake-up jitter mean {self.mean_jitter * 1e6:.1f} us std {self.std_jitter * 1e6:.1f} us "
+                f"max {self.max_jitter * 1e6:.1f} us")
+
+
+class RealTimePacer:
+    """ Paces a fixed-step loop against absolute deadlines
+
+    Parameters:
+        period              wall-clock duration of one step [s]
+        policy              overrun policy, one of OVERRUN_POLICIES
+        spin_time           the last `spin_time` seconds before a deadline are busy-waited for a more precise wake-up
+        clock               monotonic clock returning seconds
+        sleep               sleep function
+
+    Usage:
+        pacer = RealTimePacer(step_size)
+        pacer.start()
+        while ...:
+            ... # compute the step
+            pacer.wait()
+        print(pacer.statistics.summary())
+    """
+
+    def __init__(self, period, policy="catch_up", spin_time=0.0, clock=time.perf_counter, sleep=time.sleep):
+        if period <= 0:
+            raise ValueError(f"The period must be positive, got {period}")
+        if policy not in OVERRUN_POLICIES:
+            raise ValueError(f"Unknown overrun policy '{policy}', expected one of {', '.join(OVERRUN_POLICIES)}")
+        self.period = period
+        self.policy = policy
+        self.spin_time = spin_time
+        self.clock = clock
+        self.sleep = sleep
+        self.statistics = PacingStatistics(period)
+        self._origin = None
+        self._step = 0
+        self._release = None
+
+    def start(self):
+        """ Start the schedule now, the first step is released immediately """
+
+        self._origin = self.clock()
+        self._step = 0
+        self._release = self._origin
+
+    @property
+    def next_deadline(self):
+        return self._origin + (self._step + 1) * self.period
+
+    def wait(self):
+        """ Block until the deadline of the current step and release the next one """
+
+        now, deadline = self._next_release()
+        self._wait_until(deadline)
+        self._released(now, deadline)
+
+    async def wait_async(self):
+        """ As wait(), but awaits the deadline with asyncio.sleep (without spinning), so other tasks run meanwhile """
+
+        import asyncio
+
+        now, deadline = self._next_release()
+        remaining = deadline - self.clock()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+        self._released(now, deadline)
+
+    def _next_release(self):
+        """ Record the latency of the current step and return (now, deadline of its release) """
+
+        if self._origin is None:
+            self.start()
+
+        now = self.clock()
+        self.statistics.record_latency(now - self._release)
+
+        deadline = self.next_deadline
+
+        if now > deadline:
+            self.statistics.deadline_misses += 1
+            if self.policy == "slow_down":
+                self._origin = now - (self._step + 1) * self.period
+                deadline = now
+        return now, deadline
+
+    def _released(self, now, deadline):
+        self._release = self.clock()
+        # Late steps of the catch-up policy are released without waiting, there is no wake-up to measure
+        if deadline >= now:
+            self.statistics.record_jitter(self._release - deadline)
+        self._step += 1
+
+    def _wait_until(self, deadline):
+        remaining = deadline - self.clock()
+        if remaining > self.spin_time:
+            self.sleep(remaining - self.spin_time)
+        while self.clock() < deadline:
+            pass
@@ -0,0 +1,532 @@
+""" Backends of the FMUs on other hosts, started by workers through a broker
+
+A backend only needs to reach the dispatcher endpoint it is given in
+UNIFMU_DISPATCHER_ENDPOINT, so it can run on any host that reaches the master
+over TCP. The deployment has three roles:
+
+    broker   one process the workers and the masters connect to, which places each backend on a worker
+    worker   one process per node, which starts the backends it is asked for and reports when they exit
+    master   binds the dispatcher socket of each FMU as usual, and asks the broker for a backend that connects to it
+
+The FMU commands go directly between the master and the backend, the broker
+is only involved when a backend starts and stops. A backend is placed on the
+worker with the lowest share of its capacity in use, or on the worker named by
+the `worker` of the FMU in the scenario. The master sends the `resources`
+folder of the FMU to the broker the first time it is asked for, the broker
+forwards it once to each worker, and the workers extract it in their cache.
+
+    python -m cosim.remote broker --bind tcp://0.0.0.0:5555
+    python -m cosim.remote worker --broker tcp://<broker host>:5555 --capacity 8
+    python -m cosim.remote status --broker tcp://<broker host>:5555
+
+The FMUs of a scenario use a worker with `interface = "remote"`, and the
+`[remote]` table of the scenario gives the broker and the address of the
+master as the workers reach it (`host`, on which the dispatcher sockets are
+bound). local_cluster() starts a broker and workers on the loopback
+interface, to run everything on one machine.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import zmq
+
+from .unifmu import AsyncBackendConnection, AsyncBackendSlave, BackendConnection, BackendError, BackendSlave
+
+
+logger = logging.getLogger(__name__)
+
+# Time in ms the master waits for an answer of the broker
+BROKER_TIMEOUT = 30000
+
+# Seconds between the heartbeats of a worker, and without any message after which the broker drops it
+HEARTBEAT_INTERVAL = 1.0
+WORKER_TIMEOUT = 5.0
+
+_archives = {}
+
+
+def _archive(resources_dir):
+    """ (SHA-256, bytes) of a zip of the `resources` folder of an FMU, without the bytecode caches
+
+    The zip is built once per folder and process, with fixed timestamps so that its hash only
+    depends on the content of the files.
+    """
+
+    resources_dir = Path(resources_dir)
+    if resources_dir not in _archives:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            for path in sorted(resources_dir.rglob("*")):
+                if path.is_file() and "__pycache__" not in path.parts:
+                    archive.writestr(zipfile.ZipInfo(path.relative_to(resources_dir).as_posix()), path.read_bytes())
+        data = buffer.getvalue()
+        _archives[resources_dir] = (hashlib.sha256(data).hexdigest(), data)
+    return _archives[resources_dir]
+
+
+def _send(sock, envelope, message, *frames):
+    """ Send the frames of `envelope` (the routing of the socket type), a JSON message and binary `frames` """
+    sock.send_multipart(list(envelope) + [json.dumps(message).encode()] + list(frames))
+
+
+# ================= Master =================
+
+class RemoteProcess:
+    """ A backend started on a worker through the broker, with the poll, wait and kill methods of
+    subprocess.Popen that the backend connections use
+
+    Parameters:
+        broker          endpoint of the broker, e.g. tcp://10.0.0.1:5555
+        resources_dir   the `resources` folder of the FMU, sent to the broker if it does not have it yet
+        env             environment variables of the backend, in addition to those of the worker
+        worker          name of the worker to start the backend on, None to let the broker place it
+    """
+
+    def __init__(self, broker, resources_dir, env, worker=None):
+        self.returncode = None
+        self.socket = zmq.Context.instance().socket(zmq.REQ)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.setsockopt(zmq.RCVTIMEO, BROKER_TIMEOUT)
+        self.socket.connect(broker)
+        self.broker = broker
+
+        try:
+            digest, data = _archive(resources_dir)
+            request = {"type": "spawn", "hash": digest, "env": env, "worker": worker}
+            reply = self._request(request)
+            if reply.get("missing"): # The broker has not seen this FMU yet
+                reply = self._request(request, data)
+            if "error" in reply:
+                raise BackendError(f"Broker {broker} could not start the backend in {resources_dir}: {reply['error']}")
+        except BaseException:
+            self.socket.close()
+            raise
+        self.instance, self.worker, self.pid = reply["instance"], reply["worker"], reply["pid"]
+        logger.debug(f"Backend in {resources_dir} started on worker {self.worker} (pid {self.pid})")
+
+    def _request(self, message, *frames):
+        _send(self.socket, (), message, *frames)
+        try:
+            return json.loads(self.socket.recv_multipart()[-1])
+        except zmq.Again:
+            raise BackendError(f"Broker {self.broker} did not answer")
+
+    def _exited(self, returncode):
+        self.returncode = returncode
+        self.socket.close()
+
+    def poll(self):
+        if self.returncode is None:
+            returncode = self._request({"type": "status", "instance": self.instance})["returncode"]
+            if returncode is not None:
+                self._exited(returncode)
+        return self.returncode
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() > deadline:
+                raise subprocess.TimeoutExpired(f"backend {self.instance} on {self.worker}", timeout)
+            time.sleep(0.01)
+        return self.returncode
+
+    def kill(self):
+        if self.returncode is None:
+            self._request({"type": "kill", "instance": self.instance})
+            self._exited(-signal.SIGKILL)
+
+
+class RemoteBackendConnection(BackendConnection):
+    """ BackendConnection to a backend started on a worker by the broker
+
+    Parameters:
+        resources_dir   the `resources` folder of the FMU
+        broker          endpoint of the broker
+        host            address of this host as the workers reach it, the dispatcher socket is bound on it
+        worker          name of the worker to use, None to let the broker place the backend
+        **options       env and timeout as BackendConnection (the output of the backend stays on the worker)
+    """
+
+    poll_interval = 1000 # Each check is a request to the broker
+
+    def __init__(self, resources_dir, broker, host="127.0.0.1", worker=None, **options):
+        self.broker, self.worker = broker, worker
+        super().__init__(resources_dir, bind_address=f"tcp://{host}", **options)
+
+    def _start_backend(self, env):
+        try:
+            return RemoteProcess(self.broker, self.resources_dir, env, self.worker)
+        except BaseException:
+            self.socket.close()
+            raise
+
+
+class AsyncRemoteBackendConnection(AsyncBackendConnection):
+    """ AsyncBackendConnection to a backend started on a worker by the broker
+
+    Parameters:
+        as RemoteBackendConnection
+    """
+
+    poll_interval = 1000 # Each check is a request to the broker
+
+    def __init__(self, resources_dir, broker, host="127.0.0.1", worker=None, **options):
+        self.broker, self.worker = broker, worker
+        super().__init__(resources_dir, bind_address=f"tcp://{host}", **options)
+
+    def _start_backend(self, env):
+        # The broker answers as soon as the worker has started the process, the handshake is awaited
+        try:
+            return RemoteProcess(self.broker, self.resources_dir, env, self.worker)
+        except BaseException:
+            self.socket.close()
+            self.socket = None
+            raise
+
+
+class RemoteBackendSlave(BackendSlave):
+    """ BackendSlave whose backend runs on a worker (see RemoteBackendConnection for the options) """
+
+    connection_class = RemoteBackendConnection
+
+
+class AsyncRemoteBackendSlave(AsyncBackendSlave):
+    """ AsyncBackendSlave whose backend runs on a worker (see RemoteBackendConnection for the options) """
+
+    connection_class = AsyncRemoteBackendConnection
+
+
+# ================= Broker =================
+
+class Broker:
+    """ Places the backends on the workers and tracks them until they exit
+
+    Parameters:
+        bind   endpoint the workers and the masters connect to, e.g. tcp://0.0.0.0:5555 (tcp://127.0.0.1:* for a
+               random port, see `endpoint`)
+    """
+
+    def __init__(self, bind):
+        self.socket = zmq.Context.instance().socket(zmq.ROUTER)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.bind(bind)
+        self.endpoint = self.socket.getsockopt_string(zmq.LAST_ENDPOINT)
+        self.workers = {} # identity -> {"name", "capacity", "running", "seen", "hashes"}
+        self.instances = {} # instance -> {"worker": identity, "master": identity waiting for the start, "returncode"}
+        self.archives = {} # hash -> zip of the resources of an FMU
+        self._next_instance = 0
+
+    def run(self):
+        poller = zmq.Poller()
+        poller.register(self.socket, zmq.POLLIN)
+        logger.info(f"Broker on {self.endpoint}")
+        while True:
+            if poller.poll(HEARTBEAT_INTERVAL * 1000):
+                identity, _, message, *frames = self.socket.recv_multipart()
+                self._handle(identity, json.loads(message), frames)
+            self._drop_silent_workers()
+
+    def _reply(self, identity, message, *frames):
+        _send(self.socket, (identity, b""), message, *frames)
+
+    def _handle(self, identity, message, frames):
+        kind = message["type"]
+        worker = self.workers.get(identity)
+        if worker is not None:
+            worker["seen"] = time.monotonic()
+
+        # From the workers
+        if kind == "ready":
+            self.workers[identity] = {"name": message["name"], "capacity": message["capacity"],
+                                      "running": message["running"], "seen": time.monotonic(), "hashes": set()}
+            logger.info(f"Worker {message['name']} ready, capacity {message['capacity']}")
+        elif worker is None and kind in ("heartbeat", "started", "failed", "exited"):
+            self._reply(identity, {"type": "register"}) # Dropped while silent, its backends were reported as exited
+        elif kind in ("started", "failed"):
+            instance = self.instances[message["instance"]]
+            master = instance.pop("master")
+            if kind == "started":
+                self._reply(master, {"instance": message["instance"], "worker": worker["name"], "pid": message["pid"]})
+            else:
+                worker["running"] -= 1
+                del self.instances[message["instance"]]
+                self._reply(master, {"error": message["error"]})
+        elif kind == "exited":
+            if message["instance"] in self.instances:
+                self.instances[message["instance"]]["returncode"] = message["returncode"]
+            worker["running"] -= 1
+        elif kind == "bye":
+            self._drop_worker(identity, "stopped")
+        elif kind == "heartbeat":
+            pass
+
+        # From the masters
+        elif kind == "spawn":
+            self._spawn(identity, message, frames)
+        elif kind == "status":
+            instance = self.instances.get(message["instance"])
+            returncode = -1 if instance is None else instance["returncode"]
+            if returncode is not None:
+                self.instances.pop(message["instance"], None)
+            self._reply(identity, {"returncode": returncode})
+        elif kind == "kill":
+            instance = self.instances.pop(message["instance"], None)
+            if instance is not None and instance["returncode"] is None and instance["worker"] in self.workers:
+                self._reply(instance["worker"], {"type": "kill", "instance": message["instance"]})
+            self._reply(identity, {"ok": True})
+        elif kind == "workers":
+            self._reply(identity, {"workers": [{k: w[k] for k in ("name", "capacity", "running")}
+                                               for w in self.workers.values()]})
+        else:
+            logger.warning(f"Unknown message {kind}")
+
+    def _spawn(self, master, message, frames):
+        if frames:
+            self.archives[message["hash"]] = frames[0]
+        if message["hash"] not in self.archives:
+            self._reply(master, {"missing": True})
+            return
+        name = message["worker"]
+        candidates = [(identity, w) for identity, w in self.workers.items() if name is None or w["name"] == name]
+        if not candidates:
+            self._reply(master, {"error": f"no worker named {name}" if name is not None else "no worker connected"})
+            return
+        identity, worker = min(candidates, key=lambda item: item[1]["running"] / item[1]["capacity"])
+        if worker["running"] >= worker["capacity"]:
+            logger.warning(f"Worker {worker['name']} runs {worker['running'] + 1} backends for a capacity of "
+                           f"{worker['capacity']}")
+
+        instance = self._next_instance
+        self._next_instance += 1
+        self.instances[instance] = {"worker": identity, "master": master, "returncode": None}
+        worker["running"] += 1
+        request = {"type": "spawn", "instance": instance, "hash": message["hash"], "env": message["env"]}
+        if message["hash"] in worker["hashes"]:
+            self._reply(identity, request)
+        else:
+            worker["hashes"].add(message["hash"])
+            self._reply(identity, request, self.archives[message["hash"]])
+
+    def _drop_silent_workers(self):
+        now = time.monotonic()
+        for identity, worker in list(self.workers.items()):
+            if now - worker["seen"] > WORKER_TIMEOUT:
+                self._drop_worker(identity, f"silent for {now - worker['seen']:.1f} s")
+
+    def _drop_worker(self, identity, reason):
+        """ Forget a worker, its backends are reported as exited and the masters waiting for one get an error """
+
+        worker = self.workers.pop(identity, None)
+        if worker is None:
+            return
+        logger.warning(f"Worker {worker['name']} dropped ({reason}), with {worker['running']} backends")
+        for number, instance in list(self.instances.items()):
+            if instance["worker"] == identity:
+                if "master" in instance:
+                    self._reply(instance["master"], {"error": f"worker {worker['name']} {reason}"})
+                    del self.instances[number]
+                elif instance["returncode"] is None:
+                    instance["returncode"] = -1
+
+
+# ================= Worker =================
+
+class Worker:
+    """ Starts the backends the broker asks for and reports when they exit
+
+    Parameters:
+        broker      endpoint of the broker
+        name        name of the worker, the host name by default
+        capacity    number of backends the worker is meant to run at a time
+        cache_dir   folder of the extracted FMU resources, a temporary folder by default
+        stdout, stderr  of the backends, passed to subprocess.Popen
+    """
+
+    def __init__(self, broker, name=None, capacity=None, cache_dir=None, stdout=None, stderr=None):
+        self.name = name or socket.gethostname()
+        self.capacity = capacity or os.cpu_count() or 1
+        self._temporary = cache_dir is None
+        self.cache_dir = Path(tempfile.mkdtemp(prefix="cosim_worker_") if cache_dir is None else cache_dir)
+        self.stdout, self.stderr = stdout, stderr
+        self.processes = {} # instance -> Popen
+        self.socket = zmq.Context.instance().socket(zmq.DEALER)
+        self.socket.setsockopt(zmq.LINGER, 1000)
+        self.socket.connect(broker)
+        self.broker = broker
+
+    def run(self):
+        poller = zmq.Poller()
+        poller.register(self.socket, zmq.POLLIN)
+        self._register()
+        logger.info(f"Worker {self.name} connected to {self.broker}, capacity {self.capacity}")
+        last_heartbeat = time.monotonic()
+        try:
+            while True:
+                if poller.poll(100):
+                    _, message, *frames = self.socket.recv_multipart()
+                    self._handle(json.loads(message), frames)
+                for instance, process in list(self.processes.items()):
+                    if process.poll() is not None:
+                        del self.processes[instance]
+                        self._send({"type": "exited", "instance": instance, "returncode": process.returncode})
+                if time.monotonic() - last_heartbeat > HEARTBEAT_INTERVAL:
+                    self._send({"type": "heartbeat"})
+                    last_heartbeat = time.monotonic()
+        finally:
+            self.close()
+
+    def _send(self, message):
+        _send(self.socket, (b"",), message)
+
+    def _register(self):
+        self._send({"type": "ready", "name": self.name, "capacity": self.capacity, "running": len(self.processes)})
+
+    def _handle(self, message, frames):
+        kind = message["type"]
+        if kind == "spawn":
+            try:
+                resources_dir = self._resources(message["hash"], frames)
+                process = subprocess.Popen([sys.executable, "backend.py"], cwd=resources_dir,
+                                           env={**os.environ, **message["env"]}, stdout=self.stdout, stderr=self.stderr)
+            except Exception as e:
+                self._send({"type": "failed", "instance": message["instance"], "error": repr(e)})
+                return
+            self.processes[message["instance"]] = process
+            self._send({"type": "started", "instance": message["instance"], "pid": process.pid})
+        elif kind == "kill":
+            process = self.processes.get(message["instance"])
+            if process is not None and process.poll() is None:
+                process.kill()
+        elif kind == "register":
+            self._register()
+
+    def _resources(self, digest, frames):
+        """ Folder of the FMU resources of hash `digest`, extracted from the archive in `frames` the first time """
+
+        folder = self.cache_dir / digest
+        if not folder.is_dir():
+            if not frames:
+                raise BackendError(f"Resources {digest} are neither cached nor sent")
+            extracting = Path(tempfile.mkdtemp(dir=self.cache_dir))
+            with zipfile.ZipFile(io.BytesIO(frames[0])) as archive:
+                archive.extractall(extracting)
+            extracting.rename(folder)
+        return folder
+
+    def close(self):
+        """ Stop the backends still running, leave the broker and remove a temporary cache """
+
+        for process in self.processes.values():
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+        self.processes = {}
+        if not self.socket.closed:
+            self._send({"type": "bye"})
+            self.socket.close()
+        if self._temporary:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+
+def workers(broker):
+    """ Return the name, capacity and number of running backends of the workers connected to `broker` """
+
+    sock = zmq.Context.instance().socket(zmq.REQ)
+    sock.setsockopt(zmq.LINGER, 0)
+    sock.setsockopt(zmq.RCVTIMEO, BROKER_TIMEOUT)
+    sock.connect(broker)
+    try:
+        _send(sock, (), {"type": "workers"})
+        return json.loads(sock.recv_multipart()[-1])["workers"]
+    except zmq.Again:
+        raise BackendError(f"Broker {broker} did not answer")
+    finally:
+        sock.close()
+
+
+@contextmanager
+def local_cluster(n_workers=2, capacity=None, stderr=subprocess.DEVNULL):
+    """ Run a broker and `n_workers` workers on the loopback interface, yield the endpoint of the broker
+
+    The broker and the workers are processes of their own, as on separate hosts, and are stopped on exit.
+    """
+
+    command = [sys.executable, "-m", "cosim.remote"]
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(Path(__file__).resolve().parent.parent),
+                                                        os.environ.get("PYTHONPATH", "")])}
+    broker = subprocess.Popen(command + ["broker", "--bind", "tcp://127.0.0.1:*"], env=env, stdout=subprocess.PIPE,
+                              stderr=stderr, text=True)
+    processes = [broker]
+    try:
+        endpoint = broker.stdout.readline().strip()
+        if not endpoint:
+            raise BackendError("The broker did not start")
+        for k in range(n_workers):
+            options = ["--name", f"worker{k}"] + (["--capacity", str(capacity)] if capacity else [])
+            processes.append(subprocess.Popen(command + ["worker", "--broker", endpoint] + options, env=env,
+                                              stdout=subprocess.DEVNULL, stderr=stderr))
+        deadline = time.monotonic() + 30
+        while len(workers(endpoint)) < n_workers:
+            if time.monotonic() > deadline:
+                raise BackendError(f"{n_workers} workers did not connect to the broker")
+            time.sleep(0.05)
+        yield endpoint
+    finally:
+        for process in reversed(processes): # The workers first, so that they stop their backends
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Broker and workers running the FMU backends on other hosts.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    broker_parser = commands.add_parser("broker", help="Place the backends on the workers")
+    broker_parser.add_argument("--bind", type=str, default="tcp://0.0.0.0:5555", help="Endpoint to bind")
+    worker_parser = commands.add_parser("worker", help="Start backends for the broker")
+    worker_parser.add_argument("--broker", type=str, required=True, help="Endpoint of the broker")
+    worker_parser.add_argument("--name", type=str, help="Name of the worker (the host name by default)")
+    worker_parser.add_argument("--capacity", type=int, help="Backends run at a time (the number of CPUs by default)")
+    worker_parser.add_argument("--cache-dir", type=str, help="Folder of the extracted FMU resources")
+    status_parser = commands.add_parser("status", help="List the workers of a broker")
+    status_parser.add_argument("--broker", type=str, required=True, help="Endpoint of the broker")
+    parser.add_argument("--log-level", type=str, default="INFO", help="Logging level")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level)
+
+    # Stopped by SIGTERM as by Ctrl+C, so that a worker stops its backends
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        if args.command == "broker":
+            broker = Broker(args.bind)
+            print(broker.endpoint, flush=True)
+            broker.run()
+        elif args.command == "worker":
+            Worker(args.broker, args.name, args.capacity, args.cache_dir).run()
+        else:
+            for worker in workers(args.broker):
+                print(f"{worker['name']:<20}{worker['running']:>4} / {worker['capacity']} backends")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,740 @@
+""" Streaming storage of co-simulation results
+
+Rows are buffered in memory and flushed every `flush_every` rows as one
+record batch (Arrow IPC) or row group (Parquet), so a long run keeps a
+bounded amount of data in memory and a crash only loses the rows since the
+last flush. CSV can still be produced as an export next to the columnar file.
+The .xor format (compression.py) encodes each block losslessly with XOR or
+delta-of-delta float coding, without pyarrow.
+
+Columns that only change at events (event flags, clocks, clocked and discrete
+outputs) can be stored as a log of their changes instead of a value per row:
+they are left empty in the result file (null columns, empty CSV cells), and
+<stem>.changes<suffix> next to it holds a (row, column, value) entry for each
+row where one of them takes a new value. The readers expand them again, lazily
+for load_columns (ChangeSeries).
+
+Result files are read back either as a DataFrame (read_results) or, for large
+files, column by column as NumPy arrays from a memory map (load_columns), or
+chunk by chunk in bounded memory (iter_columns). Their columns and types are
+given by result_schema: Arrow, Parquet and .xor files record them, the columns
+of CSV files take the type of their values.
+
+    python -m cosim.results data/simulation_data_5000_steps.csv data/simulation_data_5000_steps.arrow
+    python -m cosim.results data/simulation_data_5000_steps.csv data/simulation_data_5000_steps.xor
+    python -m cosim.results --changes-only data/simulation_data_5000_steps.csv data/simulation_data_5000_steps.arrow
+"""
+
+import argparse
+import csv
+from pathlib import Path
+
+import numpy as np
+
+
+# Column names and types of the incubator results, in recording order (the orchestrator builds the schema of each
+# scenario from its recorded variables)
+RESULT_SCHEMA = [
+    ("sim_time", "float64"),
+    ("supervisor_event", "bool"),
+    ("controller_event", "bool"),
+    ("Plant.Temperature", "float32"),
+    ("Plant.Temperature_heater", "float32"),
+    ("Controller.heater_ctrl", "bool"),
+    ("Supervisor.temperature_desired", "float32"),
+    ("Supervisor.heating_time", "float32"),
+]
+
+# Columns of the incubator results that only change at events. The controller's clock, which ticks every few rows,
+# takes less space with a value per row
+CHANGE_COLUMNS = [
+    "supervisor_event",
+    "Controller.heater_ctrl",
+    "Supervisor.temperature_desired",
+    "Supervisor.heating_time",
+]
+
+# Types of the columns that can be stored as changes, whose values float64 holds exactly
+CHANGE_TYPES = {"float64", "float32", "bool", "int8", "uint8", "int16", "uint16", "int32", "uint32"}
+
+# Columns of the change logs
+CHANGES_SCHEMA = [
+    ("row", "uint32"),
+    ("column", "string"),
+    ("value", "float64"),
+]
+
+RESULT_FORMATS = {
+    ".arrow": "arrow",
+    ".parquet": "parquet",
+    ".xor": "xor",
+    ".csv": "csv",
+}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Writing Arrow or Parquet results requires pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+
+def result_format(path):
+    """ Return the result format ('arrow', 'parquet', 'xor' or 'csv') of a file from its suffix """
+
+    suffix = Path(path).suffix.lower()
+    if suffix not in RESULT_FORMATS:
+        raise ValueError(f"Unsupported result file '{path}', expected one of {', '.join(RESULT_FORMATS)}")
+    return RESULT_FORMATS[suffix]
+
+
+def changes_path(path):
+    """ Return the path of the change log of a result file, <stem>.changes<suffix> """
+
+    path = Path(path)
+    return path.with_name(f"{path.stem}.changes{path.suffix}")
+
+
+def _changed(values, previous):
+    """ Mask of the values that differ from the one before, the first from `previous` (None for no value) """
+
+    changed = np.ones(len(values), dtype=bool)
+    changed[1:] = values[1:] != values[:-1]
+    if previous is not None:
+        changed[0] = values[0] != previous
+    if values.dtype.kind == "f":
+        # NaN to NaN is not a change
+        changed[1:] &= ~(np.isnan(values[1:]) & np.isnan(values[:-1]))
+        if previous is not None and np.isnan(values[0]) and np.isnan(previous):
+            changed[0] = False
+    return changed
+
+
+class ResultWriter:
+    """ Streaming writer for co-simulation results
+
+    Parameters:
+        path          output file, the format is taken from the suffix (.arrow, .parquet, .xor or .csv)
+        schema        list of (column name, type) tuples, types are 'float64', 'float32', 'bool', 'uint32', 'int64',
+                      'string', ... (result_schema gives the schema of an existing file)
+        flush_every   number of rows buffered before they are written to the file
+        csv_export    optional path of a CSV file that receives the same rows (every value of every row)
+        changes       names of the columns stored as a log of their changes, in changes_path(path)
+    """
+
+    def __init__(self, path, schema, flush_every=1000, csv_export=None, changes=()):
+        self.path = Path(path)
+        self.format = result_format(self.path)
+        self.schema = list(schema)
+        self.columns = [name for name, _ in self.schema]
+        self.flush_every = flush_every
+        self.rows_written = 0
+
+        self._buffer = [[] for _ in self.schema]
+        self._n_buffered = 0
+        self._writer = None
+        self._sink = None
+        self._csv_files = []
+
+        unknown = set(changes) - set(self.columns)
+        if unknown:
+            raise ValueError(f"Unknown columns {', '.join(sorted(unknown))} to store as changes")
+        for name, dtype in self.schema:
+            if name in changes and dtype not in CHANGE_TYPES:
+                raise ValueError(f"Column {name} of type {dtype} cannot be stored as changes")
+        self._change_indices = [i for i, name in enumerate(self.columns) if name in changes]
+        self._last_values = {}
+        self._changes = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        if self.format == "csv":
+            self._open_csv(self.path)
+        elif self.format == "xor":
+            from .compression import XorWriter
+            self._writer = XorWriter(self.path, [(name, "null", dtype) if i in self._change_indices else
+                                                 (name, dtype, None) for i, (name, dtype) in enumerate(self.schema)])
+        else:
+            pa = _import_pyarrow()
+            # The change columns are null columns, which take no space, with their type in the field metadata
+            self._arrow_schema = pa.schema([
+                pa.field(name, pa.null(), metadata={"changes": dtype}) if i in self._change_indices else
+                (name, pa.type_for_alias(dtype)) for i, (name, dtype) in enumerate(self.schema)])
+            self._sink = pa.OSFile(str(self.path), "wb")
+            if self.format == "arrow":
+                # The IPC stream format stays readable up to the last complete batch if the run crashes
+                self._writer = pa.ipc.new_stream(self._sink, self._arrow_schema)
+            else:
+                import pyarrow.parquet as pq
+                self._writer = pq.ParquetWriter(self._sink, self._arrow_schema)
+
+        if self._change_indices:
+            self._changes = ResultWriter(changes_path(self.path), schema=CHANGES_SCHEMA, flush_every=float("inf"))
+
+        if csv_export is not None:
+            self._open_csv(Path(csv_export))
+
+    def _open_csv(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(path, "w", newline="")
+        writer = csv.writer(f)
+        writer.writerow(self.columns)
+        self._csv_files.append((f, writer))
+
+    def write_row(self, *values):
+        """ Append one row, with the values in the order of the schema columns """
+
+        if len(values) != len(self.schema):
+            raise ValueError(f"Expected {len(self.schema)} values, got {len(values)}")
+        for column, value in zip(self._buffer, values):
+            column.append(value)
+        self._n_buffered += 1
+        if self._n_buffered >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """ Write the buffered rows to the file(s) """
+
+        if self._n_buffered == 0:
+            return
+
+        if self.format == "xor":
+            self._writer.write_block(self._buffer)
+        elif self._writer is not None:
+            pa = _import_pyarrow()
+            arrays = [pa.nulls(self._n_buffered) if i in self._change_indices else pa.array(column, type=field.type)
+                      for i, (column, field) in enumerate(zip(self._buffer, self._arrow_schema))]
+            batch = pa.RecordBatch.from_arrays(arrays, schema=self._arrow_schema)
+            if self.format == "arrow":
+                self._writer.write_batch(batch)
+            else:
+                self._writer.write_batch(batch, row_group_size=self._n_buffered)
+
+        for k, (f, writer) in enumerate(self._csv_files):
+            if k == 0 and self.format == "csv" and self._change_indices:
+                # Empty cells for the change columns of the result file, not of the export
+                empty = [""] * self._n_buffered
+                writer.writerows(zip(*(empty if i in self._change_indices else column
+                                       for i, column in enumerate(self._buffer))))
+            else:
+                writer.writerows(zip(*self._buffer))
+            f.flush()
+
+        if self._changes is not None:
+            self._log_changes()
+
+        self.rows_written += self._n_buffered
+        self._buffer = [[] for _ in self.schema]
+        self._n_buffered = 0
+
+    def _log_changes(self):
+        """ Append the changes of the buffered rows to the change log and flush it """
+
+        for i in self._change_indices:
+            values = np.asarray(self._buffer[i])
+            changed = _changed(values, self._last_values.get(i))
+            self._last_values[i] = values[-1]
+            name = self.columns[i]
+            # The values are kept as text in a CSV log, and as float64 (exact for every column type) otherwise
+            logged = values[changed] if self.format == "csv" else values[changed].astype(np.float64).tolist()
+            for row, value in zip((self.rows_written + np.flatnonzero(changed)).tolist(), logged):
+                self._changes.write_row(row, name, value)
+        self._changes.flush()
+
+    def close(self):
+        """ Flush the remaining rows and close the file(s) """
+
+        self.flush()
+        if self._changes is not None:
+            self._changes.close()
+            self._changes = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+        for f, _ in self._csv_files:
+            f.close()
+        self._csv_files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ChangeSeries:
+    """ A column stored as the log of its changes, expanded on demand
+
+    Indexing returns the values at the given rows (an int, a slice, or an array
+    of indices or of booleans), without expanding the column; NumPy functions
+    and to_numpy expand it.
+
+    Parameters:
+        rows     increasing indices of the rows where the column takes a new value, the first is 0
+        values   the value taken at each of these rows
+        length   number of rows of the column
+    """
+
+    def __init__(self, rows, values, length):
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.values = np.asarray(values)
+        self.length = length
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    @property
+    def shape(self):
+        return (self.length,)
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            index = np.arange(*index.indices(self.length))
+        index = np.asarray(index)
+        if index.dtype == bool:
+            index = np.flatnonzero(index)
+        index = np.where(index < 0, index + self.length, index)
+        if np.any((index < 0) | (index >= self.length)):
+            raise IndexError(f"Index out of range for a column of {self.length} rows")
+        return self.values[np.searchsorted(self.rows, index, side="right") - 1]
+
+    def to_numpy(self):
+        return np.repeat(self.values, np.diff(np.append(self.rows, self.length)))
+
+    def __array__(self, dtype=None, copy=None):
+        array = self.to_numpy()
+        return array if dtype is None else array.astype(dtype)
+
+    def __repr__(self):
+        return f"ChangeSeries({len(self.rows)} changes over {self.length} rows, dtype={self.dtype})"
+
+
+def _change_types(path):
+    """ {column: type} of the columns of a result file stored in its change log (None when not recorded, in CSV) """
+
+    fmt = result_format(path)
+    if not changes_path(path).exists():
+        return {}
+    if fmt == "csv":
+        import pandas as pd
+        columns = pd.read_csv(changes_path(path), usecols=["column"])["column"].unique()
+        return dict.fromkeys(columns)
+    if fmt == "xor":
+        from .compression import read_xor_schema
+        return {name: changes for name, _, changes in read_xor_schema(path) if changes}
+
+    pa = _import_pyarrow()
+    if fmt == "arrow":
+        with pa.memory_map(str(path), "r") as source:
+            schema = pa.ipc.open_stream(source).schema
+    else:
+        import pyarrow.parquet as pq
+        schema = pq.read_schema(str(path))
+    return {field.name: field.metadata[b"changes"].decode() for field in schema
+            if field.metadata and b"changes" in field.metadata}
+
+
+def load_changes(path, length, columns=None):
+    """ Load the change log of a result file
+
+    Parameters:
+        path      result file (.arrow, .parquet, .xor or .csv), not the log itself
+        length    number of rows of the result file, the log may hold later rows after a crash
+        columns   names of the columns to load, all the logged columns if None
+
+    Returns:
+        a dict mapping each column stored in the change log to a ChangeSeries
+    """
+
+    types = _change_types(path)
+    if not types:
+        return {}
+    log = changes_path(path)
+    if result_format(path) == "csv":
+        import pandas as pd
+        # The values are kept as written: True/False for Booleans, numbers otherwise
+        changes = pd.read_csv(log, dtype={"row": np.int64, "column": str, "value": str}, keep_default_na=False)
+        changes = {name: changes[name].to_numpy() for name in changes.columns}
+    else:
+        changes = load_columns(log)
+
+    series = {}
+    for name in dict.fromkeys(changes["column"].tolist()):
+        if columns is not None and name not in columns:
+            continue
+        selected = (changes["column"] == name) & (changes["row"] < length)
+        rows, values = changes["row"][selected], changes["value"][selected]
+        dtype = types[name]
+        if dtype is None:
+            # As pandas reads a CSV column
+            if set(values) <= {"True", "False"}:
+                values = values == "True"
+            else:
+                try:
+                    values = values.astype(np.int64)
+                except ValueError:
+                    values = values.astype(np.float64)
+        series[name] = ChangeSeries(rows, values.astype(dtype) if dtype else values, length)
+    return series
+
+
+def read_results(path):
+    """ Read a complete result file (.arrow, .parquet, .xor or .csv) into a pandas DataFrame
+
+    The columns stored in a change log are expanded to a value per row.
+    """
+
+    import pandas as pd
+
+    fmt = result_format(path)
+
+    if fmt == "csv":
+        df = pd.read_csv(path)
+    elif fmt == "xor":
+        from .compression import read_xor
+        df = pd.DataFrame(read_xor(path)[1])
+    else:
+        pa = _import_pyarrow()
+        if fmt == "arrow":
+            with pa.memory_map(str(path), "r") as source:
+                df = pa.ipc.open_stream(source).read_all().to_pandas()
+        else:
+            import pyarrow.parquet as pq
+            df = pq.read_table(str(path)).to_pandas()
+
+    for name, column in load_changes(path, len(df)).items():
+        df[name] = column.to_numpy()
+    return df
+
+
+def load_columns(path, columns=None):
+    """ Load the selected columns of a result file as NumPy arrays
+
+    Arrow files are memory-mapped and only the requested columns are
+    materialized, Parquet files read only the requested column chunks and CSV
+    files only parse the requested columns. The columns stored in a change log
+    are returned as ChangeSeries, which are only expanded when needed. The
+    other columns are loaded whole, iter_columns reads them in bounded memory.
+
+    Parameters:
+        path      result file (.arrow, .parquet, .xor or .csv)
+        columns   names of the columns to load, all columns if None
+
+    Returns:
+        a dict mapping each column name to a NumPy array (or a ChangeSeries)
+    """
+
+    fmt = result_format(path)
+    changed = _change_types(path)
+    dense = None if columns is None and not changed else [
+        name for name in (columns if columns is not None else _column_names(path)) if name not in changed]
+    if dense is not None and not dense:
+        dense = _column_names(path)[:1] # For the number of rows
+
+    if fmt == "csv":
+        import pandas as pd
+        types = dict(result_schema(path, columns))
+        df = pd.read_csv(path, usecols=dense, dtype=_csv_dtypes(types, dense or types), engine="c")
+        data = {name: df[name].to_numpy() for name in df.columns}
+        length = len(df)
+    elif fmt == "xor":
+        from .compression import read_xor
+        _, data, length = read_xor(path, dense)
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+        table = pq.read_table(str(path), columns=dense, memory_map=True)
+        data = {name: table.column(name).to_numpy() for name in table.column_names}
+        length = table.num_rows
+    else:
+        pa = _import_pyarrow()
+        with pa.memory_map(str(path), "r") as source:
+            reader = pa.ipc.open_stream(source)
+            names = reader.schema.names if dense is None else dense
+            indices = [reader.schema.get_field_index(name) for name in names]
+            for name, index in zip(names, indices):
+                if index < 0:
+                    raise KeyError(f"Column '{name}' not found in {path}")
+            chunks = [[] for _ in names]
+            length = 0
+            for batch in reader:
+                length += batch.num_rows
+                for chunk, index in zip(chunks, indices):
+                    # Numeric columns are views on the memory map, booleans are unpacked from bits
+                    chunk.append(batch.column(index).to_numpy(zero_copy_only=False))
+            data = {name: np.concatenate(chunk) if chunk else np.array([]) for name, chunk in zip(names, chunks)}
+
+    if not changed:
+        return data
+    for name, column in load_changes(path, length, columns).items():
+        if fmt == "csv" and types[name] != "string":
+            column.values = column.values.astype(types[name])
+        data[name] = column
+    names = columns if columns is not None else _column_names(path)
+    missing = [name for name in names if name not in data]
+    if missing:
+        raise KeyError(f"Columns {', '.join(missing)} not found in {path}")
+    return {name: data[name] for name in names}
+
+
+def count_rows(path):
+    """ Number of rows of a result file, without loading its columns """
+
+    fmt = result_format(path)
+    if fmt == "csv":
+        with open(path, "rb") as f:
+            lines, last = 0, b"\n"
+            for block in iter(lambda: f.read(1 << 20), b""):
+                lines += block.count(b"\n")
+                last = block[-1:]
+        return max(lines - 1 + (last != b"\n"), 0) # Without the header
+    if fmt == "xor":
+        from .compression import iter_xor
+        return sum(n for n, _ in iter_xor(path, []))
+    pa = _import_pyarrow()
+    if fmt == "arrow":
+        with pa.OSFile(str(path), "rb") as source:
+            return sum(batch.num_rows for batch in pa.ipc.open_stream(source))
+    import pyarrow.parquet as pq
+    return pq.ParquetFile(str(path)).metadata.num_rows
+
+
+def _rechunk(blocks, chunk_rows):
+    """ Join consecutive blocks ({name: array}) into copies of at least `chunk_rows` rows """
+
+    pending, rows = [], 0
+    for block in blocks:
+        pending.append(block)
+        rows += len(next(iter(block.values())))
+        if rows >= chunk_rows:
+            yield {name: np.concatenate([b[name] for b in pending]) for name in pending[0]}
+            pending, rows = [], 0
+    if pending:
+        yield {name: np.concatenate([b[name] for b in pending]) for name in pending[0]}
+
+
+def iter_columns(path, columns=None, chunk_rows=1 << 16):
+    """ Read the selected columns of a result file chunk by chunk, in memory bounded by the chunk size
+
+    Arrow files are read record batch by record batch, Parquet and CSV
+    files by batches of `chunk_rows` rows and .xor files block by block. The
+    columns stored in a change log are expanded chunk by chunk.
+
+    Parameters:
+        path         result file (.arrow, .parquet, .xor or .csv)
+        columns      names of the columns to read, all columns if None
+        chunk_rows   rows per chunk (at least, for the Arrow and .xor files, whose batches are joined up to it)
+
+    Yields:
+        (first row of the chunk, {column name: NumPy array})
+    """
+
+    fmt = result_format(path)
+    names = list(columns) if columns is not None else _column_names(path)
+    changed = _change_types(path)
+    dense = [name for name in names if name not in changed] or _column_names(path)[:1]
+    # The types of the CSV columns are known from a first pass, so that every chunk of a column has the same
+    # type
+    types = dict(result_schema(path, names + dense)) if fmt == "csv" else {}
+    changes = {}
+    if any(name in changed for name in names):
+        changes = load_changes(path, count_rows(path), [name for name in names if name in changed])
+        for name, column in changes.items():
+            if fmt == "csv" and types[name] != "string":
+                column.values = column.values.astype(types[name])
+
+    if fmt == "csv":
+        import pandas as pd
+        chunks = ({name: df[name].to_numpy() for name in dense} for df in pd.read_csv(
+            path, usecols=dense, dtype=_csv_dtypes(types, dense), engine="c", chunksize=chunk_rows))
+    elif fmt == "xor":
+        from .compression import iter_xor
+        chunks = _rechunk((block for _, block in iter_xor(path, dense)), chunk_rows)
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+        chunks = ({name: batch.column(name).to_numpy(zero_copy_only=False) for name in dense}
+                  for batch in pq.ParquetFile(str(path)).iter_batches(batch_size=chunk_rows, columns=dense))
+    else:
+        chunks = _rechunk(_arrow_batches(path, dense), chunk_rows)
+
+    offset = 0
+    for chunk in chunks:
+        n = len(chunk[dense[0]])
+        for name, column in changes.items():
+            chunk[name] = column[offset:offset + n]
+        missing = [name for name in names if name not in chunk]
+        if missing:
+            raise KeyError(f"Columns {', '.join(missing)} not found in {path}")
+        yield offset, {name: chunk[name] for name in names}
+        offset += n
+
+
+def _arrow_batches(path, names):
+    """ Yield the selected columns of each record batch of an Arrow file, read one batch at a time """
+
+    pa = _import_pyarrow()
+    with pa.OSFile(str(path), "rb") as source:
+        reader = pa.ipc.open_stream(source)
+        indices = [reader.schema.get_field_index(name) for name in names]
+        for name, index in zip(names, indices):
+            if index < 0:
+                raise KeyError(f"Column '{name}' not found in {path}")
+        for batch in reader:
+            yield {name: batch.column(index).to_numpy(zero_copy_only=False) for name, index in zip(names, indices)}
+
+
+def _column_names(path):
+    """ Names of the columns of a result file, in their order """
+
+    fmt = result_format(path)
+    if fmt == "csv":
+        with open(path, newline="") as f:
+            return next(csv.reader(f))
+    if fmt == "xor":
+        from .compression import read_xor_schema
+        return [name for name, _, _ in read_xor_schema(path)]
+    pa = _import_pyarrow()
+    if fmt == "arrow":
+        with pa.memory_map(str(path), "r") as source:
+            return pa.ipc.open_stream(source).schema.names
+    import pyarrow.parquet as pq
+    return pq.read_schema(str(path)).names
+
+
+def _csv_type(values):
+    """ Type of a column parsed from a CSV file: float32 when all its values are float32 values, as the master records
+    the Float32 variables, or the type pandas parses otherwise (bool, int64, float64, or string for any other column)
+    """
+
+    if values.dtype.kind == "f":
+        with np.errstate(over="ignore"):
+            narrow = values.astype(np.float32)
+        inexact = (narrow != values) & ~np.isnan(values)
+        # The other values may be written as the shortest text of a float32 (np.float32 values)
+        exact = np.array_equal(narrow[inexact].astype(str).astype(np.float64), values[inexact])
+        return "float32" if exact else "float64"
+    if values.dtype.kind in "iu":
+        return "int64"
+    return "bool" if values.dtype == bool else "string"
+
+
+def _join_types(previous, dtype):
+    """ Type of a CSV column whose chunks have the types `previous` (None before the first chunk) and `dtype` """
+
+    if previous is None or previous == dtype:
+        return dtype
+    numeric = ("int64", "float32", "float64")
+    # float64 holds the float32 values and the integers of CSV results exactly
+    return "float64" if previous in numeric and dtype in numeric else "string"
+
+
+def _csv_dtypes(types, names):
+    """ pandas dtypes to parse the columns `names` of a CSV file with the types `types` """
+
+    return {name: str if types[name] == "string" else types[name] for name in names}
+
+
+def result_schema(path, columns=None):
+    """ The columns of a result file and their types, as ResultWriter takes them
+
+    Arrow, Parquet and .xor files record the types, the logged type for the
+    columns stored as changes. CSV files do not: their columns are parsed
+    chunk by chunk and take the type of their values (float32 when every value
+    is a float32 value).
+
+    Parameters:
+        path      result file (.arrow, .parquet, .xor or .csv)
+        columns   names of the columns, all columns if None
+
+    Returns:
+        a list of (column name, type) tuples
+    """
+
+    fmt = result_format(path)
+    names = list(dict.fromkeys(columns)) if columns is not None else _column_names(path)
+
+    if fmt == "csv":
+        import pandas as pd
+        changed = _change_types(path)
+        dense = [name for name in names if name not in changed]
+        types = dict.fromkeys(names)
+        if dense:
+            for chunk in pd.read_csv(path, usecols=dense, chunksize=1 << 16, float_precision="round_trip"):
+                for name in dense:
+                    types[name] = _join_types(types[name], _csv_type(chunk[name].to_numpy()))
+        logged = [name for name in names if name in changed]
+        if logged:
+            for name, column in load_changes(path, count_rows(path), logged).items():
+                types[name] = _csv_type(column.values)
+        # Columns without values are read as float64 (NaN) by pandas
+        schema = {name: dtype or "float64" for name, dtype in types.items()}
+    elif fmt == "xor":
+        from .compression import read_xor_schema
+        schema = {name: changes or dtype for name, dtype, changes in read_xor_schema(path)}
+    else:
+        pa = _import_pyarrow()
+        if fmt == "arrow":
+            with pa.memory_map(str(path), "r") as source:
+                fields = pa.ipc.open_stream(source).schema
+        else:
+            import pyarrow.parquet as pq
+            fields = pq.read_schema(str(path))
+        # The aliases of the floating point types differ from their names (double, float)
+        aliases = {pa.float64(): "float64", pa.float32(): "float32", pa.float16(): "float16"}
+        schema = {field.name: field.metadata[b"changes"].decode() if field.metadata and b"changes" in field.metadata
+                  else aliases.get(field.type, str(field.type)) for field in fields}
+
+    missing = [name for name in names if name not in schema]
+    if missing:
+        raise KeyError(f"Columns {', '.join(missing)} not found in {path}")
+    return [(name, schema[name]) for name in names]
+
+
+def convert_results(source, destination, chunk_size=100000, changes=()):
+    """ Convert a result file to another format (e.g. a recorded CSV to Arrow), chunk by chunk
+
+    The columns and their types are those of the source (result_schema). The
+    columns named in `changes` are stored as a log of their changes in the
+    destination.
+    """
+
+    import pandas as pd
+
+    schema = result_schema(source)
+    if result_format(source) == "csv" and not changes_path(source).exists():
+        # The exact parser, so that the values are converted bit for bit
+        chunks = pd.read_csv(source, chunksize=chunk_size, dtype=_csv_dtypes(dict(schema), dict(schema)),
+                             float_precision="round_trip")
+    else:
+        chunks = [read_results(source)]
+
+    with ResultWriter(destination, schema=schema, flush_every=chunk_size, changes=changes) as writer:
+        for chunk in chunks:
+            for row in chunk[writer.columns].itertuples(index=False, name=None):
+                writer.write_row(*row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a co-simulation result file to another format.")
+    parser.add_argument("source", type=str, help="Input results file (.arrow, .parquet, .xor or .csv)")
+    parser.add_argument("destination", type=str, help="Output results file (.arrow, .parquet, .xor or .csv)")
+    parser.add_argument("--changes-only", action="store_true",
+                        help=f"Store the columns of {', '.join(CHANGE_COLUMNS)} that the source has as a log of their "
+                             "changes")
+    parser.add_argument("--changes", type=str, default=None, metavar="COLUMNS",
+                        help="Store these comma-separated columns as a log of their changes instead")
+    args = parser.parse_args()
+    changes = ()
+    if args.changes:
+        changes = args.changes.split(",")
+    elif args.changes_only:
+        names = _column_names(args.source)
+        changes = [name for name in CHANGE_COLUMNS if name in names]
+    convert_results(args.source, args.destination, changes=changes)
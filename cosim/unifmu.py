@@ -0,0 +1,653 @@
+""" Direct connection to the Python backend of a UniFMU FMU
+
+The UniFMU binary starts `backend.py` and exchanges protobuf messages with it
+over ZeroMQ: the backend connects a REQ socket to UNIFMU_DISPATCHER_ENDPOINT,
+sends a handshake and then answers one command at a time. BackendConnection
+plays the role of the binary from Python, which allows the backends to be
+driven, measured and tested on any platform without the shared library.
+BackendSlave wraps a connection in the interface of fmpy's FMU3Slave, so a
+master algorithm runs the same way with or without the binary.
+AsyncBackendConnection and AsyncBackendSlave are their asyncio counterparts,
+whose calls are awaited (see cosim.async_orchestrator).
+"""
+
+import asyncio
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import zmq
+import zmq.asyncio
+
+
+_schemas = {}
+
+
+def load_schema(resources_dir, name="fmi3_messages_pb2"):
+    """ Import a generated protobuf module from the `schemas` folder of an FMU's resources
+
+    The module is imported once per process, as protobuf registers its
+    descriptors in a process-wide pool.
+    """
+
+    if name not in _schemas:
+        path = Path(resources_dir) / "schemas" / f"{name}.py"
+        spec = importlib.util.spec_from_file_location(f"cosim_unifmu_{name}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _schemas[name] = module
+    return _schemas[name]
+
+
+class BackendError(Exception):
+    """ Raised when a backend does not start or does not answer """
+
+
+class BackendConnection:
+    """ Starts `backend.py` of an extracted FMU and sends it FMI3 commands
+
+    Parameters:
+        resources_dir   the `resources` folder of the FMU (containing backend.py and model.py)
+        bind_address    address on which the dispatcher socket is bound, a random port is used
+        env             additional environment variables for the backend process
+        timeout         time in ms to wait for each reply, None to wait as long as the backend runs
+        stdout, stderr  passed to subprocess.Popen, e.g. subprocess.DEVNULL to silence the backend log
+        python_options  options of the Python interpreter running the backend, e.g. ["-X", "importtime"]
+
+    While waiting for a reply, the backend process is checked every `poll_interval` ms,
+    and a BackendError with its exit code is raised if it has exited (e.g. model.py failed to import).
+    The backend is therefore asked to send its handshake before importing the model (UNIFMU_EARLY_HANDSHAKE).
+    """
+
+    poll_interval = 100
+
+    def __init__(self, resources_dir, bind_address="tcp://127.0.0.1", env=None, timeout=None, stdout=None, stderr=None,
+                 python_options=()):
+        self.resources_dir = Path(resources_dir).resolve()
+        self.messages = load_schema(self.resources_dir)
+        handshake = load_schema(self.resources_dir, "unifmu_handshake_pb2")
+        self.timeout = timeout
+        self.stdout, self.stderr = stdout, stderr
+        self.python_options = python_options
+        self.process = None
+
+        self.socket = zmq.Context.instance().socket(zmq.REP)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.setsockopt(zmq.RCVTIMEO, self.poll_interval)
+        port = self.socket.bind_to_random_port(bind_address)
+        self.endpoint = f"{bind_address}:{port}"
+
+        self.process = self._start_backend({**(env or {}), "UNIFMU_DISPATCHER_ENDPOINT": self.endpoint,
+                                            "UNIFMU_EARLY_HANDSHAKE": "1"})
+
+        reply = handshake.HandshakeReply()
+        reply.ParseFromString(self._recv())
+        if reply.status != handshake.HandshakeStatus.OK:
+            self.close()
+            raise BackendError(f"Backend in {self.resources_dir} failed the handshake")
+
+        self._return_types = {}
+
+    def _start_backend(self, env):
+        """ Start backend.py with the additional environment variables `env`, return its process """
+        return subprocess.Popen([sys.executable, *self.python_options, "backend.py"], cwd=self.resources_dir,
+                                env={**os.environ, **env}, stdout=self.stdout, stderr=self.stderr)
+
+    def _exited(self):
+        """ Exit code of the backend process, None while it runs """
+        return self.process.poll() if self.process is not None else -1
+
+    def _recv(self):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout / 1000
+        while True:
+            try:
+                return self.socket.recv()
+            except zmq.Again:
+                pass
+            code = self._exited()
+            if code is not None:
+                try:
+                    return self.socket.recv(zmq.NOBLOCK) # A reply sent just before exiting
+                except zmq.Again:
+                    self.close()
+                    raise BackendError(f"Backend in {self.resources_dir} exited with code {code}")
+            if deadline is not None and time.monotonic() > deadline:
+                self.close()
+                raise BackendError(f"Backend in {self.resources_dir} did not answer")
+
+    def return_type(self, name):
+        """ Protobuf message class of the reply to command `name` """
+
+        if name not in self._return_types:
+            if hasattr(self.messages, f"{name}Return"):
+                return_type = getattr(self.messages, f"{name}Return")
+            elif name.startswith("Fmi3Instantiate"):
+                return_type = self.messages.Fmi3EmptyReturn
+            else:
+                return_type = self.messages.Fmi3StatusReturn
+            self._return_types[name] = return_type
+        return self._return_types[name]
+
+    def command(self, name, **fields):
+        """ Build an Fmi3Command for `name` (e.g. 'Fmi3DoStep') with the given fields """
+
+        command = self.messages.Fmi3Command()
+        message = getattr(command, name)
+        message.SetInParent()
+        for field, value in fields.items():
+            if isinstance(value, (list, tuple)):
+                getattr(message, field)[:] = value
+            else:
+                setattr(message, field, value)
+        return command
+
+    def send(self, command):
+        """ Send a prepared Fmi3Command and return the parsed reply """
+
+        self.socket.send(command.SerializeToString())
+        reply = self.return_type(command.WhichOneof("command"))()
+        reply.ParseFromString(self._recv())
+        return reply
+
+    def call(self, name, **fields):
+        """ Send command `name` with the given fields and return the parsed reply """
+        return self.send(self.command(name, **fields))
+
+    def close(self):
+        """ Free the instance (which stops the backend) and close the socket """
+
+        if self.process is not None and self.process.poll() is None:
+            try:
+                self.socket.send(self.command("Fmi3FreeInstance").SerializeToString())
+                self.process.wait(timeout=10)
+            except (zmq.ZMQError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+        self.socket.close()
+
+
+def _getter(type_name):
+    command = f"Fmi3Get{type_name}"
+
+    def get(self, vr, nValues=None):
+        return list(self._call(command, value_references=vr).values)
+
+    get.__name__ = f"get{type_name}"
+    return get
+
+
+def _setter(type_name):
+    command = f"Fmi3Set{type_name}"
+
+    def set(self, vr, values):
+        self._call(command, value_references=vr, values=values)
+
+    set.__name__ = f"set{type_name}"
+    return set
+
+
+def _fill_fused_step(data, currentCommunicationPoint, communicationStepSize, noSetFMUStatePriorToCurrentPoint,
+                     inputs, outputs):
+    data.current_communication_point = currentCommunicationPoint
+    data.communication_step_size = communicationStepSize
+    data.no_set_fmu_state_prior_to_current_point = noSetFMUStatePriorToCurrentPoint
+    for type_name, vrs, values in inputs:
+        group = getattr(data, f"set_{type_name.lower()}")
+        group.value_references[:] = vrs
+        group.values[:] = values
+    for type_name, vrs in outputs:
+        getattr(data, f"get_{type_name.lower()}").value_references[:] = vrs
+
+
+def _fill_coalesced_steps(data, steps, outputs):
+    last = len(steps) - 1
+    for k, (currentCommunicationPoint, communicationStepSize, inputs) in enumerate(steps):
+        _fill_fused_step(data.steps.add(), currentCommunicationPoint, communicationStepSize, True, inputs,
+                         outputs if k == last else ())
+
+
+def _check_coalesced_reply(reply, n_steps, instance_name):
+    if reply.status > 1:
+        raise BackendError(f"Fmi3CoalescedDoStep of {instance_name} returned status {reply.status} "
+                           f"at step {reply.steps_done} of {n_steps}")
+    if reply.steps_done < n_steps:
+        raise BackendError(f"Fmi3CoalescedDoStep of {instance_name} stopped at step {reply.steps_done} of {n_steps}, "
+                           f"which needs event handling or terminates")
+
+
+def _fused_step_results(reply, outputs):
+    values = [list(getattr(reply, f"{type_name.lower()}_values")) for type_name, _ in outputs]
+    return reply.event_handling_needed, reply.terminate_simulation, reply.early_return, reply.last_successful_time, values
+
+
+class BackendSlave:
+    """ A co-simulation FMU with the methods and return values of fmpy's FMU3Slave,
+    served by the FMU's backend.py through a BackendConnection instead of the UniFMU binary
+
+    Parameters:
+        unzipDirectory  folder of the extracted FMU (or the FMU's source folder)
+        instanceName    name of the FMU instance
+        guid            instantiation token
+        **options       passed to BackendConnection (e.g. stderr=subprocess.DEVNULL)
+    """
+
+    connection_class = BackendConnection
+
+    # Called with the FMI function name and the time of each round trip to the backend, as fmpy's FMU3Slave
+    # calls it with the time of each call into the binary (see cosim.profiling)
+    fmiCallTimer = None
+
+    def __init__(self, unzipDirectory, instanceName=None, guid="", **options):
+        self.unzipDirectory = Path(unzipDirectory)
+        self.instanceName = instanceName
+        self.guid = guid
+        self.connection = self.connection_class(self.unzipDirectory / "resources", **options)
+
+    def _send(self, name, command):
+        if self.fmiCallTimer is None:
+            return self.connection.send(command)
+        start = time.perf_counter()
+        reply = self.connection.send(command)
+        self.fmiCallTimer("f" + name[1:], time.perf_counter() - start)
+        return reply
+
+    def _call(self, name, **fields):
+        reply = self._send(name, self.connection.command(name, **fields))
+        status = getattr(reply, "status", 0)
+        if status > 1: # Worse than fmi3Warning, as FMICallException in fmpy
+            raise BackendError(f"{name} of {self.instanceName} returned status {status}")
+        return reply
+
+    # ================= Instance =================
+
+    def instantiate(self, visible=False, loggingOn=False, eventModeUsed=False, earlyReturnAllowed=False,
+                    logMessage=None, intermediateUpdate=None):
+        self._call("Fmi3InstantiateCoSimulation", instance_name=self.instanceName, instantiation_token=self.guid,
+                   resource_path=str(self.connection.resources_dir) + os.path.sep, visible=visible,
+                   logging_on=loggingOn, event_mode_used=eventModeUsed, early_return_allowed=earlyReturnAllowed)
+
+    def enterInitializationMode(self, tolerance=None, startTime=0.0, stopTime=None):
+        self._call("Fmi3EnterInitializationMode", tolerance_defined=tolerance is not None, tolerance=tolerance or 0.0,
+                   start_time=startTime, stop_time_defined=stopTime is not None, stop_time=stopTime or 0.0)
+
+    def exitInitializationMode(self):
+        self._call("Fmi3ExitInitializationMode")
+
+    def enterEventMode(self):
+        self._call("Fmi3EnterEventMode")
+
+    def enterStepMode(self):
+        self._call("Fmi3EnterStepMode")
+
+    def terminate(self):
+        self._call("Fmi3Terminate")
+
+    def reset(self):
+        self._call("Fmi3Reset")
+
+    def freeInstance(self):
+        self.connection.close()
+
+    # ================= Simulation =================
+
+    def doStep(self, currentCommunicationPoint, communicationStepSize, noSetFMUStatePriorToCurrentPoint=True):
+        reply = self._call("Fmi3DoStep", current_communication_point=currentCommunicationPoint,
+                           communication_step_size=communicationStepSize,
+                           no_set_fmu_state_prior_to_current_point=noSetFMUStatePriorToCurrentPoint)
+        return reply.event_handling_needed, reply.terminate_simulation, reply.early_return, reply.last_successful_time
+
+    def fusedDoStep(self, currentCommunicationPoint, communicationStepSize, noSetFMUStatePriorToCurrentPoint=True,
+                    inputs=(), outputs=()):
+        """ The set calls of `inputs`, doStep and the get calls of `outputs` in one round trip (Fmi3FusedDoStep)
+
+        Parameters:
+            inputs    (type name, value references, values) per type, e.g. [("Float32", [0], [21.5])]
+            outputs   (type name, value references) per type, the type "Derivative" for the first order
+                      output derivatives (getOutputDerivatives)
+
+        Returns (eventHandlingNeeded, terminateSimulation, earlyReturn, lastSuccessfulTime, values), where
+        `values` holds the list of values of each entry of `outputs`.
+        """
+
+        command = self.connection.command("Fmi3FusedDoStep")
+        _fill_fused_step(command.Fmi3FusedDoStep, currentCommunicationPoint, communicationStepSize,
+                         noSetFMUStatePriorToCurrentPoint, inputs, outputs)
+        reply = self._send("Fmi3FusedDoStep", command)
+        if reply.status > 1:
+            raise BackendError(f"Fmi3FusedDoStep of {self.instanceName} returned status {reply.status}")
+        return _fused_step_results(reply, outputs)
+
+    def coalescedDoStep(self, steps, outputs=()):
+        """ Several fused steps in one round trip (Fmi3CoalescedDoStep), e.g. the deferred steps of a dormant FMU
+
+        Parameters:
+            steps     (currentCommunicationPoint, communicationStepSize, inputs) per step, inputs as in fusedDoStep
+            outputs   (type name, value references) per type, read after the last step
+
+        Returns the results of the last step as fusedDoStep. A BackendError is raised if a step
+        before the last one needs event handling or terminates, as the following steps are then not done.
+        """
+
+        command = self.connection.command("Fmi3CoalescedDoStep")
+        _fill_coalesced_steps(command.Fmi3CoalescedDoStep, steps, outputs)
+        reply = self._send("Fmi3CoalescedDoStep", command)
+        _check_coalesced_reply(reply, len(steps), self.instanceName)
+        return _fused_step_results(reply, outputs)
+
+    def updateDiscreteStates(self):
+        reply = self._call("Fmi3UpdateDiscreteStates")
+        return (reply.discrete_states_need_update, reply.terminate_simulation, reply.nominals_continuous_states_changed,
+                reply.values_continuous_states_changed, reply.next_event_time_defined, reply.next_event_time)
+
+    # ================= Getters and setters =================
+
+    getFloat32 = _getter("Float32")
+    getFloat64 = _getter("Float64")
+    getInt8 = _getter("Int8")
+    getUInt8 = _getter("UInt8")
+    getInt16 = _getter("Int16")
+    getUInt16 = _getter("UInt16")
+    getInt32 = _getter("Int32")
+    getUInt32 = _getter("UInt32")
+    getInt64 = _getter("Int64")
+    getUInt64 = _getter("UInt64")
+    getBoolean = _getter("Boolean")
+    getString = _getter("String")
+    getClock = _getter("Clock")
+
+    setFloat32 = _setter("Float32")
+    setFloat64 = _setter("Float64")
+    setInt8 = _setter("Int8")
+    setUInt8 = _setter("UInt8")
+    setInt16 = _setter("Int16")
+    setUInt16 = _setter("UInt16")
+    setInt32 = _setter("Int32")
+    setUInt32 = _setter("UInt32")
+    setInt64 = _setter("Int64")
+    setUInt64 = _setter("UInt64")
+    setBoolean = _setter("Boolean")
+    setString = _setter("String")
+    setClock = _setter("Clock")
+
+    def getIntervalDecimal(self, valueReferences):
+        reply = self._call("Fmi3GetIntervalDecimal", value_references=valueReferences)
+        return list(reply.intervals), list(reply.qualifiers)
+
+    def setIntervalDecimal(self, valueReferences, intervals):
+        self._call("Fmi3SetIntervalDecimal", value_references=valueReferences, intervals=intervals)
+
+    def getOutputDerivatives(self, vr, order):
+        return list(self._call("Fmi3GetOutputDerivatives", value_references=vr, orders=order).values)
+
+    # ================= FMU state =================
+
+    def getFMUState(self):
+        """ The FMU state is the serialized state returned by the backend """
+        return self._call("Fmi3SerializeFmuState").state
+
+    def setFMUState(self, state):
+        self._call("Fmi3DeserializeFmuState", state=state)
+
+    def freeFMUState(self, state):
+        pass
+
+
+class AsyncBackendConnection(BackendConnection):
+    """ BackendConnection for asyncio: the backend is started by `await start()` and the replies are awaited,
+    so the waits for many backends overlap in one event loop
+
+    Parameters:
+        as BackendConnection
+    """
+
+    def __init__(self, resources_dir, bind_address="tcp://127.0.0.1", env=None, timeout=None, stdout=None, stderr=None,
+                 python_options=()):
+        self.resources_dir = Path(resources_dir).resolve()
+        self.messages = load_schema(self.resources_dir)
+        self.bind_address = bind_address
+        self.env = env
+        self.timeout = timeout
+        self.stdout, self.stderr = stdout, stderr
+        self.python_options = python_options
+        self.process = None
+        self.socket = None
+        self._return_types = {}
+
+    async def start(self):
+        """ Start the backend and wait for its handshake """
+
+        handshake = load_schema(self.resources_dir, "unifmu_handshake_pb2")
+        self.socket = zmq.asyncio.Context.instance().socket(zmq.REP)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.setsockopt(zmq.RCVTIMEO, self.poll_interval)
+        port = self.socket.bind_to_random_port(self.bind_address)
+        self.endpoint = f"{self.bind_address}:{port}"
+
+        self.process = self._start_backend({**(self.env or {}), "UNIFMU_DISPATCHER_ENDPOINT": self.endpoint,
+                                            "UNIFMU_EARLY_HANDSHAKE": "1"})
+
+        reply = handshake.HandshakeReply()
+        reply.ParseFromString(await self._recv())
+        if reply.status != handshake.HandshakeStatus.OK:
+            await self.close()
+            raise BackendError(f"Backend in {self.resources_dir} failed the handshake")
+
+    async def _recv(self):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout / 1000
+        while True:
+            try:
+                return await self.socket.recv()
+            except zmq.Again:
+                pass
+            code = self._exited()
+            # Unless a reply was sent just before exiting
+            if code is not None and not self.socket.getsockopt(zmq.EVENTS) & zmq.POLLIN:
+                self.kill()
+                raise BackendError(f"Backend in {self.resources_dir} exited with code {code}")
+            if deadline is not None and time.monotonic() > deadline:
+                self.kill()
+                raise BackendError(f"Backend in {self.resources_dir} did not answer")
+
+    async def send(self, command):
+        """ Send a prepared Fmi3Command and return the parsed reply """
+
+        await self.socket.send(command.SerializeToString())
+        reply = self.return_type(command.WhichOneof("command"))()
+        reply.ParseFromString(await self._recv())
+        return reply
+
+    async def call(self, name, **fields):
+        """ Send command `name` with the given fields and return the parsed reply """
+        return await self.send(self.command(name, **fields))
+
+    async def close(self):
+        """ Free the instance (which stops the backend) and close the socket """
+
+        if self.process is not None and self.process.poll() is None:
+            try:
+                await self.socket.send(self.command("Fmi3FreeInstance").SerializeToString())
+                for _ in range(1000): # 10 s
+                    if self.process.poll() is not None:
+                        break
+                    await asyncio.sleep(0.01)
+            except zmq.ZMQError:
+                pass
+        self.kill()
+
+    def kill(self):
+        """ Stop the backend without waiting for it to free the instance (e.g. outside the event loop) """
+
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
+
+
+def _async_getter(type_name):
+    command = f"Fmi3Get{type_name}"
+
+    async def get(self, vr, nValues=None):
+        return list((await self._call(command, value_references=vr)).values)
+
+    get.__name__ = f"get{type_name}"
+    return get
+
+
+def _async_setter(type_name):
+    command = f"Fmi3Set{type_name}"
+
+    async def set(self, vr, values):
+        await self._call(command, value_references=vr, values=values)
+
+    set.__name__ = f"set{type_name}"
+    return set
+
+
+class AsyncBackendSlave:
+    """ BackendSlave with coroutine methods, served through an AsyncBackendConnection
+
+    The backend is started by instantiate(). Each instance must be awaited by
+    one task at a time, as its backend answers one command at a time.
+
+    Parameters:
+        as BackendSlave
+    """
+
+    connection_class = AsyncBackendConnection
+
+    def __init__(self, unzipDirectory, instanceName=None, guid="", **options):
+        self.unzipDirectory = Path(unzipDirectory)
+        self.instanceName = instanceName
+        self.guid = guid
+        self.connection = self.connection_class(self.unzipDirectory / "resources", **options)
+
+    async def _call(self, name, **fields):
+        reply = await self.connection.call(name, **fields)
+        status = getattr(reply, "status", 0)
+        if status > 1:
+            raise BackendError(f"{name} of {self.instanceName} returned status {status}")
+        return reply
+
+    # ================= Instance =================
+
+    async def instantiate(self, visible=False, loggingOn=False, eventModeUsed=False, earlyReturnAllowed=False,
+                          logMessage=None, intermediateUpdate=None):
+        await self.connection.start()
+        await self._call("Fmi3InstantiateCoSimulation", instance_name=self.instanceName, instantiation_token=self.guid,
+                         resource_path=str(self.connection.resources_dir) + os.path.sep, visible=visible,
+                         logging_on=loggingOn, event_mode_used=eventModeUsed, early_return_allowed=earlyReturnAllowed)
+
+    async def enterInitializationMode(self, tolerance=None, startTime=0.0, stopTime=None):
+        await self._call("Fmi3EnterInitializationMode", tolerance_defined=tolerance is not None,
+                         tolerance=tolerance or 0.0, start_time=startTime, stop_time_defined=stopTime is not None,
+                         stop_time=stopTime or 0.0)
+
+    async def exitInitializationMode(self):
+        await self._call("Fmi3ExitInitializationMode")
+
+    async def enterEventMode(self):
+        await self._call("Fmi3EnterEventMode")
+
+    async def enterStepMode(self):
+        await self._call("Fmi3EnterStepMode")
+
+    async def terminate(self):
+        await self._call("Fmi3Terminate")
+
+    async def reset(self):
+        await self._call("Fmi3Reset")
+
+    async def freeInstance(self):
+        await self.connection.close()
+
+    # ================= Simulation =================
+
+    async def doStep(self, currentCommunicationPoint, communicationStepSize, noSetFMUStatePriorToCurrentPoint=True):
+        reply = await self._call("Fmi3DoStep", current_communication_point=currentCommunicationPoint,
+                                 communication_step_size=communicationStepSize,
+                                 no_set_fmu_state_prior_to_current_point=noSetFMUStatePriorToCurrentPoint)
+        return reply.event_handling_needed, reply.terminate_simulation, reply.early_return, reply.last_successful_time
+
+    async def fusedDoStep(self, currentCommunicationPoint, communicationStepSize, noSetFMUStatePriorToCurrentPoint=True,
+                          inputs=(), outputs=()):
+        """ As BackendSlave.fusedDoStep """
+
+        command = self.connection.command("Fmi3FusedDoStep")
+        _fill_fused_step(command.Fmi3FusedDoStep, currentCommunicationPoint, communicationStepSize,
+                         noSetFMUStatePriorToCurrentPoint, inputs, outputs)
+        reply = await self.connection.send(command)
+        if reply.status > 1:
+            raise BackendError(f"Fmi3FusedDoStep of {self.instanceName} returned status {reply.status}")
+        return _fused_step_results(reply, outputs)
+
+    async def coalescedDoStep(self, steps, outputs=()):
+        """ As BackendSlave.coalescedDoStep """
+
+        command = self.connection.command("Fmi3CoalescedDoStep")
+        _fill_coalesced_steps(command.Fmi3CoalescedDoStep, steps, outputs)
+        reply = await self.connection.send(command)
+        _check_coalesced_reply(reply, len(steps), self.instanceName)
+        return _fused_step_results(reply, outputs)
+
+    async def updateDiscreteStates(self):
+        reply = await self._call("Fmi3UpdateDiscreteStates")
+        return (reply.discrete_states_need_update, reply.terminate_simulation, reply.nominals_continuous_states_changed,
+                reply.values_continuous_states_changed, reply.next_event_time_defined, reply.next_event_time)
+
+    # ================= Getters and setters =================
+
+    getFloat32 = _async_getter("Float32")
+    getFloat64 = _async_getter("Float64")
+    getInt8 = _async_getter("Int8")
+    getUInt8 = _async_getter("UInt8")
+    getInt16 = _async_getter("Int16")
+    getUInt16 = _async_getter("UInt16")
+    getInt32 = _async_getter("Int32")
+    getUInt32 = _async_getter("UInt32")
+    getInt64 = _async_getter("Int64")
+    getUInt64 = _async_getter("UInt64")
+    getBoolean = _async_getter("Boolean")
+    getString = _async_getter("String")
+    getClock = _async_getter("Clock")
+
+    setFloat32 = _async_setter("Float32")
+    setFloat64 = _async_setter("Float64")
+    setInt8 = _async_setter("Int8")
+    setUInt8 = _async_setter("UInt8")
+    setInt16 = _async_setter("Int16")
+    setUInt16 = _async_setter("UInt16")
+    setInt32 = _async_setter("Int32")
+    setUInt32 = _async_setter("UInt32")
+    setInt64 = _async_setter("Int64")
+    setUInt64 = _async_setter("UInt64")
+    setBoolean = _async_setter("Boolean")
+    setString = _async_setter("String")
+    setClock = _async_setter("Clock")
+
+    async def getIntervalDecimal(self, valueReferences):
+        reply = await self._call("Fmi3GetIntervalDecimal", value_references=valueReferences)
+        return list(reply.intervals), list(reply.qualifiers)
+
+    async def setIntervalDecimal(self, valueReferences, intervals):
+        await self._call("Fmi3SetIntervalDecimal", value_references=valueReferences, intervals=intervals)
+
+    async def getOutputDerivatives(self, vr, order):
+        return list((await self._call("Fmi3GetOutputDerivatives", value_references=vr, orders=order)).values)
+
+    # ================= FMU state =================
+
+    async def getFMUState(self):
+        return (await self._call("Fmi3SerializeFmuState")).state
+
+    async def setFMUState(self, state):
+        await self._call("Fmi3DeserializeFmuState", state=state)
+
+    def freeFMUState(self, state):
+        pass
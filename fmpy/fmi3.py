@@ -2,6 +2,7 @@
 
 import os
 from ctypes import *
+from time import perf_counter
 from typing import Tuple, Sequence, List, Iterable
 
 from . import sharedLibraryExtension, platform_tuple
@@ -83,6 +84,9 @@ class _FMU3(_FMU):
 
     def __init__(self, **kwargs):
 
+        # optional callback that receives the name and duration [s] of each FMI call
+        self.fmiCallTimer = kwargs.pop('fmiCallTimer', None)
+
         # build the path to the shared library
         kwargs['libraryPath'] = os.path.join(kwargs['unzipDirectory'], 'binaries', platform_tuple,
                                              kwargs['modelIdentifier'] + sharedLibraryExtension)
@@ -464,7 +468,7 @@ class _FMU3(_FMU):
 
     def _fmi3Function(self, fname, params, restype=fmi3Status):
         """ Add an FMI 3.0 function to this instance and add a wrapper that allows
-        logging and checks the return code if the return type is fmi3Status
+        logging, timing and checks the return code if the return type is fmi3Status
 
         Parameters:
             fname     the name of the function
@@ -495,7 +499,12 @@ class _FMU3(_FMU):
             """ Wrapper function for the FMI call """
 
             # call the FMI function
-            res = f(*args)
+            if self.fmiCallTimer is None:
+                res = f(*args)
+            else:
+                start = perf_counter()
+                res = f(*args)
+                self.fmiCallTimer(fname, perf_counter() - start)
 
             if self.fmiCallLogger is not None:
                 # log the call
@@ -1,6 +1,10 @@
+import os
 import pickle
 from fractions import Fraction
 from enum import IntFlag
+from operator import attrgetter
+
+from plant_kernel import rk4_step
 
 class Model:
     def __init__(
@@ -82,6 +86,19 @@ class Model:
                                **self.parameters,
                                **self.tunable_parameters}
 
+        # Optional array-backed variable store (see store.py), enabled by the master through the environment
+        self.store = None
+        if os.environ.get("UNIFMU_VARIABLE_STORE"):
+            from store import attach_store
+            attach_store(self, os.environ["UNIFMU_VARIABLE_STORE"])
+
+        # Optional linear surrogate of the step (see surrogate.py), fitted to traces and saved as JSON
+        if os.environ.get("UNIFMU_PLANT_SURROGATE"):
+            from surrogate import attach_surrogate
+            attach_surrogate(self, os.environ["UNIFMU_PLANT_SURROGATE"])
+
+        self._compile_access_tables()
+
 
 
     # ================= FMI3 =================
@@ -94,27 +111,8 @@ class Model:
             no_set_fmu_state_prior_to_current_point: bool,
     ):
         power_in = self.V_heater * self.I_heater if self.in_heater_on else 0.0
-        power_out_box = self.G_box * (self.T - self.initial_room_temperature)
-        power_transfer_heat = self.G_heater * (self.T_heater - self.T)
-        total_power_box = power_transfer_heat - power_out_box
-        total_power_heater = power_in - power_transfer_heat
-        
-
-        der_T = lambda t,y: (1.0 / self.C_air) * y # Derivative of T
-        der_T_heater = lambda t,y: (1.0 / self.C_heater) * y # Derivative of T_heater
-
-        # Runge-Kutta 45
-        k1_T = der_T(current_communication_point, total_power_box)
-        k2_T = der_T(current_communication_point+(communication_step_size/2), total_power_box+communication_step_size*(k1_T/2))
-        k3_T = der_T(current_communication_point+(communication_step_size/2), total_power_box+communication_step_size*(k2_T/2))
-        k4_T = der_T(current_communication_point+communication_step_size, total_power_box+communication_step_size*k3_T)
-        self.T += communication_step_size*(k1_T + 2*k2_T + 2*k3_T + k4_T)/6
-
-        k1_T_heater = der_T_heater(current_communication_point, total_power_heater)
-        k2_T_heater = der_T_heater(current_communication_point+(communication_step_size/2), total_power_heater+communication_step_size*(k1_T_heater/2))
-        k3_T_heater = der_T_heater(current_communication_point+(communication_step_size/2), total_power_heater+communication_step_size*(k2_T_heater/2))
-        k4_T_heater = der_T_heater(current_communication_point+communication_step_size, total_power_heater+communication_step_size*k3_T_heater)
-        self.T_heater += communication_step_size*(k1_T_heater + 2*k2_T_heater + 2*k3_T_heater + k4_T_heater)/6
+        self.T, self.T_heater = rk4_step(self.T, self.T_heater, power_in, communication_step_size, self.C_air,
+                                         self.G_box, self.C_heater, self.G_heater, self.initial_room_temperature)
 
         event_handling_needed = False
         terminate_simulation = False
@@ -207,6 +205,9 @@ class Model:
     # ================= Serialization =================
 
     def fmi3SerializeFmuState(self):
+        if self.store is not None:
+            # All the plant's state is in its variables
+            return Fmi3Status.ok, self.store.dump()
 
         bytes = pickle.dumps(
             (
@@ -227,6 +228,10 @@ class Model:
         return Fmi3Status.ok, bytes
 
     def fmi3DeserializeFmuState(self, bytes: bytes):
+        if self.store is not None:
+            self.store.load(bytes)
+            return Fmi3Status.ok
+
         (
             C_air,
             G_box,
@@ -300,6 +305,19 @@ class Model:
     def fmi3GetClock(self, value_references):
         return self._get_value(value_references)
 
+    def fmi3GetOutputDerivatives(self, value_references, orders):
+        # First derivatives of T and T_heater at the current state and input, for the master to extrapolate
+        power_in = self.V_heater * self.I_heater if self.in_heater_on else 0.0
+        power_transfer_heat = self.G_heater * (self.T_heater - self.T)
+        derivatives = {
+            1: (power_transfer_heat - self.G_box * (self.T - self.initial_room_temperature)) / self.C_air,
+            2: (power_in - power_transfer_heat) / self.C_heater,
+        }
+        if any(r not in derivatives or order != 1 for r, order in zip(value_references, orders)):
+            return Fmi3Status.error, []
+
+        return Fmi3Status.ok, [derivatives[r] for r in value_references]
+
     def fmi3GetIntervalDecimal(self, value_references):
         intervals = []
         qualifiers = []
@@ -416,36 +434,76 @@ class Model:
 
     # ================= Helpers =================
 
-    def _set_value(self, references, values):
-        for r, v in zip(references, values):
+    def _compile_access_tables(self):
+        """ Precompute, per value reference, the attribute holding it and the FMIState bitmasks in which it can be set and read """
+
+        any_state = int(~FMIState(0))
+        event_or_initialization = int(FMIState.FMIEventModeState | FMIState.FMIInitializationModeState)
+        configuration = int(FMIState.FMIConfigurationModeState | FMIState.FMIReconfigurationModeState | FMIState.FMIInitializationModeState)
+
+        self.access_table = {}
+        for r, name in self.all_references.items():
             if (r in self.clocked_variables or r in self.tunable_parameters):
-                if (self.state == FMIState.FMIEventModeState or self.state == FMIState.FMIInitializationModeState):
-                    pass
-                else:
-                    return Fmi3Status.error
+                set_mask = event_or_initialization
             elif (r in self.tunable_structural_parameters):
-                if (self.state == FMIState.FMIConfigurationModeState or self.state == FMIState.FMIReconfigurationModeState or self.state == FMIState.FMIInitializationModeState):
-                    pass
-                else:
-                    return Fmi3Status.error
+                set_mask = configuration
             elif (r in self.parameters):
-                if (self.state == FMIState.FMIInitializationModeState):
-                    pass
+                set_mask = int(FMIState.FMIInitializationModeState)
+            else:
+                set_mask = any_state
+            get_mask = event_or_initialization if r in self.clocked_variables else any_state
+            self.access_table[r] = (name, get_mask, set_mask)
+
+        # Compiled (getter, setter, readable states, writable states) per sequence of value references
+        self.access_plans = {}
+        self.any_state = any_state
+
+    def _access_plan(self, references):
+        key = tuple(references)
+        plan = self.access_plans.get(key)
+        if plan is None:
+            names = []
+            get_mask = set_mask = self.any_state
+            for r in key:
+                name, get_allowed, set_allowed = self.access_table[r]
+                names.append(name)
+                get_mask &= get_allowed
+                set_mask &= set_allowed
+            accessors = self.store.accessors(key) if self.store is not None else None
+            if accessors is not None:
+                getter, setter = accessors # One slice or fancy-indexing operation on a store array
+            else:
+                if len(names) == 1:
+                    getter = lambda model, name=names[0]: (getattr(model, name),)
+                elif names:
+                    getter = attrgetter(*names)
                 else:
-                    return Fmi3Status.error
-            setattr(self, self.all_references[r], v)
+                    getter = lambda model: ()
+                if self.store is None:
+                    setter = lambda model, values, names=tuple(names): model.__dict__.update(zip(names, values))
+                else:
+                    setter = lambda model, values, names=tuple(names): [setattr(model, n, v) for n, v in zip(names, values)]
+            if len(self.access_plans) >= 64: # A master uses a handful of reference sets, bound the odd one
+                self.access_plans.clear()
+            # The combined masks are expanded to the sets of states they allow, one membership test per call
+            readable = frozenset(state for state in FMIState if state & get_mask)
+            writable = frozenset(state for state in FMIState if state & set_mask)
+            plan = self.access_plans[key] = (getter, setter, readable, writable)
+        return plan
+
+    def _set_value(self, references, values):
+        # All references are checked before any value is stored
+        _, setter, _, writable = self.access_plans.get(tuple(references)) or self._access_plan(references)
+        if self.state not in writable:
+            return Fmi3Status.error
+        setter(self, values)
         return Fmi3Status.ok
 
     def _get_value(self, references):
-
-        values = []
-        for r in references:
-            if r in self.clocked_variables:
-                if not ((self.state == FMIState.FMIEventModeState) or (self.state == FMIState.FMIInitializationModeState)):
-                    return Fmi3Status.error
-            values.append(getattr(self, self.all_references[r]))
-
-        return Fmi3Status.ok, values
+        getter, _, readable, _ = self.access_plans.get(tuple(references)) or self._access_plan(references)
+        if self.state not in readable:
+            return Fmi3Status.error, []
+        return Fmi3Status.ok, list(getter(self))
 
 
 
@@ -0,0 +1,86 @@
+""" Step kernel of the plant, compiled with numba when it is installed
+
+rk4_step is the arithmetic of Model.fmi3DoStep on plain floats, without the
+attribute lookups and the lambdas of the derivatives. With numba it is
+compiled to machine code that releases the GIL; without it (or with
+UNIFMU_KERNEL=python) it is the Python function itself, python_rk4_step. Both
+do the same float64 operations in the same order, so the results are those of
+the original step, bit for bit. The variables of the store (store.py) are read
+as Python floats too, and only rounded to float32 when the results are stored.
+NumPy is only imported with numba or for rk4_step_many, and numba caches the
+compiled kernel in NUMBA_CACHE_DIR (the unifmu-numba folder of the temporary
+directory by default) rather than in the resources of the FMU.
+
+rk4_step_many steps arrays of plants, e.g. an ensemble split across threads,
+which run in parallel with numba as the GIL is released.
+
+    power_in = V_heater * I_heater if heater_on else 0.0
+    T, T_heater = rk4_step(T, T_heater, power_in, dt, C_air, G_box, C_heater, G_heater, T_room)
+"""
+
+import os
+
+try:
+    if os.environ.get("UNIFMU_KERNEL", "numba") != "numba":
+        raise ImportError("UNIFMU_KERNEL is not numba")
+    if "NUMBA_CACHE_DIR" not in os.environ:
+        import tempfile
+        os.environ["NUMBA_CACHE_DIR"] = os.path.join(tempfile.gettempdir(), "unifmu-numba")
+    from numba import njit
+    import numpy as np # Imported by numba anyway
+except ImportError:
+    njit = None
+
+ACCELERATED = njit is not None
+
+
+def _jit(function):
+    """ `function` compiled without the GIL, or `function` itself without numba """
+    return function if njit is None else njit(nogil=True, cache=True)(function)
+
+
+def python_rk4_step(T, T_heater, power_in, dt, C_air, G_box, C_heater, G_heater, T_room):
+    """ (T, T_heater) after a step of `dt` with the heater power `power_in`, for floats or arrays """
+
+    power_out_box = G_box * (T - T_room)
+    power_transfer_heat = G_heater * (T_heater - T)
+    total_power_box = power_transfer_heat - power_out_box
+    total_power_heater = power_in - power_transfer_heat
+
+    # Runge-Kutta 45 of the derivatives y / C_air and y / C_heater
+    a = 1.0 / C_air
+    k1 = a * total_power_box
+    k2 = a * (total_power_box + dt * (k1 / 2))
+    k3 = a * (total_power_box + dt * (k2 / 2))
+    k4 = a * (total_power_box + dt * k3)
+    T = T + dt * (k1 + 2 * k2 + 2 * k3 + k4) / 6
+
+    a = 1.0 / C_heater
+    k1 = a * total_power_heater
+    k2 = a * (total_power_heater + dt * (k1 / 2))
+    k3 = a * (total_power_heater + dt * (k2 / 2))
+    k4 = a * (total_power_heater + dt * k3)
+    T_heater = T_heater + dt * (k1 + 2 * k2 + 2 * k3 + k4) / 6
+    return T, T_heater
+
+
+rk4_step = _jit(python_rk4_step)
+
+
+def _rk4_step_many(T, T_heater, heater_on, dt, C_air, G_box, C_heater, G_heater, V_heater, I_heater, T_room):
+    T_next, T_heater_next = np.empty_like(T), np.empty_like(T_heater)
+    power = V_heater * I_heater
+    for i in range(T.shape[0]):
+        T_next[i], T_heater_next[i] = rk4_step(T[i], T_heater[i], power if heater_on[i] else 0.0, dt, C_air, G_box,
+                                               C_heater, G_heater, T_room)
+    return T_next, T_heater_next
+
+
+def _rk4_step_arrays(T, T_heater, heater_on, dt, C_air, G_box, C_heater, G_heater, V_heater, I_heater, T_room):
+    import numpy as np
+    return python_rk4_step(T, T_heater, np.where(heater_on, V_heater * I_heater, 0.0), dt, C_air, G_box, C_heater,
+                           G_heater, T_room)
+
+
+# Over float64 arrays: a compiled loop with numba, NumPy operations on the whole arrays without
+rk4_step_many = _jit(_rk4_step_many) if ACCELERATED else _rk4_step_arrays
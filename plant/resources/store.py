@@ -0,0 +1,181 @@
+""" Array-backed store of the model variables
+
+By default a Model keeps every variable as an instance attribute. When the
+backend is started with UNIFMU_VARIABLE_STORE set, the variables declared in
+modelDescription.xml are kept instead in one contiguous buffer, viewed as one
+NumPy array per type (float32, float64, the integer types, and bool for
+Boolean and Clock variables). Within an array the variables are sorted by
+value reference. Model attributes such as `self.T` become properties over
+their slot, so the model code is unchanged. Values are rounded to their
+declared type, as the master sees them anyway.
+
+A get or set over variables of the same array is one slice or fancy-indexing
+operation, and the FMU state is serialized as a copy of the buffer.
+
+    UNIFMU_VARIABLE_STORE=private    the buffer is private to the backend
+    UNIFMU_VARIABLE_STORE=<name>     the buffer is a multiprocessing.shared_memory block named
+                                     <name>_<instance name>, which another process opens with
+                                     VariableStore(model_description, "<name>_<instance name>")
+
+The master sets it per FMU (`variable_store` in the scenario), and unlinks the
+shared block if the backend did not.
+
+The shared buffer holds the values as of the last FMI call, so a master reading
+it directly must do so at communication points only.
+"""
+
+import atexit
+from pathlib import Path
+from xml.etree import ElementTree
+
+import numpy as np
+
+# FMI type of the variables that are stored, in the order of the arrays in the buffer
+DTYPES = {
+    "Float64": "float64",
+    "Float32": "float32",
+    "Int64": "int64",
+    "UInt64": "uint64",
+    "Int32": "int32",
+    "UInt32": "uint32",
+    "Int16": "int16",
+    "UInt16": "uint16",
+    "Int8": "int8",
+    "UInt8": "uint8",
+    "Boolean": "bool",
+    "Clock": "bool",
+}
+
+MODEL_DESCRIPTION = Path(__file__).resolve().parent.parent / "modelDescription.xml"
+
+
+def read_layout(model_description):
+    """ Return {dtype: [(value reference, name)]} of the variables that can be stored, sorted by value reference """
+
+    layout = {dtype: [] for dtype in DTYPES.values()}
+    for element in ElementTree.parse(model_description).getroot().find("ModelVariables"):
+        if element.tag in DTYPES:
+            layout[DTYPES[element.tag]].append((int(element.get("valueReference")), element.get("name")))
+    return {dtype: sorted(variables) for dtype, variables in layout.items() if variables}
+
+
+class VariableStore:
+    """ The variables of an FMU in one contiguous buffer
+
+    Parameters:
+        model_description   path of the modelDescription.xml the layout is read from
+        name                name of a shared memory block, None for a private buffer
+        create              create the shared memory block (the backend) rather than open it (another process)
+    """
+
+    def __init__(self, model_description=MODEL_DESCRIPTION, name=None, create=False):
+        layout = read_layout(model_description)
+
+        offsets = {}
+        self.size = 0
+        for dtype, variables in layout.items():
+            itemsize = np.dtype(dtype).itemsize
+            self.size += -self.size % itemsize # Aligned for the type
+            offsets[dtype] = self.size
+            self.size += itemsize * len(variables)
+
+        self.shared_memory = None
+        if name is None:
+            self.buffer = memoryview(bytearray(max(self.size, 1)))
+        else:
+            from multiprocessing import shared_memory
+            self.shared_memory = shared_memory.SharedMemory(name, create=create, size=max(self.size, 1))
+            self.buffer = self.shared_memory.buf
+            if create:
+                atexit.register(self.close, unlink=True)
+
+        # Arrays per dtype, and the (array, index) slot of each value reference
+        self.arrays = {}
+        self.slots = {}
+        for dtype, variables in layout.items():
+            array = np.frombuffer(self.buffer, dtype, len(variables), offsets[dtype])
+            self.arrays[dtype] = array
+            for index, (r, _) in enumerate(variables):
+                self.slots[r] = (array, index)
+
+    def accessors(self, references):
+        """ Return (getter, setter) of the values of `references`, or None if they are not all in the same array """
+
+        slots = [self.slots.get(r) for r in references]
+        if not slots or None in slots or any(array is not slots[0][0] for array, _ in slots):
+            return None
+        array = slots[0][0]
+        indices = [index for _, index in slots]
+        if indices == list(range(indices[0], indices[0] + len(indices))):
+            index = slice(indices[0], indices[0] + len(indices))
+        else:
+            index = np.array(indices)
+
+        def getter(model):
+            return array[index].tolist()
+
+        def setter(model, values):
+            array[index] = values
+
+        return getter, setter
+
+    def dump(self):
+        return bytes(self.buffer[:self.size])
+
+    def load(self, data):
+        self.buffer[:self.size] = data
+
+    def close(self, unlink=False):
+        if self.shared_memory is not None:
+            shared_memory, self.shared_memory = self.shared_memory, None
+            self.arrays, self.slots, self.buffer = {}, {}, None
+            try:
+                shared_memory.close()
+            except BufferError:
+                # The properties of a model still view the block, it is unmapped with the process
+                # (and SharedMemory.__del__ must not try again)
+                shared_memory.close = lambda: None
+            if unlink:
+                shared_memory.unlink()
+
+
+def _slot_property(array, index):
+
+    def get(model):
+        return array.item(index)
+
+    def set(model, value):
+        array[index] = value
+
+    return property(get, set)
+
+
+def attach_store(model, spec="private"):
+    """ Move the variables of `model` to a VariableStore and return it
+
+    The attributes named in model.all_parameters and model.all_references are
+    replaced by properties over their slots, on a subclass of the model's
+    class created for the instance.
+
+    Parameters:
+        model   the Model instance
+        spec    "private", or the name of the shared memory block to create, suffixed with "_<instance name>"
+    """
+
+    store = VariableStore(name=None if spec == "private" else f"{spec}_{model.instance_name}", create=True)
+
+    properties, attribute_slots = {}, {}
+    for r, attribute in {**model.all_parameters, **model.all_references}.items():
+        if r not in store.slots:
+            continue # Not declared in modelDescription.xml, or of a type that is not stored
+        if attribute in attribute_slots:
+            store.slots[r] = attribute_slots[attribute] # Several references to one attribute share its slot
+            continue
+        array, index = attribute_slots[attribute] = store.slots[r]
+        if attribute in model.__dict__:
+            array[index] = model.__dict__.pop(attribute)
+        properties[attribute] = _slot_property(array, index)
+
+    model.__class__ = type(model.__class__.__name__, (model.__class__,), properties)
+    model.store = store
+    return store
@@ -0,0 +1,183 @@
+""" Linear state-space surrogate of the plant, fitted from recorded traces
+
+Over a step of size dt, the plant's fmi3DoStep maps its state and input to
+
+    [T, T_heater](t + dt) = A(dt) [T, T_heater](t) + b(dt) in_heater_on + c(dt)
+
+LinearSurrogate holds A, b and c per step size, least-squares fitted from
+traces (the CSV files in data/, results of the master, or runs of Model), and
+steps scalars or NumPy arrays of many instances at once. SurrogateModel is a
+drop-in variant of Model whose fmi3DoStep applies them instead of integrating,
+for the step sizes and the parameters they were fitted for (it integrates
+otherwise). When the backend is started with UNIFMU_PLANT_SURROGATE set to the
+JSON file of a LinearSurrogate, Model becomes a SurrogateModel.
+
+    surrogate = LinearSurrogate.fit(*transitions(times, T, T_heater, heater_on))
+    surrogate.save("surrogate.json")
+    T, T_heater = surrogate.step(T, T_heater, heater_on, 0.5)   # floats or arrays
+"""
+
+import json
+import math
+
+import numpy as np
+
+from model import Fmi3Status, Model
+
+# Parameters of the plant the coefficients depend on, recorded with them
+PARAMETERS = ("C_air", "G_box", "C_heater", "G_heater", "V_heater", "I_heater", "initial_room_temperature")
+
+
+def transitions(times, T, T_heater, heater_on):
+    """ Return the (T, T_heater, heater_on, dt, next T, next T_heater) arrays of the steps of a trace
+
+    A row of the trace holds the state at the end of a step and the input of the next step, as in the results
+    of the master (columns Plant.Temperature, Plant.Temperature_heater and Controller.heater_ctrl).
+    """
+
+    times, T, T_heater = (np.asarray(a, dtype=float) for a in (times, T, T_heater))
+    heater_on = np.asarray(heater_on, dtype=float)
+    return T[:-1], T_heater[:-1], heater_on[:-1], np.diff(times), T[1:], T_heater[1:]
+
+
+class LinearSurrogate:
+    """ Affine maps of the plant state over one step, per step size
+
+    Parameters:
+        steps        {step size: (a11, a12, a21, a22, b1, b2, c1, c2)}, the rows of A, b and c
+        parameters   the plant parameters the coefficients were fitted for, {name: value}
+        residuals    {step size: root mean square residual of the fit (K)}
+    """
+
+    def __init__(self, steps, parameters=None, residuals=None):
+        self.steps = {self.key(dt): tuple(float(a) for a in coefficients) for dt, coefficients in steps.items()}
+        self.parameters = dict(parameters or {})
+        self.residuals = {self.key(dt): float(r) for dt, r in (residuals or {}).items()}
+
+    @staticmethod
+    def key(dt):
+        return round(float(dt), 9)
+
+    @classmethod
+    def fit(cls, T, T_heater, heater_on, dt, next_T, next_T_heater, parameters=None):
+        """ Least-squares fit of the coefficients of each step size found in the transitions
+
+        The arguments are arrays of equal length, as returned by transitions() (concatenated for several traces).
+        """
+
+        T, T_heater, heater_on, dt, next_T, next_T_heater = (
+            np.asarray(a, dtype=float) for a in (T, T_heater, heater_on, dt, next_T, next_T_heater))
+        keys = np.round(dt, 9)
+        steps, residuals = {}, {}
+        for key in np.unique(keys):
+            selected = keys == key
+            X = np.column_stack([T[selected], T_heater[selected], heater_on[selected], np.ones(selected.sum())])
+            Y = np.column_stack([next_T[selected], next_T_heater[selected]])
+            if np.linalg.matrix_rank(X) < X.shape[1]:
+                continue # Too few distinct states or a constant input, the map is not determined
+            W = np.linalg.lstsq(X, Y, rcond=None)[0]
+            (a11, a21), (a12, a22), (b1, b2), (c1, c2) = W
+            steps[key] = (a11, a12, a21, a22, b1, b2, c1, c2)
+            residuals[key] = math.sqrt(np.mean((X @ W - Y) ** 2))
+        return cls(steps, parameters, residuals)
+
+    @classmethod
+    def from_model(cls, step_sizes, steps=2000, seed=0, model=None):
+        """ Fit the coefficients to runs of `model` (a new Model by default) with a random heater input """
+
+        model = model or Model("plant", "", "", False, False, False, False, [])
+        rng = np.random.default_rng(seed)
+        columns = []
+        for dt in step_sizes:
+            heater_on = rng.random(steps) < 0.5
+            heater_on = np.repeat(heater_on[::10], 10)[:steps] # Switching every 10 steps, so the heater warms up
+            model.T, model.T_heater = rng.uniform(15.0, 40.0), rng.uniform(15.0, 70.0)
+            T, T_heater = [model.T], [model.T_heater]
+            for k in range(steps):
+                model.in_heater_on = bool(heater_on[k])
+                model.fmi3DoStep(k * dt, dt, False)
+                T.append(model.T)
+                T_heater.append(model.T_heater)
+            columns.append(transitions(np.arange(steps + 1) * dt, T, T_heater, np.append(heater_on, False)))
+        return cls.fit(*(np.concatenate(c) for c in zip(*columns)),
+                       parameters={name: getattr(model, name) for name in PARAMETERS})
+
+    def step(self, T, T_heater, heater_on, dt):
+        """ State after a step of `dt` from (T, T_heater) with the heater on or off, for floats or arrays """
+        a11, a12, a21, a22, b1, b2, c1, c2 = self.steps[self.key(dt)]
+        return a11 * T + a12 * T_heater + b1 * heater_on + c1, a21 * T + a22 * T_heater + b2 * heater_on + c2
+
+    def matches(self, model):
+        """ True if the parameters of `model` are those of the fit (to the precision of Float32 variables) """
+        return all(math.isclose(float(getattr(model, name)), value, rel_tol=1e-6)
+                   for name, value in self.parameters.items())
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump({"parameters": self.parameters,
+                       "steps": {repr(dt): coefficients for dt, coefficients in self.steps.items()},
+                       "residuals": {repr(dt): r for dt, r in self.residuals.items()}}, f, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            content = json.load(f)
+        return cls({float(dt): c for dt, c in content["steps"].items()}, content.get("parameters"),
+                   {float(dt): r for dt, r in content.get("residuals", {}).items()})
+
+
+class SurrogateModel(Model):
+    """ The plant Model, stepped by a LinearSurrogate
+
+    Parameters:
+        *args       the arguments of Model
+        surrogate   the LinearSurrogate, or the path of its JSON file
+    """
+
+    def __init__(self, *args, surrogate=None):
+        super().__init__(*args)
+        if surrogate is not None:
+            attach_surrogate(self, surrogate)
+        elif not hasattr(self, "surrogate"):
+            raise ValueError("SurrogateModel needs a surrogate, or UNIFMU_PLANT_SURROGATE in the environment")
+
+    def fmi3DoStep(
+            self,
+            current_communication_point: float,
+            communication_step_size: float,
+            no_set_fmu_state_prior_to_current_point: bool,
+    ):
+        coefficients = self.surrogate_steps.get(round(communication_step_size, 9))
+        if coefficients is None:
+            return super().fmi3DoStep(current_communication_point, communication_step_size,
+                                      no_set_fmu_state_prior_to_current_point)
+
+        a11, a12, a21, a22, b1, b2, c1, c2 = coefficients
+        T, T_heater = self.T, self.T_heater
+        heater_on = 1.0 if self.in_heater_on else 0.0
+        self.T = a11 * T + a12 * T_heater + b1 * heater_on + c1
+        self.T_heater = a21 * T + a22 * T_heater + b2 * heater_on + c2
+        return Fmi3Status.ok, False, False, False, current_communication_point + communication_step_size
+
+    def fmi3ExitInitializationMode(self):
+        self._update_surrogate_steps() # The parameters are set in initialization mode
+        return super().fmi3ExitInitializationMode()
+
+    def fmi3EnterStepMode(self):
+        self._update_surrogate_steps() # Tunable parameters may have been set in event mode
+        return super().fmi3EnterStepMode()
+
+    def _update_surrogate_steps(self):
+        self.surrogate_steps = self.surrogate.steps if self.surrogate.matches(self) else {}
+
+
+def attach_surrogate(model, surrogate):
+    """ Make `model` a SurrogateModel stepped by `surrogate` (a LinearSurrogate or the path of its JSON file) """
+
+    if not isinstance(surrogate, LinearSurrogate):
+        surrogate = LinearSurrogate.load(surrogate)
+    if not isinstance(model, SurrogateModel):
+        model.__class__ = type(model.__class__.__name__, (SurrogateModel, model.__class__), {})
+    model.surrogate = surrogate
+    model._update_surrogate_steps()
+    return surrogate
@@ -1,25 +1,34 @@
 # Author: Santiago Gil
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 import argparse
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from cosim.results import count_rows, iter_columns
+from cosim.decimation import decimate_chunks
+
 
 parser = argparse.ArgumentParser(description="A script that accepts one mandatory and one optional argument.")
     
 # Path (mandatory)
-parser.add_argument("path", type=str, help="Mandatory path argument")
+parser.add_argument("path", type=str, help="Mandatory path argument (.arrow, .parquet, .xor or .csv results file)")
 
 # Optional flag for saving the plot
 parser.add_argument("--save", action="store_true", help="Flag to save resulting plot")
 
+# Level of detail
+parser.add_argument("--buckets", type=int, default=2000, help="Min/max buckets per trace, roughly the plot width in pixels (0 draws every sample)")
+
 args = parser.parse_args()
 
 filename = args.path
 
 save_file = args.save
 
+n_buckets = args.buckets
+
 script_path = Path(__file__).resolve().parent
 
 font = {'font.family' : 'monospace',
@@ -33,17 +42,37 @@ font = {'font.family' : 'monospace',
 
 plt.rcParams.update(font)
 
-df_cosim = pd.read_csv(filename)
+# Only the plotted columns are read, chunk by chunk as NumPy arrays, so the memory
+# does not grow with the length of the run
+plotted_columns = [
+    "sim_time",
+    "supervisor_event",
+    "controller_event",
+    "Plant.Temperature",
+    "Plant.Temperature_heater",
+    "Controller.heater_ctrl",
+    "Supervisor.temperature_desired",
+    "Supervisor.heating_time",
+]
+
+# Continuous traces are reduced to a min/max envelope, piecewise-constant ones to their changes
+continuous_columns = ["Plant.Temperature", "Plant.Temperature_heater"]
+step_columns = [name for name in plotted_columns[1:] if name not in continuous_columns]
+data = decimate_chunks(iter_columns(filename, plotted_columns), count_rows(filename), "sim_time",
+                       continuous_columns, step_columns, n_buckets)
 
 fig, axes = plt.subplots(3,2, figsize=(20,16))
 plt.subplot(3,2,1)
 
-x_axis_values = df_cosim["sim_time"].to_list()
-supervisor_event_axis_values = df_cosim["supervisor_event"].to_list()
-controller_event_axis_values = df_cosim["controller_event"].to_list()
-controller_heater_ctrl_axis_values = df_cosim["Controller.heater_ctrl"].to_list()
+supervisor_event_axis_values = data["supervisor_event"]
+controller_event_axis_values = data["controller_event"]
+controller_heater_ctrl_axis_values = data["Controller.heater_ctrl"]
+temperature_axis_values = data["Plant.Temperature"]
+temperature_heater_axis_values = data["Plant.Temperature_heater"]
+temperature_desired_axis_values = data["Supervisor.temperature_desired"]
+heating_time_axis_values = data["Supervisor.heating_time"]
 
-plt.step(x_axis_values,supervisor_event_axis_values)
+plt.step(*supervisor_event_axis_values)
 plt.title("(1) Supervisor's triggered clock")
 plt.yticks([1.0, 0.0],["True","False"])
 plt.legend(['supervisor_event'])
@@ -53,7 +82,7 @@ plt.grid()
 plt.tight_layout()
 
 plt.subplot(3,2,2)
-plt.step(x_axis_values,controller_event_axis_values)
+plt.step(*controller_event_axis_values)
 plt.title("(2) Controller's periodic clock")
 plt.yticks([1.0, 0.0],["True","False"])
 plt.legend(['controller_event'])
@@ -63,11 +92,9 @@ plt.grid()
 plt.tight_layout()
 
 plt.subplot(3,2,3)
-df_cosim.plot(x = "sim_time",y = ["Plant.Temperature","Plant.Temperature_heater"],
-             figsize=(12,12),
-             title = "(3) Plant temperatures",
-             ax=axes[1,0],
-)
+plt.plot(*temperature_axis_values)
+plt.plot(*temperature_heater_axis_values)
+plt.title("(3) Plant temperatures")
 plt.xlabel('simulation time [s]')
 plt.ylabel('Temperature (°C)')
 plt.legend(['Box temperature','Heater temperature'])
@@ -76,7 +103,7 @@ plt.tight_layout()
 
 plt.subplot(3,2,4)
 
-plt.step(x_axis_values,controller_heater_ctrl_axis_values)
+plt.step(*controller_heater_ctrl_axis_values)
 plt.title("(4) Heater control")
 plt.yticks([1.0, 0.0],["True","False"])
 plt.legend(['heater_ctrl'])
@@ -86,11 +113,8 @@ plt.grid()
 plt.tight_layout()
 
 plt.subplot(3,2,5)
-df_cosim.plot(x = "sim_time",y = ["Supervisor.temperature_desired"],
-             figsize=(12,12),
-             title = "(5) Supervisor's desired temperature",
-             ax=axes[2,0],
-)
+plt.plot(*temperature_desired_axis_values)
+plt.title("(5) Supervisor's desired temperature")
 plt.xlabel('simulation time [s]')
 plt.ylabel('Temperature (°C)')
 plt.legend(['desired temperature'])
@@ -98,11 +122,8 @@ plt.grid()
 plt.tight_layout()
 
 plt.subplot(3,2,6)
-df_cosim.plot(x = "sim_time",y = ["Supervisor.heating_time"],
-             figsize=(12,12),
-             title = "(6) Supervisor's heating time",
-             ax=axes[2,1],
-)
+plt.plot(*heating_time_axis_values)
+plt.title("(6) Supervisor's heating time")
 plt.xlabel('simulation time [s]')
 plt.ylabel('time [s]')
 plt.legend(['heating time'])
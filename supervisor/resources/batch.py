@@ -0,0 +1,143 @@
+""" Vectorized supervisor for batches of instances
+
+SupervisorBatch advances n independent supervisors at once (e.g. the members
+of a parameter sweep or of a Monte Carlo study) with NumPy array operations.
+Its do_step and update_discrete_states follow Model.fmi3DoStep and
+Model.fmi3UpdateDiscreteStates element-wise; model.py itself stays scalar, as
+NumPy only pays off over arrays.
+
+    batch = SupervisorBatch(1000, seed=0, trigger_optimization_threshold=5.0)
+    events = batch.do_step(T, T_heater)     # arrays of 1000 temperatures
+    batch.update_discrete_states(events)
+"""
+
+import numpy as np
+
+from model import SupervisorState
+
+
+class SupervisorBatch:
+    """ n supervisors stored as arrays, one element per instance
+
+    Parameters:
+        n             number of instances
+        seed          seed of the random generator shared by the batch
+        **values      initial values of parameters, inputs, outputs or states, scalars or arrays of length n
+    """
+
+    def __init__(self, n, seed=None, **values):
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+
+        # Parameters
+        self.desired_temperature_parameter = np.full(n, 35.0)
+        self.max_t_heater = np.full(n, 60.0)
+        self.trigger_optimization_threshold = np.full(n, 10.0)
+        self.heater_underused_threshold = np.full(n, 10.0)
+        self.wait_til_supervising_timer = np.full(n, 100, dtype=np.int64)
+        self.setpoint_achievements_parameter = np.full(n, 1, dtype=np.int64)
+
+        # Inputs
+        self.T = np.zeros(n)
+        self.T_heater = np.zeros(n)
+
+        # Outputs
+        self.temperature_desired = np.full(n, 35.0)
+        self.lower_bound = np.full(n, 5.0)
+        self.heating_time = np.full(n, 20.0)
+        self.heating_gap = np.full(n, 20.0)
+
+        # State
+        self.supervisor_state = np.full(n, SupervisorState.Waiting, dtype=np.int8)
+        self.setpoint_achievements = np.zeros(n, dtype=np.int64)
+        self.previous_T = np.zeros(n)
+        self.previous_previous_T = np.zeros(n)
+        self.derivative_positive = np.zeros(n, dtype=bool)
+        self.cooldown_flag = np.zeros(n, dtype=bool)
+        self.supervisor_clock = np.zeros(n, dtype=bool)
+
+        for name, value in values.items():
+            current = getattr(self, name, None)
+            if not isinstance(current, np.ndarray):
+                raise AttributeError(f"SupervisorBatch has no variable '{name}'")
+            current[:] = value
+
+        self.next_action_timer = self.wait_til_supervising_timer.copy()
+        self.previous_desired_temperature_parameter = self.desired_temperature_parameter.copy()
+
+    def _optimization_needed(self):
+        heater_safe = self.T_heater < self.max_t_heater
+        heater_underused = (self.max_t_heater - self.T_heater) > self.heater_underused_threshold
+        temperature_residual_above_threshold = np.abs(self.T - self.desired_temperature_parameter) > self.trigger_optimization_threshold
+        return heater_safe & heater_underused & temperature_residual_above_threshold
+
+    def do_step(self, T=None, T_heater=None):
+        """ Advance every instance by one step, return the boolean array of event_handling_needed """
+
+        if T is not None:
+            self.T[:] = T
+        if T_heater is not None:
+            self.T_heater[:] = T_heater
+
+        timer = self.next_action_timer
+        waiting = self.supervisor_state == SupervisorState.Waiting
+        np.subtract(timer, 1, out=timer, where=waiting & (timer > 0))
+        event_handling_needed = waiting & (timer == 0)
+
+        listening = self.supervisor_state == SupervisorState.Listening
+        event_handling_needed |= listening & self._optimization_needed()
+
+        T, previous_T, previous_previous_T = self.T, self.previous_T, self.previous_previous_T
+        rising = (T > previous_T) & (previous_T > previous_previous_T)
+        falling = (T < previous_T) & (previous_T < previous_previous_T)
+        self.derivative_positive = (self.derivative_positive | rising) & ~falling
+
+        reached = T >= self.desired_temperature_parameter
+        event_handling_needed |= reached & self.derivative_positive & ~self.cooldown_flag
+        event_handling_needed |= (T < self.desired_temperature_parameter) & ~self.derivative_positive & self.cooldown_flag
+        event_handling_needed |= self.setpoint_achievements >= self.setpoint_achievements_parameter
+
+        self.supervisor_clock |= event_handling_needed
+
+        # Preserving the two last states of the temperature to identify derivative direction
+        self.previous_previous_T[:] = previous_T
+        self.previous_T[:] = T
+        return event_handling_needed
+
+    def update_discrete_states(self, active=None):
+        """ Update the discrete states of the instances selected by the boolean array `active` (all by default) """
+
+        if active is None:
+            active = np.ones(self.n, dtype=bool)
+        state, timer = self.supervisor_state, self.next_action_timer
+
+        listens = active & (state == SupervisorState.Waiting) & (timer == 0)
+        state[listens] = SupervisorState.Listening
+        timer[listens] = -1
+
+        optimizes = active & (state == SupervisorState.Listening) & self._optimization_needed()
+        n_optimizes = np.count_nonzero(optimizes)
+        if n_optimizes:
+            # Updating heating time around +-0.05 of the current heating time
+            self.heating_time[optimizes] += self.rng.random(n_optimizes) * 0.1 - 0.05
+            state[optimizes] = SupervisorState.Waiting
+            timer[optimizes] = self.wait_til_supervising_timer[optimizes]
+
+        T, desired = self.T, self.desired_temperature_parameter
+        achieved = active & (T >= desired) & self.derivative_positive & ~self.cooldown_flag
+        cooled_down = active & (T < desired) & ~self.derivative_positive & self.cooldown_flag
+        self.setpoint_achievements[achieved] += 1
+        self.cooldown_flag[achieved] = True
+        self.cooldown_flag[cooled_down] = False
+
+        updates = active & (self.setpoint_achievements >= self.setpoint_achievements_parameter)
+        n_updates = np.count_nonzero(updates)
+        if n_updates:
+            # Updating the setpoint for a random value within +- 1.0 of the current setpoint
+            rand_numbers = self.rng.random(n_updates) * 2 - 1.0
+            self.previous_desired_temperature_parameter[updates] = desired[updates]
+            desired[updates] += rand_numbers
+            self.temperature_desired[updates] += rand_numbers
+            self.setpoint_achievements[updates] = 0
+
+        self.supervisor_clock[active] = False
@@ -1,7 +1,10 @@
+import math
+import os
 import pickle
+import random
 from fractions import Fraction
 from enum import IntFlag
-import numpy as np
+from operator import attrgetter
 
 class Model:
     def __init__(
@@ -48,6 +51,12 @@ class Model:
         self.heating_time = 20.0
         self.heating_gap = 20.0
 
+        # Dormancy: number of next doSteps that cannot raise an event while T stays within
+        # [dormant_T_low, dormant_T_high], so a master may defer them. Computed when they are read (see _update_dormancy)
+        self.dormant_steps = 0
+        self.dormant_T_low = -math.inf
+        self.dormant_T_high = math.inf
+
         # State
         self.next_action_timer = self.wait_til_supervising_timer
         self.supervisor_state = SupervisorState.Waiting
@@ -62,6 +71,8 @@ class Model:
         self.clock_reference_to_interval = {
         }
 
+        # Random updates of the setpoint and heating time, local to the instance (batch.py vectorizes many instances)
+        self.rng = random.Random()
 
         self.reference_to_attribute = {
             999: "time",
@@ -71,6 +82,9 @@ class Model:
             3: "lower_bound",
             #4: "heating_time",
             5: "heating_gap",  
+            9: "dormant_steps",
+            10: "dormant_T_low",
+            11: "dormant_T_high",
             
         }
 
@@ -106,6 +120,15 @@ class Model:
         self.all_parameters = {**self.tunable_structural_parameters,
                                **self.parameters,
                                **self.tunable_parameters}
+
+        # Optional array-backed variable store (see store.py), enabled by the master through the environment
+        self.store = None
+        if os.environ.get("UNIFMU_VARIABLE_STORE"):
+            from store import attach_store
+            attach_store(self, os.environ["UNIFMU_VARIABLE_STORE"])
+
+        self._compile_access_tables()
+
     # ================= FMI3 =================
 
     # ================= doStep and updateDiscreteStates =================
@@ -131,7 +154,7 @@ class Model:
         if self.supervisor_state == SupervisorState.Listening:
             heater_safe = self.T_heater < self.max_t_heater
             heater_underused = (self.max_t_heater - self.T_heater) > self.heater_underused_threshold
-            temperature_residual_above_threshold = np.absolute(self.T - self.desired_temperature_parameter) > self.trigger_optimization_threshold
+            temperature_residual_above_threshold = abs(self.T - self.desired_temperature_parameter) > self.trigger_optimization_threshold
             if heater_safe and heater_underused and temperature_residual_above_threshold:
                 event_handling_needed = True
 
@@ -184,13 +207,13 @@ class Model:
         if self.supervisor_state == SupervisorState.Listening:
             heater_safe = self.T_heater < self.max_t_heater
             heater_underused = (self.max_t_heater - self.T_heater) > self.heater_underused_threshold
-            temperature_residual_above_threshold = np.absolute(self.T - self.desired_temperature_parameter) > self.trigger_optimization_threshold
+            temperature_residual_above_threshold = abs(self.T - self.desired_temperature_parameter) > self.trigger_optimization_threshold
             if heater_safe and heater_underused and temperature_residual_above_threshold:
                 # Reoptimize controller and then go into waiting
                 # self.controller_optimizer.optimize_controller() # -> This is we are to use the actual incubator optimizer
                 # For now, we use a simpler approach for the supervisor
             
-                rand_number = np.random.rand(1)[0] * 0.1 - 0.05
+                rand_number = self.rng.random() * 0.1 - 0.05
                 self.heating_time += rand_number # Updating heating time around +-0.05 of the current heating time       
                 self.supervisor_state = SupervisorState.Waiting
                 self.next_action_timer = self.wait_til_supervising_timer # Resetting the cooldown
@@ -204,15 +227,13 @@ class Model:
         if (self.setpoint_achievements >= self.setpoint_achievements_parameter):
             # Updating the setpoint for a random value within +- 1.0 of the current setpoint
             self.previous_desired_temperature_parameter = self.desired_temperature_parameter
-            rand_number = np.random.rand(1)[0] * 2 - 1.0
+            rand_number = self.rng.random() * 2 - 1.0
             self.desired_temperature_parameter += rand_number
             self.temperature_desired += rand_number
             self.setpoint_achievements = 0 # Resetting the counter
 
         self.supervisor_clock = False
 
-
-
         return (status, discrete_states_need_update, terminate_simulation, nominals_continuous_states_changed,
                 values_continuous_states_changed, next_event_time_defined, next_event_time)
 
@@ -284,6 +305,11 @@ class Model:
     # ================= Serialization =================
 
     def fmi3SerializeFmuState(self):
+        if self.store is not None:
+            # A copy of the variable buffer, and the internal state
+            return Fmi3Status.ok, pickle.dumps((self.store.dump(), self.state, self.next_action_timer, self.supervisor_state, self.rng.getstate(),
+                                                self.previous_T, self.previous_previous_T, self.previous_desired_temperature_parameter,
+                                                self.derivative_positive, self.cooldown_flag))
 
         bytes = pickle.dumps(
             (
@@ -304,11 +330,32 @@ class Model:
                 self.next_action_timer,
                 self.supervisor_state,
                 self.supervisor_clock,
+                self.rng.getstate(),
+                self.previous_T,
+                self.previous_previous_T,
+                self.previous_desired_temperature_parameter,
+                self.derivative_positive,
+                self.cooldown_flag,
             )
         )
         return Fmi3Status.ok, bytes
 
     def fmi3DeserializeFmuState(self, bytes: bytes):
+        if self.store is not None:
+            (variables, state, next_action_timer, supervisor_state, rng_state, previous_T, previous_previous_T,
+             previous_desired_temperature_parameter, derivative_positive, cooldown_flag) = pickle.loads(bytes)
+            self.store.load(variables)
+            self.state = state
+            self.next_action_timer = next_action_timer
+            self.supervisor_state = supervisor_state
+            self.rng.setstate(rng_state)
+            self.previous_T = previous_T
+            self.previous_previous_T = previous_previous_T
+            self.previous_desired_temperature_parameter = previous_desired_temperature_parameter
+            self.derivative_positive = derivative_positive
+            self.cooldown_flag = cooldown_flag
+            return Fmi3Status.ok
+
         (
             state,
             desired_temperature_parameter,
@@ -327,6 +374,12 @@ class Model:
             next_action_timer,
             supervisor_state,
             supervisor_clock,
+            rng_state,
+            previous_T,
+            previous_previous_T,
+            previous_desired_temperature_parameter,
+            derivative_positive,
+            cooldown_flag,
         ) = pickle.loads(bytes)
         self.state = state
         self.desired_temperature_parameter = desired_temperature_parameter
@@ -345,6 +398,12 @@ class Model:
         self.next_action_timer = next_action_timer
         self.supervisor_state = supervisor_state
         self.supervisor_clock = supervisor_clock
+        self.rng.setstate(rng_state)
+        self.previous_T = previous_T
+        self.previous_previous_T = previous_previous_T
+        self.previous_desired_temperature_parameter = previous_desired_temperature_parameter
+        self.derivative_positive = derivative_positive
+        self.cooldown_flag = cooldown_flag
         return Fmi3Status.ok
     
     # ================= Getters =================
@@ -507,36 +566,113 @@ class Model:
 
     # ================= Helpers =================
 
-    def _set_value(self, references, values):
-        for r, v in zip(references, values):
+    def _update_dormancy(self):
+        """ Compute the dormant_* outputs from the state, the timer and the thresholds
+
+        fmi3DoStep raises an event when the timer of the Waiting state runs out, when the
+        temperature residual exceeds the threshold in the Listening state, when T crosses the
+        desired temperature in the direction that sets or resets the cooldown flag, or when
+        the setpoint has been achieved. The first bounds the number of steps, the others bound
+        T. The outputs are not changed by the doSteps in between, apart from dormant_steps.
+
+        Called by the getters of the dormant_* references only, so the steps of a master that does
+        not read them do not pay for it.
+        """
+
+        desired = self.desired_temperature_parameter
+        if self.setpoint_achievements >= self.setpoint_achievements_parameter:
+            steps = 0
+        elif self.supervisor_state == SupervisorState.Waiting:
+            steps = max(self.next_action_timer - 1, 0)
+        else:
+            steps = DORMANT_STEPS_MAX
+
+        low, high = -math.inf, math.inf
+        if self.supervisor_state == SupervisorState.Listening:
+            margin = 1e-9 * (abs(desired) + self.trigger_optimization_threshold) # Rounding of abs(T - desired)
+            low = desired - self.trigger_optimization_threshold + margin
+            high = desired + self.trigger_optimization_threshold - margin
+        if self.cooldown_flag:
+            low = max(low, desired) # An event when T drops below the desired temperature
+        else:
+            high = min(high, math.nextafter(desired, -math.inf)) # An event when T reaches it
+
+        self.dormant_steps = steps
+        self.dormant_T_low = low
+        self.dormant_T_high = high
+
+    def _compile_access_tables(self):
+        """ Precompute, per value reference, the attribute holding it and the FMIState bitmasks in which it can be set and read """
+
+        any_state = int(~FMIState(0))
+        event_or_initialization = int(FMIState.FMIEventModeState | FMIState.FMIInitializationModeState)
+        configuration = int(FMIState.FMIConfigurationModeState | FMIState.FMIReconfigurationModeState | FMIState.FMIInitializationModeState)
+
+        self.access_table = {}
+        for r, name in self.all_references.items():
             if (r in self.clocked_variables or r in self.tunable_parameters):
-                if (self.state == FMIState.FMIEventModeState or self.state == FMIState.FMIInitializationModeState):
-                    pass
-                else:
-                    return Fmi3Status.error
+                set_mask = event_or_initialization
             elif (r in self.tunable_structural_parameters):
-                if (self.state == FMIState.FMIConfigurationModeState or self.state == FMIState.FMIReconfigurationModeState or self.state == FMIState.FMIInitializationModeState):
-                    pass
-                else:
-                    return Fmi3Status.error
+                set_mask = configuration
             elif (r in self.parameters):
-                if (self.state == FMIState.FMIInitializationModeState):
-                    pass
+                set_mask = int(FMIState.FMIInitializationModeState)
+            else:
+                set_mask = any_state
+            get_mask = event_or_initialization if r in self.clocked_variables else any_state
+            self.access_table[r] = (name, get_mask, set_mask)
+
+        # Compiled (getter, setter, readable states, writable states) per sequence of value references
+        self.access_plans = {}
+        self.any_state = any_state
+
+    def _access_plan(self, references):
+        key = tuple(references)
+        plan = self.access_plans.get(key)
+        if plan is None:
+            names = []
+            get_mask = set_mask = self.any_state
+            for r in key:
+                name, get_allowed, set_allowed = self.access_table[r]
+                names.append(name)
+                get_mask &= get_allowed
+                set_mask &= set_allowed
+            accessors = self.store.accessors(key) if self.store is not None else None
+            if accessors is not None:
+                getter, setter = accessors # One slice or fancy-indexing operation on a store array
+            else:
+                if len(names) == 1:
+                    getter = lambda model, name=names[0]: (getattr(model, name),)
+                elif names:
+                    getter = attrgetter(*names)
                 else:
-                    return Fmi3Status.error
-            setattr(self, self.all_references[r], v)
+                    getter = lambda model: ()
+                if self.store is None:
+                    setter = lambda model, values, names=tuple(names): model.__dict__.update(zip(names, values))
+                else:
+                    setter = lambda model, values, names=tuple(names): [setattr(model, n, v) for n, v in zip(names, values)]
+            if not DORMANCY_REFERENCES.isdisjoint(key): # Computed from the state when they are read
+                getter = lambda model, read=getter: model._update_dormancy() or read(model)
+            if len(self.access_plans) >= 64: # A master uses a handful of reference sets, bound the odd one
+                self.access_plans.clear()
+            # The combined masks are expanded to the sets of states they allow, one membership test per call
+            readable = frozenset(state for state in FMIState if state & get_mask)
+            writable = frozenset(state for state in FMIState if state & set_mask)
+            plan = self.access_plans[key] = (getter, setter, readable, writable)
+        return plan
+
+    def _set_value(self, references, values):
+        # All references are checked before any value is stored
+        _, setter, _, writable = self.access_plans.get(tuple(references)) or self._access_plan(references)
+        if self.state not in writable:
+            return Fmi3Status.error
+        setter(self, values)
         return Fmi3Status.ok
 
     def _get_value(self, references):
-
-        values = []
-        for r in references:
-            if r in self.clocked_variables:
-                if not ((self.state == FMIState.FMIEventModeState) or (self.state == FMIState.FMIInitializationModeState)):
-                    return Fmi3Status.error
-            values.append(getattr(self, self.all_references[r]))
-
-        return Fmi3Status.ok, values
+        getter, _, readable, _ = self.access_plans.get(tuple(references)) or self._access_plan(references)
+        if self.state not in readable:
+            return Fmi3Status.error, []
+        return Fmi3Status.ok, list(getter(self))
 
 class Fmi3Status():
     """
@@ -568,6 +704,13 @@ class FMIState(IntFlag):
     FMIStepModeState            = 1 << 8,
     FMIClockActivationMode      = 1 << 9
 
+# dormant_steps when only T can trigger an event (largest UInt32)
+DORMANT_STEPS_MAX = 2**32 - 1
+
+# Value references of dormant_steps, dormant_T_low and dormant_T_high, computed when they are read
+DORMANCY_REFERENCES = frozenset((9, 10, 11))
+
+
 class SupervisorState():
     Initialized = 0
     Waiting = 1
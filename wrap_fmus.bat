@@ -1,22 +1,32 @@
 @echo off
 
+REM The Python resources are byte-compiled into the FMUs (hash-based .pyc files stay valid after
+REM extraction), so the backends do not compile them at every start. The __pycache__ folders are
+REM removed from the sources afterwards so that edits to the models are never shadowed.
+
 REM Plant
 if exist plant.fmu del plant.fmu
+python -m compileall -q --invalidation-mode unchecked-hash plant\resources
 pushd plant
 powershell -Command "Compress-Archive -Path * -DestinationPath plant.zip"
 popd
 move /Y plant\plant.zip plant.fmu
+for /d /r plant %%d in (__pycache__) do @if exist "%%d" rd /s /q "%%d"
 
 REM Controller
 if exist controller.fmu del controller.fmu
+python -m compileall -q --invalidation-mode unchecked-hash controller\resources
 pushd controller
 powershell -Command "Compress-Archive -Path * -DestinationPath controller.zip"
 popd
 move /Y controller\controller.zip controller.fmu
+for /d /r controller %%d in (__pycache__) do @if exist "%%d" rd /s /q "%%d"
 
 REM Supervisor
 if exist supervisor.fmu del supervisor.fmu
+python -m compileall -q --invalidation-mode unchecked-hash supervisor\resources
 pushd supervisor
 powershell -Command "Compress-Archive -Path * -DestinationPath supervisor.zip"
 popd
 move /Y supervisor\supervisor.zip supervisor.fmu
+for /d /r supervisor %%d in (__pycache__) do @if exist "%%d" rd /s /q "%%d"
@@ -1,19 +1,35 @@
 #!/bin/bash
 
+# The Python resources are byte-compiled into the FMUs (hash-based .pyc files stay valid after
+# extraction), so the backends do not compile them at every start. The __pycache__ folders are
+# removed from the sources afterwards so that edits to the models are never shadowed.
+precompile() {
+    python3 -m compileall -q --invalidation-mode unchecked-hash "$1/resources"
+}
+clean() {
+    find "$1" -name __pycache__ -type d -prune -exec rm -rf {} +
+}
+
 # Plant
 rm plant.fmu
+precompile plant
 (cd plant && zip -r plant.fmu .)
 cp plant/plant.fmu .
 rm plant/plant.fmu
+clean plant
 
 # Controller
 rm controller.fmu
+precompile controller
 (cd controller && zip -r controller.fmu .)
 cp controller/controller.fmu .
 rm controller/controller.fmu
+clean controller
 
 # Supervisor
 rm supervisor.fmu
+precompile supervisor
 (cd supervisor && zip -r supervisor.fmu .)
 cp supervisor/supervisor.fmu .
 rm supervisor/supervisor.fmu
+clean supervisor